@@ -66,7 +66,7 @@ import {
 } from "recharts";
 import Header from "../WelcomePage/Header";
 import { sessionLogsApi } from "@/lib/sessionLogsApi";
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import { toast } from "sonner";
 
 // Add interface for the mock session data structure
@@ -214,25 +214,46 @@ export default function SessionHistoryPage() {
     },
   };
 
+  // The history is fetched a page at a time, following the server's
+  // keyset cursor (`next`) when more sessions are requested
   const {
-    data: sessionData = mockSessionData,
+    data,
     isLoading,
     isError,
-  } = useQuery({
-    queryKey: ["sessionLogs"],
-    queryFn: async () => {
-      if (!isAuthenticated) return mockSessionData;
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useInfiniteQuery({
+    queryKey: ["sessionLogs", dateRange.from, dateRange.to],
+    queryFn: async ({ pageParam }) => {
+      if (!isAuthenticated) return { logs: mockSessionData, next: null };
       try {
-        const response = await sessionLogsApi.getAllSessionLogs();
-        return response;
+        return await sessionLogsApi.getSessionLogsPage(
+          {
+            from: dateRange.from.toISOString(),
+            to: dateRange.to.toISOString(),
+          },
+          pageParam
+        );
       } catch (error) {
         console.error("Failed to fetch session logs:", error);
-        return mockSessionData;
+        if (pageParam) {
+          toast.error("Failed to load more sessions. Please try again.");
+          throw error;
+        }
+        return { logs: mockSessionData, next: null };
       }
     },
+    initialPageParam: null as string | null,
+    getNextPageParam: (lastPage) => lastPage.next,
     enabled: isAuthenticated,
   });
 
+  const sessionData = useMemo(
+    () => data?.pages.flatMap((page) => page.logs) ?? mockSessionData,
+    [data]
+  );
+
   // Get unique projects and hosts for filters - Always call this hook
   const projects = useMemo(() => {
     return Array.from(
@@ -403,8 +424,8 @@ export default function SessionHistoryPage() {
     );
   }
 
-  // Show error state
-  if (isError) {
+  // Show error state (a failed "load more" keeps the sessions loaded so far)
+  if (isError && !data) {
     return (
       <div className="flex items-center justify-center h-screen">
         <p className="text-red-500">Failed to load session logs</p>
@@ -829,6 +850,17 @@ export default function SessionHistoryPage() {
                 No sessions found matching your filters.
               </div>
             )}
+            {hasNextPage && (
+              <div className="flex justify-center pt-4">
+                <Button
+                  variant="outline"
+                  onClick={() => fetchNextPage()}
+                  disabled={isFetchingNextPage}
+                >
+                  {isFetchingNextPage ? "Loading..." : "Load more sessions"}
+                </Button>
+              </div>
+            )}
           </CardContent>
         </Card>
 
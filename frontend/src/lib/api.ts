@@ -20,6 +20,11 @@ export interface Room {
   auto_closed?: boolean;
 }
 
+export interface PaginatedResponse<T> {
+  next: string | null;
+  results: T[];
+}
+
 export interface CreateRoomData {
   project_name: string;
   point_system: string;
@@ -43,9 +48,15 @@ export const roomsApi = {
     return response.data;
   },
 
-  // Get all rooms
-  getAll: async (): Promise<Room[]> => {
-    const response = await apiClient.get("/rooms/");
+  // Get rooms the current user hosts or has joined, newest first.
+  // Pass the returned `next` cursor URL to fetch the following page.
+  getAll: async (
+    params: { status?: string; from?: string; to?: string; next?: string } = {}
+  ): Promise<PaginatedResponse<Room>> => {
+    const { next, ...filters } = params;
+    const response = next
+      ? await apiClient.get(next)
+      : await apiClient.get("/rooms/", { params: filters });
     return response.data;
   },
 
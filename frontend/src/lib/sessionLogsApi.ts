@@ -1,33 +1,54 @@
 import apiClient from "./axios";
 
-export const sessionLogsApi = {
-  getAllSessionLogs: async () => {
-    const response = await apiClient.get(`/session-logs/all/`);
+export interface SessionLogFilters {
+  room?: string;
+  project?: string;
+  point_system?: string;
+  // ISO 8601 dates or datetimes, both inclusive
+  from?: string;
+  to?: string;
+}
+
+// Transform the backend data to match frontend expectations
+const transformSessionLog = (log: any) => ({
+  id: log.id,
+  roomCode: log.room_code,
+  roomHost: log.room_host,
+  storyPointAverage: log.story_point_average,
+  participantSelections: log.participant_selections,
+  // If log.created_at is a Django datetime string, store as Date object
+  timestamp: new Date(log.created_at),
+  // sessionDuration in milliseconds
+  sessionDuration:
+    new Date(log.last_activity ?? log.created_at).getTime() -
+    new Date(log.created_at).getTime(),
+  // Counted per room by the server
+  storiesEstimated: log.stories_estimated,
+  totalVotes: Object.keys(log.participant_selections).length,
+  participantCount: Object.keys(log.participant_selections).length,
+  project: log.project_name || "Unknown Project",
+  // If you want the raw timestamp in milliseconds:
+  createdAtMs: new Date(log.created_at).getTime(),
+});
 
-    // Transform the backend data to match frontend expectations
-    const transformedData = response.data.map((log: any) => ({
-      id: log.id,
-      roomCode: log.room_code,
-      roomHost: log.room_host,
-      storyPointAverage: log.story_point_average,
-      participantSelections: log.participant_selections,
-      // If log.created_at is a Django datetime string, store as Date object
-      timestamp: new Date(log.created_at),
-      // sessionDuration in milliseconds
-      sessionDuration:
-        new Date(log.last_activity ?? log.created_at).getTime() -
-        new Date(log.created_at).getTime(),
-      storiesEstimated: response.data.filter(
-        (s: any) => s.room_code === log.room_code
-      ).length,
-      totalVotes: Object.keys(log.participant_selections).length,
-      participantCount: Object.keys(log.participant_selections).length,
-      project: log.project_name || "Unknown Project",
-      // If you want the raw timestamp in milliseconds:
-      createdAtMs: new Date(log.created_at).getTime(),
-    }));
+export const sessionLogsApi = {
+  // One keyset page of the filtered history, newest first. Pass the
+  // previous page's `next` URL to get the page after it; `next` is null
+  // once the filtered range is exhausted.
+  getSessionLogsPage: async (
+    filters: SessionLogFilters = {},
+    next: string | null = null
+  ) => {
+    const response = next
+      ? await apiClient.get(next)
+      : await apiClient.get(`/session-logs/all/`, {
+          params: { ...filters, page_size: 50 },
+        });
 
-    return transformedData;
+    return {
+      logs: response.data.results.map(transformSessionLog),
+      next: (response.data.next as string | null) ?? null,
+    };
   },
 
   exportAllSessionLogs: async () => {
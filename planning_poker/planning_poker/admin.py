@@ -2,9 +2,24 @@ from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from planning_poker.db_router import replica_reads
 from planning_poker.models import Room, Participant, SessionLog, UserRole, AnonymousSession
 
 
+class ReplicaChangeListMixin:
+    """Read list pages (not bulk actions) from the read replica"""
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method != "GET":
+            return super().changelist_view(request, extra_context)
+        with replica_reads(request.user):
+            response = super().changelist_view(request, extra_context)
+            # Template responses run their queries when rendered
+            if hasattr(response, "render"):
+                response.render()
+        return response
+
+
 class ParticipantInline(admin.TabularInline):
     model = Participant
     extra = 0
@@ -31,7 +46,7 @@ class UserAdmin(BaseUserAdmin):
 
 
 @admin.register(Room)
-class RoomAdmin(admin.ModelAdmin):
+class RoomAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = [
         "id",
         "code",
@@ -62,7 +77,7 @@ class RoomAdmin(admin.ModelAdmin):
 
 
 @admin.register(Participant)
-class ParticipantAdmin(admin.ModelAdmin):
+class ParticipantAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ["id", "user", "room", "card_selection", "has_voted"]
     list_filter = ["room"]
     search_fields = ["user__username", "room__code"]
@@ -75,7 +90,7 @@ class ParticipantAdmin(admin.ModelAdmin):
 
 
 @admin.register(SessionLog)
-class SessionLogAdmin(admin.ModelAdmin):
+class SessionLogAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = [
         "id",
         "room",
@@ -99,7 +114,7 @@ class SessionLogAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserRole)
-class UserRoleAdmin(admin.ModelAdmin):
+class UserRoleAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ["user", "role", "user_email", "user_last_login", "last_room"]
     list_filter = ["role"]
     search_fields = ["user__username", "user__email"]
@@ -122,7 +137,7 @@ class UserRoleAdmin(admin.ModelAdmin):
 
 
 @admin.register(AnonymousSession)
-class AnonymousSessionAdmin(admin.ModelAdmin):
+class AnonymousSessionAdmin(ReplicaChangeListMixin, admin.ModelAdmin):
     list_display = ["session_id_short", "user", "username", "created_at", "last_seen"]
     list_filter = ["created_at", "last_seen"]
     search_fields = ["session_id", "user__username"]
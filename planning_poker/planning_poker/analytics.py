@@ -0,0 +1,238 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import django
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Max
+
+SECONDS_PER_DAY = 86400
+# 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+WEEK_OFFSET_DAYS = 3
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def numeric_vote(card):
+    """Numeric value of a card the way exports count it, NaN for "?", "☕", "SKIPPED"..."""
+    if card and card != "SKIPPED" and card.replace(".", "").isdigit():
+        try:
+            return float(card)
+        except ValueError:
+            pass
+    return np.nan
+
+
+def extract_session_arrays(queryset, chunk_size=None, strings=None):
+    """
+    Read session logs into column arrays in a single pass.
+
+    Strings (point systems and card values) are stored as codes into the
+    returned ``strings`` list, which extends ``strings`` when one is given.
+    Votes are flattened into parallel arrays that point back at their log by
+    row index.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    strings = {value: code for code, value in enumerate(strings or [])}
+    ids = []
+    timestamps = []
+    room_ids = []
+    host_ids = []
+    averages = []
+    point_systems = []
+    participants = []
+    vote_logs = []
+    vote_cards = []
+
+    rows = queryset.order_by("id").values_list(
+        "id",
+        "timestamp",
+        "room_id",
+        "room__host_id",
+        "story_point_average",
+        "room__point_system",
+        "participant_selections",
+    )
+    for index, row in enumerate(rows.iterator(chunk_size=chunk_size)):
+        log_id, timestamp, room_id, host_id, average, point_system, selections = row
+        ids.append(log_id)
+        timestamps.append(int(timestamp.timestamp()))
+        room_ids.append(room_id)
+        host_ids.append(host_id)
+        averages.append(average)
+        point_systems.append(strings.setdefault(point_system, len(strings)))
+        participants.append(len(selections))
+        for card in selections.values():
+            if card:
+                vote_logs.append(index)
+                vote_cards.append(strings.setdefault(str(card), len(strings)))
+
+    return {
+        "id": np.array(ids, dtype=np.int64),
+        "timestamp": np.array(timestamps, dtype=np.int64),
+        "room_id": np.array(room_ids, dtype=np.int64),
+        "host_id": np.array(host_ids, dtype=np.int64),
+        "average": np.array(averages, dtype=np.float64),
+        "point_system": np.array(point_systems, dtype=np.int32),
+        "participant_count": np.array(participants, dtype=np.int32),
+        "vote_log": np.array(vote_logs, dtype=np.int32),
+        "vote_card": np.array(vote_cards, dtype=np.int32),
+        "strings": list(strings),
+    }
+
+
+def select_logs(arrays, mask):
+    """The logs where ``mask`` is True, with their votes re-indexed"""
+    positions = np.cumsum(mask) - 1
+    vote_mask = mask[arrays["vote_log"]]
+    selected = {
+        name: values[mask]
+        for name, values in arrays.items()
+        if name not in ("strings", "vote_log", "vote_card")
+    }
+    selected["vote_log"] = positions[arrays["vote_log"][vote_mask]]
+    selected["vote_card"] = arrays["vote_card"][vote_mask]
+    selected["strings"] = arrays["strings"]
+    return selected
+
+
+def _counts(values):
+    unique, counts = np.unique(values, return_counts=True)
+    return [
+        {"value": value, "count": count}
+        for value, count in zip(unique.tolist(), counts.tolist())
+    ]
+
+
+def compute_analytics(arrays):
+    """Aggregate the arrays from ``extract_session_arrays`` (pure NumPy, picklable)"""
+    strings = arrays["strings"]
+    log_count = len(arrays["id"])
+    if not log_count:
+        return {
+            "log_count": 0,
+            "vote_count": 0,
+            "consensus_rate": 0,
+            "velocity": [],
+            "estimate_distribution": [],
+            "vote_distribution": [],
+            "point_systems": {},
+        }
+
+    vote_log = arrays["vote_log"]
+    vote_card = arrays["vote_card"]
+    card_numeric = np.array([numeric_vote(value) for value in strings], dtype=np.float64)
+    skipped = np.array([value == "SKIPPED" for value in strings], dtype=bool)
+
+    # Consensus: at least one numeric vote and all numeric votes equal
+    numeric = card_numeric[vote_card]
+    is_numeric = ~np.isnan(numeric)
+    numeric_logs = vote_log[is_numeric]
+    numeric_values = numeric[is_numeric]
+    lowest = np.full(log_count, np.inf)
+    highest = np.full(log_count, -np.inf)
+    np.minimum.at(lowest, numeric_logs, numeric_values)
+    np.maximum.at(highest, numeric_logs, numeric_values)
+    has_numeric = np.bincount(numeric_logs, minlength=log_count) > 0
+    consensus = has_numeric & (lowest == highest)
+
+    # Velocity: stories and points per week (weeks start on Monday, UTC)
+    days = arrays["timestamp"] // SECONDS_PER_DAY
+    weeks = (days + WEEK_OFFSET_DAYS) // 7
+    week_keys, week_index = np.unique(weeks, return_inverse=True)
+    stories = np.bincount(week_index)
+    points = np.bincount(week_index, weights=arrays["average"])
+    week_consensus = np.bincount(week_index, weights=consensus)
+    week_starts = (week_keys * 7 - WEEK_OFFSET_DAYS).astype("datetime64[D]")
+    velocity = [
+        {
+            "week_start": str(start),
+            "stories": int(count),
+            "points": round(float(total), 2),
+            "consensus_rate": round(float(agreed / count), 3),
+        }
+        for start, count, total, agreed in zip(
+            week_starts, stories, points, week_consensus
+        )
+    ]
+
+    # Card histograms per point system
+    vote_systems = arrays["point_system"][vote_log]
+    width = len(strings)
+    card_counts = np.bincount(
+        vote_systems.astype(np.int64) * width + vote_card, minlength=width * width
+    ).reshape(width, width)
+    system_codes, system_stories = np.unique(arrays["point_system"], return_counts=True)
+    point_systems = {}
+    for code, story_count in zip(system_codes.tolist(), system_stories.tolist()):
+        cards = np.flatnonzero(card_counts[code])
+        point_systems[strings[code]] = {
+            "stories": story_count,
+            "cards": {strings[card]: int(card_counts[code, card]) for card in cards},
+        }
+
+    counted_votes = ~skipped[vote_card]
+    return {
+        "log_count": log_count,
+        "vote_count": int(counted_votes.sum()),
+        "consensus_rate": round(float(consensus.mean()), 3),
+        "velocity": velocity,
+        "estimate_distribution": _counts(np.round(arrays["average"], 2)),
+        "vote_distribution": _counts(numeric_values),
+        "point_systems": point_systems,
+    }
+
+
+def _init_worker():
+    django.setup()
+    connections.close_all()
+
+
+def get_process_pool():
+    """
+    The analytics process pool. Workers are started by a fork server (or
+    spawned where there is none) rather than forked from the threaded web
+    process, whose database connections and held locks they would inherit.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+            else:
+                context = multiprocessing.get_context("spawn")
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.ANALYTICS_PROCESS_POOL_WORKERS,
+                mp_context=context,
+                initializer=_init_worker,
+            )
+        return _pool
+
+
+def run_analytics(arrays):
+    """Aggregate in-process, or in the process pool for very large histories"""
+    if len(arrays["id"]) < settings.ANALYTICS_PROCESS_POOL_THRESHOLD:
+        return compute_analytics(arrays)
+    return get_process_pool().submit(compute_analytics, arrays).result()
+
+
+def host_analytics(user):
+    """
+    Analytics over every session log of the rooms ``user`` hosts, cached
+    until a newer session log is created for them.
+    """
+    # Imported here: pool workers import this module before Django is set up
+    from planning_poker.models import SessionLog
+
+    logs = SessionLog.objects.filter(room__host=user)
+    last_log_id = logs.aggregate(last_id=Max("id"))["last_id"] or 0
+    cache_key = f"session-analytics:{user.id}:{last_log_id}"
+
+    result = cache.get(cache_key)
+    if result is None:
+        result = run_analytics(extract_session_arrays(logs))
+        cache.set(cache_key, result, settings.ANALYTICS_CACHE_TTL)
+    return result
@@ -3,14 +3,21 @@ from rest_framework.routers import DefaultRouter
 
 from planning_poker.api_views import (
     RoomViewSet,
+    ExportJobViewSet,
     get_room_by_code,
     get_all_user_session_logs,
+    get_session_analytics,
+    get_session_dashboard,
     export_all_session_logs,
+    export_session_logs_admin,
+    get_connection_pool_metrics,
+    get_consumer_db_metrics,
 )
 
 # Create a router and register our viewsets with it.
 router = DefaultRouter()
 router.register(r"rooms", RoomViewSet, basename="room")
+router.register(r"exports", ExportJobViewSet, basename="export-job")
 
 # The API URLs are now determined automatically by the router.
 urlpatterns = [
@@ -22,9 +29,26 @@ urlpatterns = [
         name="last_room",
     ),
     path("session-logs/all/", get_all_user_session_logs, name="all_session_logs"),
+    path(
+        "session-logs/dashboard/", get_session_dashboard, name="session_dashboard"
+    ),
+    path(
+        "session-logs/analytics/", get_session_analytics, name="session_analytics"
+    ),
     path(
         "session-logs/export/", export_all_session_logs, name="export_all_session_logs"
     ),
+    path(
+        "session-logs/export/admin/",
+        export_session_logs_admin,
+        name="export_session_logs_admin",
+    ),
+    path(
+        "metrics/consumer-db/", get_consumer_db_metrics, name="consumer_db_metrics"
+    ),
+    path(
+        "metrics/db-pool/", get_connection_pool_metrics, name="db_pool_metrics"
+    ),
     path("auth/", include("accounts.api_urls")),
 ]
 
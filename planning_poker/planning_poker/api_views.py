@@ -1,20 +1,66 @@
-import csv
-from django.http import HttpResponse
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
-from planning_poker.serializers import RoomSerializer, SessionLogSerializer
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from planning_poker.serializers import (
+    ExportJobSerializer,
+    HostDailyStatsSerializer,
+    ProjectStatsSerializer,
+    RoomSerializer,
+    RoomStatsSerializer,
+    SessionLogSerializer,
+    SessionStatsSerializer,
+)
 from planning_poker.utils import generate_unique_room_code
-from planning_poker.models import Room, Participant, SessionLog, UserRole
-from planning_poker.fields import STATUS_CHOICES, POINT_SYSTEMS
+from planning_poker.models import (
+    ExportJob,
+    HostDailyStats,
+    Participant,
+    ProjectStats,
+    Room,
+    RoomStats,
+    Round,
+    SessionLog,
+    UserRole,
+)
+from planning_poker.room_resolver import room_resolver
+from planning_poker.pagination import RoomPagination, SessionLogPagination
+from planning_poker.filters import filter_date_range, filter_session_logs
+from planning_poker.exports import (
+    ALL_EXPORT_COLUMNS,
+    EXPORT_FORMATS,
+    ROOM_EXPORT_COLUMNS,
+    parse_export_options,
+    ranged_file_response,
+    streaming_export_response,
+    streaming_response,
+)
+from planning_poker.copy_export import admin_export_chunks
+from planning_poker.db_router import read_alias, reads_from_replica
+from planning_poker.round_service import ensure_round, reveal_room_votes, start_round
+from planning_poker.analytics import host_analytics
+from planning_poker.db_executor import connection_pool_stats, db_executor
+from planning_poker.tasks import run_export_job
+from planning_poker.fields import (
+    EXPORT_JOB_STATUS,
+    POINT_SYSTEM_CARDS,
+    POINT_SYSTEMS,
+    STATUS_CHOICES,
+)
+from planning_poker.room_service import upsert_participant, upsert_vote
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import timedelta
 import logging
+import os
 
 logger = logging.getLogger(__name__)
 
+# Room creation retries when an allocated code clashes with a legacy room code
+ROOM_CODE_ATTEMPTS = 3
+
 
 class RoomViewSet(viewsets.ModelViewSet):
     """
@@ -23,6 +69,28 @@ class RoomViewSet(viewsets.ModelViewSet):
 
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
+    pagination_class = RoomPagination
+
+    def get_queryset(self):
+        if self.action != "list":
+            return super().get_queryset()
+
+        # Only rooms the caller hosts or has joined, with the participant
+        # count computed in the same query
+        user = self.request.user
+        queryset = (
+            Room.objects.filter(
+                Q(host=user)
+                | Q(id__in=Participant.objects.filter(user=user).values("room_id"))
+            )
+            .select_related("host")
+            .annotate(participant_count=Count("participant"))
+        )
+
+        room_status = self.request.query_params.get("status")
+        if room_status:
+            queryset = queryset.filter(status=room_status.upper())
+        return filter_date_range(queryset, self.request, "created_at")
 
     def get_permissions(self):
         """
@@ -42,20 +110,6 @@ class RoomViewSet(viewsets.ModelViewSet):
             data = request.data.copy()
             data["host"] = request.user.id
 
-            # Generate unique code with better error handling
-            try:
-                code = generate_unique_room_code()
-                if not code or not code.strip():
-                    raise ValueError("Generated code is empty")
-                data["code"] = code.strip()
-                logger.info(f"Generated room code: {code}")
-            except ValueError as e:
-                logger.error(f"Code generation failed: {e}")
-                return Response(
-                    {"error": "Unable to generate unique room code. Please try again."},
-                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                )
-
             # Set default project name if not provided
             if not data.get("project_name"):
                 from planning_poker.helpers import generate_random_project_name
@@ -71,7 +125,30 @@ class RoomViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST,
                 )
 
-            room = serializer.save()
+            # Allocated codes never repeat; only a room created before the
+            # allocator (random code) can clash, in which case take the next one.
+            room = None
+            for _ in range(ROOM_CODE_ATTEMPTS):
+                try:
+                    code = generate_unique_room_code()
+                except ValueError as e:
+                    logger.error(f"Code generation failed: {e}")
+                    return Response(
+                        {"error": "Unable to generate unique room code. Please try again."},
+                        status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                    )
+                try:
+                    with transaction.atomic():
+                        room = serializer.save(code=code)
+                    break
+                except IntegrityError:
+                    logger.warning(f"Room code {code} already taken, allocating another")
+
+            if room is None:
+                return Response(
+                    {"error": "Unable to generate unique room code. Please try again."},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
             logger.info(f"Successfully created room: {room.code}")
 
             # Update admin's last room if they are admin
@@ -93,15 +170,8 @@ class RoomViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         """Fetch room details (GET /api/rooms/{id}/)"""
-        # Try to get by code first, then by ID
-        room = None
-        try:
-            room = Room.objects.get(code=pk)
-        except Room.DoesNotExist:
-            try:
-                room = Room.objects.get(id=pk)
-            except (Room.DoesNotExist, ValueError):
-                pass
+        # Resolve by code first, then by ID
+        room = room_resolver.get_room(pk)
 
         if not room:
             return Response(
@@ -192,35 +262,11 @@ class RoomViewSet(viewsets.ModelViewSet):
                     last_room.auto_closed = True
                     last_room.save()
 
-                    # Create a session log for the closed room if there were any votes
-                    participants = Participant.objects.filter(room=last_room)
-                    if participants.filter(card_selection__isnull=False).exists():
-                        selections = {}
-                        total = 0
-                        count = 0
-
-                        for participant in participants:
-                            if participant.card_selection:
-                                try:
-                                    card_value = float(participant.card_selection)
-                                    total += card_value
-                                    count += 1
-                                except ValueError:
-                                    # Handle non-numeric cards like "Pass", "?", etc.
-                                    pass
-                                selections[participant.user.username] = (
-                                    participant.card_selection
-                                )
-
-                        # Calculate average if there are numeric selections
-                        average = total / count if count > 0 else 0
-
-                        # Create session log for the closed session
-                        SessionLog.objects.create(
-                            room=last_room,
-                            story_point_average=average,
-                            participant_selections=selections,
-                        )
+                    # Reveal the round being voted on if there were any votes
+                    if Participant.objects.filter(
+                        room=last_room, card_selection__isnull=False
+                    ).exists():
+                        reveal_room_votes(last_room)
 
                     logger.info(f"Admin closed room {last_room.code} without rejoining")
 
@@ -260,6 +306,7 @@ class RoomViewSet(viewsets.ModelViewSet):
 
         # Reset all card selections
         Participant.objects.filter(room=room).update(card_selection=None)
+        start_round(room)
 
         # Update room status
         room.status = STATUS_CHOICES.ACTIVE
@@ -269,42 +316,68 @@ class RoomViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=True, methods=["post"])
-    def reveal(self, request, pk=None):
-        """Reveal cards (POST /api/rooms/{id}/reveal/)"""
+    def join(self, request, pk=None):
+        """Join the room as a participant (POST /api/rooms/{id}/join/)"""
         room = get_object_or_404(Room, id=pk)
+        upsert_participant(request.user, room)
 
-        # Check if the user is the host (in a real app)
-        # if request.user != room.host:
-        #     return Response({'error': 'Only the host can reveal cards'}, status=status.HTTP_403_FORBIDDEN)
+        serializer = self.get_serializer(room)
+        return Response(serializer.data)
 
-        participants = Participant.objects.filter(room=room)
-        selections = {}
-        total = 0
-        count = 0
+    @action(detail=True, methods=["post"])
+    def vote(self, request, pk=None):
+        """Select a card, joining the room if needed (POST /api/rooms/{id}/vote/)"""
+        room = get_object_or_404(Room, id=pk)
+        card_value = request.data.get("card_value")
 
-        for participant in participants:
-            if participant.card_selection:
-                try:
-                    card_value = float(participant.card_selection)
-                    total += card_value
-                    count += 1
-                except ValueError:
-                    # Handle non-numeric cards like "Pass", "?", etc.
-                    pass
+        valid_cards = POINT_SYSTEM_CARDS.get(
+            room.point_system, POINT_SYSTEM_CARDS[POINT_SYSTEMS.FIBONACCI]
+        )
+        if card_value not in valid_cards:
+            return Response(
+                {"error": "Invalid card value for this room's point system"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-                selections[participant.user.username] = participant.card_selection
+        upsert_vote(request.user, room, card_value)
+        ensure_round(room)
 
-        # Calculate average if there are numeric selections
-        average = total / count if count > 0 else 0
+        serializer = self.get_serializer(room)
+        return Response(serializer.data)
 
-        # Create session log
-        session_log = SessionLog.objects.create(
-            room=room, story_point_average=average, participant_selections=selections
-        )
+    @action(detail=True, methods=["post"])
+    def reveal(self, request, pk=None):
+        """Reveal cards (POST /api/rooms/{id}/reveal/)"""
+        room = get_object_or_404(Room, id=pk)
 
-        # Update room status
-        room.status = STATUS_CHOICES.COMPLETED
-        room.save()
+        # Check if the user is the host (in a real app)
+        # if request.user != room.host:
+        #     return Response({'error': 'Only the host can reveal cards'}, status=status.HTTP_403_FORBIDDEN)
+
+        # Reveals are idempotent: a retry, or a reveal of a round that was
+        # already revealed, returns its existing session log. Pass "round"
+        # (the round's sequence) to reveal that round only.
+        sequence = request.data.get("round")
+        if sequence is not None:
+            try:
+                sequence = int(sequence)
+            except (TypeError, ValueError):
+                return Response(
+                    {"error": "Round must be a round number"},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        try:
+            session_log, _ = reveal_room_votes(room, sequence)
+        except Round.DoesNotExist:
+            return Response(
+                {"error": "Round not found"}, status=status.HTTP_404_NOT_FOUND
+            )
+        if session_log is None:
+            return Response(
+                {"error": "Round was revealed but its session log is no longer available"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        room.refresh_from_db()
 
         # Return both room and session log data
         room_serializer = self.get_serializer(room)
@@ -326,35 +399,45 @@ class RoomViewSet(viewsets.ModelViewSet):
             )
 
         room = get_object_or_404(Room, id=pk)
-        participant = get_object_or_404(Participant, id=participant_id, room=room)
 
         # Check if the user is the host (in a real app)
         # if request.user != room.host:
         #     return Response({'error': 'Only the host can skip participants'}, status=status.HTTP_403_FORBIDDEN)
 
         # Set a special value for skipped participants
-        participant.card_selection = "SKIPPED"
-        participant.save()
+        skipped = Participant.objects.filter(id=participant_id, room=room).update(
+            card_selection="SKIPPED"
+        )
+        if not skipped:
+            return Response(
+                {"error": "Participant not found"}, status=status.HTTP_404_NOT_FOUND
+            )
 
         # Return updated room data
         serializer = self.get_serializer(room)
         return Response(serializer.data)
 
     @action(detail=True, methods=["get"])
+    @reads_from_replica
     def logs(self, request, pk=None):
         """Fetch session logs (GET /api/rooms/{id}/logs/)"""
         room = get_object_or_404(Room, id=pk)
-        logs = SessionLog.objects.filter(room=room).order_by("-timestamp")
 
         # Check if the user is the host or a participant (in a real app)
         # if request.user != room.host and not Participant.objects.filter(room=room, user=request.user).exists():
         #     return Response({'error': 'Access denied'}, status=status.HTTP_403_FORBIDDEN)
 
-        # Serialize the logs
-        serializer = SessionLogSerializer(logs, many=True)
+        paginator, logs = paginate_session_logs(
+            request, SessionLog.objects.filter(room=room)
+        )
 
         return Response(
-            {"room_id": room.id, "room_code": room.code, "logs": serializer.data}
+            {
+                "room_id": room.id,
+                "room_code": room.code,
+                "logs": logs,
+                "next": paginator.get_next_link(),
+            }
         )
 
     @action(
@@ -363,6 +446,7 @@ class RoomViewSet(viewsets.ModelViewSet):
         url_path="session-logs",
         permission_classes=[IsAuthenticated],
     )
+    @reads_from_replica
     def session_logs(self, request, pk=None):
         """
         Expose all session logs (votes/results) for a room to the room creator (host).
@@ -374,9 +458,10 @@ class RoomViewSet(viewsets.ModelViewSet):
                 {"error": "Only the room creator can view session logs."},
                 status=status.HTTP_403_FORBIDDEN,
             )
-        logs = SessionLog.objects.filter(room=room).order_by("-timestamp")
-        serializer = SessionLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        paginator, logs = paginate_session_logs(
+            request, SessionLog.objects.filter(room=room)
+        )
+        return paginator.get_paginated_response(logs)
 
     @action(
         detail=True,
@@ -384,10 +469,12 @@ class RoomViewSet(viewsets.ModelViewSet):
         url_path="session-logs/export",
         permission_classes=[IsAuthenticated],
     )
+    @reads_from_replica
     def export_session_logs(self, request, pk=None):
         """
-        Export session logs as CSV for a specific room.
-        GET /api/rooms/{id}/session-logs/export/
+        Export session logs for a specific room, streamed as CSV (default) or
+        NDJSON, optionally gzip-compressed.
+        GET /api/rooms/{id}/session-logs/export/?output=csv|ndjson&gzip=1
         """
         room = get_object_or_404(Room, id=pk)
         if room.host != request.user:
@@ -396,79 +483,62 @@ class RoomViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        logs = SessionLog.objects.filter(room=room).order_by("-timestamp")
+        export_format, compress = parse_export_options(request)
+        if export_format is None:
+            return Response(
+                {"error": "Unsupported export format. Use csv or ndjson."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
 
-        # Create CSV response
-        response = HttpResponse(content_type="text/csv")
-        response["Content-Disposition"] = (
-            f'attachment; filename="session_logs_{room.code}.csv"'
+        logs = (
+            SessionLog.objects.filter(room=room)
+            .select_related("room", "room__host")
+            .order_by("-timestamp", "-id")
         )
-
-        writer = csv.writer(response)
-        writer.writerow(
-            [
-                "Session ID",
-                "Room Code",
-                "Project Name",
-                "Host",
-                "Timestamp",
-                "Story Point Average",
-                "Total Participants",
-                "Participant Selections",
-                "Total Votes",
-            ]
+        return streaming_export_response(
+            request,
+            logs,
+            ROOM_EXPORT_COLUMNS,
+            f"session_logs_{room.code}",
+            export_format,
+            compress,
         )
 
-        for log in logs:
-            participant_count = len(log.participant_selections)
-            total_votes = sum(
-                1
-                for selection in log.participant_selections.values()
-                if selection and selection != "SKIPPED"
-            )
-
-            # Format participant selections as readable string
-            selections_str = "; ".join(
-                [f"{user}: {vote}" for user, vote in log.participant_selections.items()]
-            )
 
-            writer.writerow(
-                [
-                    log.id,
-                    room.code,
-                    room.project_name,
-                    room.host.username,
-                    log.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                    log.story_point_average,
-                    participant_count,
-                    selections_str,
-                    total_votes,
-                ]
-            )
+def paginate_session_logs(request, queryset):
+    """
+    Apply the history filters to ``queryset``, return one keyset page of it
+    serialized, with the per-room story count for the rooms on that page
+    computed in a single grouped query.
+    """
+    queryset = filter_session_logs(queryset, request)
+    paginator = SessionLogPagination()
+    page = paginator.paginate_queryset(
+        queryset.select_related("room", "room__host"), request
+    )
 
-        return response
+    story_counts = dict(
+        queryset.filter(room_id__in={log.room_id for log in page})
+        .order_by()
+        .values("room_id")
+        .annotate(count=Count("id"))
+        .values_list("room_id", "count")
+    )
+    serializer = SessionLogSerializer(
+        page, many=True, context={"story_counts": story_counts}
+    )
+    return paginator, serializer.data
 
 
 @api_view(["GET"])
 def get_room_by_code(request, room_code):
     """Get room by code (GET /api/rooms/code/{code}/) - No auth required for room lookup"""
-    try:
-        room = Room.objects.get(code=room_code)
-        # Return basic room info without sensitive participant details for unauthenticated users
-        if not request.user.is_authenticated:
-            return Response(
-                {
-                    "id": room.id,
-                    "code": room.code,
-                    "project_name": room.project_name,
-                    "status": room.status,
-                    "host": room.host.username,
-                    "participant_count": Participant.objects.filter(room=room).count(),
-                }
-            )
+    room = room_resolver.get_room(room_code, Room.objects.select_related("host"))
+    if room is None:
+        return Response({"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        # For authenticated users, return full details
-        participants = Participant.objects.filter(room=room)
+    # Return basic room info without sensitive participant details for unauthenticated users
+    if not request.user.is_authenticated:
         return Response(
             {
                 "id": room.id,
@@ -476,120 +546,222 @@ def get_room_by_code(request, room_code):
                 "project_name": room.project_name,
                 "status": room.status,
                 "host": room.host.username,
-                "participants": [
-                    {
-                        "id": p.id,
-                        "username": p.user.username,
-                        "has_selected": p.card_selection is not None,
-                    }
-                    for p in participants
-                ],
+                "participant_count": Participant.objects.filter(room=room).count(),
             }
         )
-    except Room.DoesNotExist:
-        return Response({"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND)
+
+    # For authenticated users, return full details
+    participants = Participant.objects.filter(room=room).select_related("user")
+    return Response(
+        {
+            "id": room.id,
+            "code": room.code,
+            "project_name": room.project_name,
+            "status": room.status,
+            "host": room.host.username,
+            "participants": [
+                {
+                    "id": p.id,
+                    "username": p.user.username,
+                    "has_selected": p.card_selection is not None,
+                }
+                for p in participants
+            ],
+        }
+    )
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
+@reads_from_replica
 def get_all_user_session_logs(request):
     """
-    Get all session logs for all rooms created by the current user (host).
-    GET /api/session-logs/all/
+    Get session logs for all rooms created by the current user (host), newest
+    first, one keyset page at a time.
+    GET /api/session-logs/all/?room=&project=&point_system=&from=&to=&cursor=
     """
-    user = request.user
-    # Get all rooms where the user is the host
-    rooms = Room.objects.filter(host=user)
-    # Get all session logs for those rooms with room information
-    logs = (
-        SessionLog.objects.filter(room__in=rooms)
-        .select_related("room", "room__host")
-        .order_by("-timestamp")
+    paginator, logs = paginate_session_logs(
+        request, SessionLog.objects.filter(room__host=request.user)
     )
-    serializer = SessionLogSerializer(logs, many=True)
-    return Response(serializer.data)
+    return paginator.get_paginated_response(logs)
 
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
-def export_all_session_logs(request):
+@reads_from_replica
+def get_session_dashboard(request):
     """
-    Export all session logs for all rooms created by the current user as CSV.
-    GET /api/session-logs/export/
+    Session analytics for the current user's rooms, read from the rollup
+    tables (one row per room / project / day, not per session log).
+    GET /api/session-logs/dashboard/?days=30
     """
+    try:
+        days = int(request.query_params.get("days", 30))
+    except ValueError:
+        return Response(
+            {"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
     user = request.user
-    rooms = Room.objects.filter(host=user)
-    logs = (
-        SessionLog.objects.filter(room__in=rooms)
-        .select_related("room", "room__host")
-        .order_by("-timestamp")
+    rooms = list(
+        RoomStats.objects.filter(room__host=user)
+        .select_related("room")
+        .order_by("-last_session_at")
     )
-
-    # Create CSV response
-    response = HttpResponse(content_type="text/csv")
-    response["Content-Disposition"] = (
-        f'attachment; filename="all_session_logs_{user.username}.csv"'
+    projects = ProjectStats.objects.filter(host=user).order_by("project_name")
+    daily = HostDailyStats.objects.filter(
+        host=user, date__gte=timezone.localdate() - timedelta(days=days)
+    ).order_by("date")
+
+    # Unsaved row used only to add up the per-room totals
+    totals = RoomStats()
+    for room_stats in rooms:
+        totals.merge(room_stats)
+
+    return Response(
+        {
+            "totals": SessionStatsSerializer(totals).data,
+            "rooms": RoomStatsSerializer(rooms, many=True).data,
+            "projects": ProjectStatsSerializer(projects, many=True).data,
+            "daily": HostDailyStatsSerializer(daily, many=True).data,
+        }
     )
 
-    writer = csv.writer(response)
-    writer.writerow(
-        [
-            "Session ID",
-            "Room Code",
-            "Project Name",
-            "Host",
-            "Timestamp",
-            "Story Point Average",
-            "Total Participants",
-            "Participant Selections",
-            "Total Votes",
-            "Session Duration (estimated)",
-            "Consensus Reached",
-        ]
-    )
 
-    for log in logs:
-        participant_count = len(log.participant_selections)
-        total_votes = sum(
-            1
-            for selection in log.participant_selections.values()
-            if selection and selection != "SKIPPED"
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@reads_from_replica
+def get_session_analytics(request):
+    """
+    Velocity trends, estimate and vote distributions, consensus rates and
+    per-point-system card histograms over all of the current user's rooms.
+    GET /api/session-logs/analytics/
+    """
+    try:
+        return Response(host_analytics(request.user))
+    except Exception as e:
+        logger.error(f"Error computing session analytics: {e}")
+        return Response(
+            {"error": "Internal server error"},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR,
         )
 
-        # Format participant selections as readable string
-        selections_str = "; ".join(
-            [f"{user}: {vote}" for user, vote in log.participant_selections.items()]
-        )
 
-        # Calculate consensus (all votes are the same)
-        numeric_votes = []
-        for selection in log.participant_selections.values():
-            if selection and selection != "SKIPPED":
-                try:
-                    if selection.replace(".", "").isdigit():
-                        numeric_votes.append(float(selection))
-                except (ValueError, AttributeError):
-                    continue
-
-        consensus = len(set(numeric_votes)) == 1 if numeric_votes else False
-
-        # Estimate session duration (mock - you might want to track this properly)
-        estimated_duration = participant_count * 5  # 5 minutes per participant estimate
-
-        writer.writerow(
-            [
-                log.id,
-                log.room.code,
-                log.room.project_name,
-                log.room.host.username,
-                log.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-                log.story_point_average,
-                participant_count,
-                selections_str,
-                total_votes,
-                estimated_duration,
-                "Yes" if consensus else "No",
-            ]
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@reads_from_replica
+def export_all_session_logs(request):
+    """
+    Export all session logs for all rooms created by the current user, streamed
+    as CSV (default) or NDJSON, optionally gzip-compressed.
+    GET /api/session-logs/export/?output=csv|ndjson&gzip=1
+    """
+    export_format, compress = parse_export_options(request)
+    if export_format is None:
+        return Response(
+            {"error": "Unsupported export format. Use csv or ndjson."},
+            status=status.HTTP_400_BAD_REQUEST,
         )
 
+    user = request.user
+    logs = (
+        SessionLog.objects.filter(room__host=user)
+        .select_related("room", "room__host", "round")
+        .order_by("-timestamp", "-id")
+    )
+    return streaming_export_response(
+        request,
+        logs,
+        ALL_EXPORT_COLUMNS,
+        f"all_session_logs_{user.username}",
+        export_format,
+        compress,
+    )
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+@reads_from_replica
+def export_session_logs_admin(request):
+    """
+    Staff-only CSV export of every session log across all rooms, oldest
+    first. Streams straight from ``COPY ... TO STDOUT`` on PostgreSQL.
+    GET /api/session-logs/export/admin/?gzip=1
+    """
+    _, compress = parse_export_options(request)
+    filename = "session_logs_all_rooms.csv"
+    content_type = "text/csv"
+    if compress:
+        filename += ".gz"
+        content_type = "application/gzip"
+
+    chunks = admin_export_chunks(compress, using=read_alias(request.user))
+    response = streaming_response(request, chunks, content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def get_consumer_db_metrics(request):
+    """
+    Staff-only pool size, saturation and queue wait / run time percentiles of
+    the WebSocket consumers' database thread pool in this process.
+    GET /api/metrics/consumer-db/
+    """
+    return Response(db_executor.metrics())
+
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def get_connection_pool_metrics(request):
+    """
+    Staff-only psycopg connection pool counters of this process.
+    GET /api/metrics/db-pool/
+    """
+    stats = connection_pool_stats()
+    if stats is None:
+        return Response({"pooled": False})
+    return Response({"pooled": True, **stats})
+
+
+class ExportJobViewSet(
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
+    """
+    Background exports of all of the caller's session logs. Creating a job
+    queues a Celery task; poll the job for progress and fetch the file from
+    ``download`` once it has completed.
+    """
+
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(user=self.request.user).order_by("-created_at")
+
+    def perform_create(self, serializer):
+        job = serializer.save(user=self.request.user)
+        transaction.on_commit(lambda: run_export_job.delay(str(job.id)))
+
+    @action(detail=True, methods=["get"])
+    def download(self, request, pk=None):
+        """Serve the finished export, supporting resumable (Range) downloads"""
+        job = self.get_object()
+        if job.status != EXPORT_JOB_STATUS.COMPLETED:
+            return Response(
+                {"error": f"Export is not ready (status: {job.status})"},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if not job.file_path or not os.path.exists(job.file_path):
+            return Response(
+                {"error": "Export file has expired"}, status=status.HTTP_410_GONE
+            )
+
+        content_type = (
+            "application/gzip" if job.compress else EXPORT_FORMATS[job.export_format][0]
+        )
+        return ranged_file_response(request, job.file_path, content_type, job.filename)
@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class PlanningPokerConfig(AppConfig):
+    name = "planning_poker"
+
+    def ready(self):
+        # Connect model signal handlers
+        from planning_poker import signals  # noqa: F401
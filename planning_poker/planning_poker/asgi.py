@@ -9,9 +9,9 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "planning_poker.settings")
 django.setup()
 
 # Now import Django Channels components
-from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
-from planning_poker.routing import websocket_urlpatterns
+from planning_poker.routing import channel_routes, websocket_urlpatterns
 
 # Get the Django ASGI application
 django_asgi_app = get_asgi_application()
@@ -20,5 +20,6 @@ application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
         "websocket": AuthMiddlewareStack(URLRouter(websocket_urlpatterns)),
+        "channel": ChannelNameRouter(channel_routes),
     }
 )
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+from channels.consumer import AsyncConsumer
+from planning_poker.db_executor import db_executor, duration_summary
+from planning_poker.models import Room
+from planning_poker.room_state import encode_frame, room_state
+
+logger = logging.getLogger(__name__)
+
+# Channel the broadcaster worker consumes (python manage.py runworker room-broadcaster)
+BROADCASTER_CHANNEL = "room-broadcaster"
+# Seconds the frame relay waits after a failed receive, doubling up to the maximum
+RELAY_RETRY_DELAY = 0.5
+RELAY_RETRY_MAX_DELAY = 10
+
+
+@db_executor.sync_to_async
+def get_room(room_id):
+    return Room.objects.select_related("host").filter(id=room_id).first()
+
+
+def frames_group(group):
+    """Group of the worker processes holding sockets of room group ``group``"""
+    return f"{group}_frames"
+
+
+async def publish_room_mutation(channel_layer, room, group):
+    """Ask the broadcaster to send ``room``'s state to ``group``"""
+    await channel_layer.send(
+        BROADCASTER_CHANNEL,
+        {"type": "room.mutated", "room_id": room.id, "group": group},
+    )
+
+
+class RoomBroadcasterConsumer(AsyncConsumer):
+    """
+    Builds and encodes room state frames on behalf of the socket-holding
+    workers, when ROOM_BROADCASTER is on.
+
+    Consumers report a room mutation with ``publish_room_mutation`` instead
+    of loading and sending the state themselves. Here the state is loaded
+    and encoded to JSON once per room, and sent as a ``room_state_frame``
+    to each worker process holding sockets of the room, rather than to
+    every socket (see ``FrameRelay``). Mutations of a room
+    arriving while its frame is being built are coalesced into one more
+    frame.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Rooms changed since their frame build started, and their groups
+        self.dirty = {}
+        self.builders = {}
+        self.mutations = 0
+        self.frames = 0
+        self.build_times = []
+
+    async def room_mutated(self, event):
+        self.mutations += 1
+        room_id = event["room_id"]
+        self.dirty[room_id] = event["group"]
+        if room_id not in self.builders:
+            self.builders[room_id] = asyncio.ensure_future(self.build_frames(room_id))
+
+    async def build_frames(self, room_id):
+        try:
+            while room_id in self.dirty:
+                group = self.dirty.pop(room_id)
+                started = time.perf_counter()
+                await self.send_frame(room_id, group)
+                self.build_times.append(time.perf_counter() - started)
+                self.frames += 1
+                if self.frames % 1000 == 0:
+                    logger.info(
+                        f"Broadcaster: {self.mutations} mutations, {self.frames} "
+                        f"frames, build ms {duration_summary(self.build_times)}"
+                    )
+                    self.build_times.clear()
+        finally:
+            del self.builders[room_id]
+
+    async def send_frame(self, room_id, group):
+        room = await get_room(room_id)
+        if room is None:
+            return
+        try:
+            frame = encode_frame(await room_state(room))
+            await self.channel_layer.group_send(
+                frames_group(group),
+                {"type": "room_state_frame", "group": group, "frame": frame},
+            )
+        except Exception as e:
+            logger.error(f"Error broadcasting room {room_id}: {e}")
+
+
+class FrameRelay:
+    """
+    Receives the broadcaster's frames for every room with sockets in this
+    process on one channel, and hands them to those sockets directly: one
+    channel layer message per room and process instead of a message and a
+    consumer dispatch per socket.
+    """
+
+    def __init__(self):
+        self.sockets = {}
+        self.channel = None
+        self.started = None
+        self.relay_task = None
+        self.loop = None
+
+    async def start(self, channel_layer):
+        self.channel = await channel_layer.new_channel()
+        self.relay_task = asyncio.ensure_future(self.relay(channel_layer))
+
+    async def join(self, consumer, group):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # First socket in this event loop (a new one under tests)
+            self.sockets = {}
+            self.loop = loop
+            self.started = asyncio.ensure_future(self.start(consumer.channel_layer))
+        await self.started
+        if self.relay_task.done():
+            logger.warning("Room state frame relay had stopped: restarting it")
+            self.relay_task = asyncio.ensure_future(self.relay(consumer.channel_layer))
+        if group not in self.sockets:
+            self.sockets[group] = set()
+            await consumer.channel_layer.group_add(frames_group(group), self.channel)
+        self.sockets[group].add(consumer)
+
+    async def leave(self, consumer, group):
+        sockets = self.sockets.get(group)
+        if sockets is None or consumer not in sockets:
+            return
+        sockets.discard(consumer)
+        if not sockets:
+            del self.sockets[group]
+            await consumer.channel_layer.group_discard(frames_group(group), self.channel)
+
+    async def relay(self, channel_layer):
+        delay = RELAY_RETRY_DELAY
+        while True:
+            try:
+                message = await channel_layer.receive(self.channel)
+                group, frame = message["group"], message["frame"]
+            except KeyError as e:
+                logger.warning(f"Dropping malformed room state frame message: missing {e}")
+                continue
+            except Exception as e:
+                # Channel layer reconnecting: back off instead of spinning
+                logger.error(f"Error receiving room state frames, retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RELAY_RETRY_MAX_DELAY)
+                continue
+            delay = RELAY_RETRY_DELAY
+            for consumer in list(self.sockets.get(group, ())):
+                try:
+                    await consumer.send_state_frame(frame)
+                except Exception as e:
+                    logger.warning(f"Error relaying room state frame: {e}")
+
+
+frame_relay = FrameRelay()
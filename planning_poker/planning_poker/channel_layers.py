@@ -0,0 +1,633 @@
+import asyncio
+import base64
+import collections
+import contextlib
+import functools
+import hashlib
+import logging
+import time
+import uuid
+import msgpack
+import psycopg
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+from channels_redis.core import BoundedQueue, ChannelLock, RedisChannelLayer
+from django.db import DEFAULT_DB_ALIAS, connections
+from psycopg import sql
+from planning_poker.models import ChannelGroupMember, ChannelMessage
+
+logger = logging.getLogger(__name__)
+
+# Keys of the messages nodes send each other's process channels
+GROUP_KEY = "__local_group__"
+PRESENCE_KEY = "__presence__"
+
+
+class LocalFirstChannelLayer(RedisChannelLayer):
+    """
+    Redis channel layer that delivers group messages to members connected to
+    this process directly, without a Redis round trip.
+
+    Group membership is still written to Redis, so senders with no local
+    members (Celery tasks, other nodes) reach every channel as usual. On top
+    of that each node tracks its own members of every group, and records in
+    a Redis presence set which nodes have members in it. ``group_send`` from
+    a node with local members puts the message straight into their receive
+    buffers and writes it once per other node present in the group (not once
+    per remote channel); that node fans it out to its own members.
+
+    Nodes learn about each other when they join a group: the joining node
+    reads the presence set and notifies the nodes in it. A member joining on
+    another node receives this node's messages once that notice arrives,
+    a few milliseconds after it joined; consumers send the full room state
+    on connect, which covers that window. Every node must use this layer.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Channels of this process in each group
+        self.local_groups = collections.defaultdict(set)
+        # Other nodes with members in each group this process has joined
+        self.remote_nodes = collections.defaultdict(set)
+        # Groups this node is registered in the presence set for
+        self.present_groups = set()
+        self.presence_locks = ChannelLock()
+        # Read of this process's Redis channel, kept across receive_single
+        # calls so a local delivery can interrupt the wait without losing it
+        # (picked up by the next receiver; cancelled on flush)
+        self.pending_read = None
+        self.local_wakeup = None
+        self.local_delivered = False
+
+    def _presence_key(self, group):
+        return f"{self.prefix}:presence:{group}".encode("utf8")
+
+    def _node_channel(self, node):
+        return f"specific.{node}!"
+
+    def is_local(self, channel):
+        return "!" in channel and self.non_local_name(channel).endswith(
+            self.client_prefix + "!"
+        )
+
+    ### Groups extension ###
+
+    async def group_add(self, group, channel):
+        await super().group_add(group, channel)
+        if self.is_local(channel):
+            self.local_groups[group].add(channel)
+            await self._sync_presence(group)
+
+    async def group_discard(self, group, channel):
+        await super().group_discard(group, channel)
+        members = self.local_groups.get(group)
+        if members is not None and channel in members:
+            members.discard(channel)
+            if not members:
+                del self.local_groups[group]
+            await self._sync_presence(group)
+
+    async def group_send(self, group, message):
+        assert self.valid_group_name(group), "Group name not valid"
+        members = self.local_groups.get(group)
+        # No members here, or presence still being registered: plain Redis
+        if not members or group not in self.present_groups:
+            return await super().group_send(group, message)
+
+        for channel in members:
+            self.receive_buffer[channel].put_nowait(dict(message))
+        self._wake_receiver()
+        remote = self.remote_nodes.get(group)
+        if remote:
+            await self._send_to_nodes(remote, {**message, GROUP_KEY: group})
+
+    async def _send_to_nodes(self, nodes, message):
+        """Write ``message`` onto the process channel of each node"""
+        by_index = collections.defaultdict(list)
+        for node in nodes:
+            channel = self._node_channel(node)
+            by_index[self.consistent_hash(channel)].append(self.prefix + channel)
+        payload = self.serialize(message)
+        now = time.time()
+        for index, keys in by_index.items():
+            pipe = self.connection(index).pipeline(transaction=False)
+            for key in keys:
+                pipe.zremrangebyscore(key, min=0, max=int(now) - int(self.expiry))
+                pipe.zadd(key, {payload: now})
+                pipe.expire(key, int(self.expiry))
+            await pipe.execute()
+
+    async def _sync_presence(self, group):
+        """
+        Register this node in ``group``'s presence set while it has members
+        there and remove it once it has none, telling the other nodes present
+        """
+        key = self._presence_key(group)
+        await self.presence_locks.acquire(key)
+        try:
+            wanted = bool(self.local_groups.get(group))
+            if wanted == (group in self.present_groups):
+                return
+            connection = self.connection(self.consistent_hash(group))
+            now = time.time()
+            if wanted:
+                pipe = connection.pipeline(transaction=True)
+                pipe.zremrangebyscore(key, min=0, max=int(now) - self.group_expiry)
+                pipe.zadd(key, {self.client_prefix: now})
+                pipe.expire(key, self.group_expiry)
+                pipe.zrange(key, 0, -1)
+                *_, nodes = await pipe.execute()
+                nodes = {node.decode("utf8") for node in nodes} - {self.client_prefix}
+                self.remote_nodes[group].update(nodes)
+                self.present_groups.add(group)
+                notice = "join"
+            else:
+                await connection.zrem(key, self.client_prefix)
+                nodes = self.remote_nodes.pop(group, set())
+                self.present_groups.discard(group)
+                notice = "leave"
+            if nodes:
+                await self._send_to_nodes(
+                    nodes, {PRESENCE_KEY: [notice, group, self.client_prefix]}
+                )
+        finally:
+            self.presence_locks.release(key)
+
+    def _wake_receiver(self):
+        """
+        Interrupt the receiver holding the receive lock: it waits on Redis,
+        not on its buffer, and may be one of the members just delivered to
+        """
+        self.local_delivered = True
+        if self.local_wakeup is not None:
+            self.local_wakeup.set()
+
+    async def receive_single(self, channel):
+        if "!" not in channel:
+            return await super().receive_single(channel)
+        if self.local_delivered:
+            # Let receive() pick up the local messages first
+            self.local_delivered = False
+            return [], {}
+
+        loop = asyncio.get_running_loop()
+        if self.pending_read is None or self.pending_read.get_loop() is not loop:
+            self.pending_read = asyncio.ensure_future(super().receive_single(channel))
+        self.local_wakeup = asyncio.Event()
+        wakeup = asyncio.ensure_future(self.local_wakeup.wait())
+        try:
+            await asyncio.wait(
+                [self.pending_read, wakeup], return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            wakeup.cancel()
+            self.local_wakeup = None
+        self.local_delivered = False
+        if not self.pending_read.done():
+            return [], {}
+
+        read, self.pending_read = self.pending_read, None
+        channel, message = read.result()
+        if PRESENCE_KEY in message:
+            notice, group, node = message[PRESENCE_KEY]
+            # Only tracked while this node has members in the group
+            if group in self.local_groups:
+                if notice == "join":
+                    self.remote_nodes[group].add(node)
+                else:
+                    self.remote_nodes[group].discard(node)
+            return [], message
+        if GROUP_KEY in message:
+            group = message.pop(GROUP_KEY)
+            return list(self.local_groups.get(group, ())), message
+        return channel, message
+
+    ### Flush extension ###
+
+    async def flush(self):
+        if self.pending_read is not None:
+            self.pending_read.cancel()
+            self.pending_read = None
+        self.local_groups.clear()
+        self.remote_nodes.clear()
+        self.present_groups.clear()
+        await super().flush()
+
+
+# NOTIFY payload telling a process's listener to pick up new LISTENs
+RELISTEN = "relisten"
+# Prefix of NOTIFY payloads that refer to a ChannelMessage row
+OVERFLOW_MARKER = "@"
+# Seconds between listener reconnect attempts, doubling up to the maximum
+LISTEN_RETRY_DELAY = 1
+LISTEN_RETRY_MAX_DELAY = 30
+
+
+class PostgresLoopLayer:
+    """A PostgresChannelLayer's connections and listener in one event loop"""
+
+    def __init__(self, channel_layer):
+        self.channel_layer = channel_layer
+        self.connection = None
+        self.connection_lock = asyncio.Lock()
+        # The listener's connection is held by its notifies() loop
+        self.listen_connection = None
+        self.listener = None
+        self.listen_lock = asyncio.Lock()
+        self.listening = set()
+        self.subscribed = set()
+        # Messages waiting for the next flush, by NOTIFY channel
+        self.outbox = collections.defaultdict(list)
+        self.flushed = None
+        self.flush_lock = asyncio.Lock()
+
+    async def get_connection(self):
+        """Autocommit connection for queries and NOTIFY"""
+        async with self.connection_lock:
+            if self.connection is None or self.connection.closed:
+                self.connection = await psycopg.AsyncConnection.connect(
+                    **self.channel_layer.connection_params(), autocommit=True
+                )
+            return self.connection
+
+    async def listen(self, notify_channel):
+        """
+        LISTEN on ``notify_channel``, starting the listener if needed (or
+        again, if it stopped)
+        """
+        running = self.listener is not None and not self.listener.done()
+        if notify_channel in self.listening and running:
+            return
+        self.listening.add(notify_channel)
+        async with self.listen_lock:
+            if self.listener is None or self.listener.done():
+                if self.listener is not None:
+                    logger.warning("Channel layer listener had stopped: restarting it")
+                await self._connect_listener()
+                self.listener = asyncio.ensure_future(self._listen())
+                return
+        # Interrupt the running listener so it subscribes
+        await self.notify([(self.channel_layer.process_channel, RELISTEN)])
+
+    async def _connect_listener(self):
+        if self.listen_connection is not None and not self.listen_connection.closed:
+            await self.listen_connection.close()
+        self.listen_connection = await psycopg.AsyncConnection.connect(
+            **self.channel_layer.connection_params(), autocommit=True
+        )
+        self.subscribed.clear()
+        await self._subscribe()
+
+    async def _subscribe(self):
+        for notify_channel in self.listening - self.subscribed:
+            await self.listen_connection.execute(
+                sql.SQL("LISTEN {}").format(sql.Identifier(notify_channel))
+            )
+            self.subscribed.add(notify_channel)
+
+    async def _reconnect(self):
+        """Reconnect the listener, backing off while the database is down"""
+        delay = LISTEN_RETRY_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                async with self.listen_lock:
+                    await self._connect_listener()
+                logger.info("Channel layer listener reconnected")
+                return
+            except Exception as e:
+                delay = min(delay * 2, LISTEN_RETRY_MAX_DELAY)
+                logger.warning(
+                    f"Channel layer listener reconnect failed, retrying in {delay}s: {e}"
+                )
+
+    async def _listen(self):
+        while True:
+            try:
+                async with contextlib.aclosing(
+                    self.listen_connection.notifies()
+                ) as notifies:
+                    async for notify in notifies:
+                        if notify.payload == RELISTEN:
+                            break
+                        try:
+                            await self.channel_layer.deliver(notify.payload)
+                        except Exception as e:
+                            # Drop this payload, not the listener
+                            logger.error(f"Error delivering channel layer message: {e}")
+                await self._subscribe()
+            except psycopg.OperationalError as e:
+                # Lost the connection: reconnect and listen again. Messages
+                # notified in between are lost, as with Redis pub/sub.
+                logger.warning(f"Channel layer listener disconnected: {e}")
+                await self._reconnect()
+            except Exception as e:
+                logger.error(f"Channel layer listener error: {e}")
+                await self._reconnect()
+
+    async def notify(self, notifications):
+        """Send ``(channel, payload)`` notifications in one round trip"""
+        if not notifications:
+            return
+        connection = await self.get_connection()
+        await connection.execute(
+            "SELECT " + ", ".join(["pg_notify(%s, %s)"] * len(notifications)),
+            [value for notification in notifications for value in notification],
+        )
+
+    async def publish(self, notify_channel, channels, message):
+        """
+        Queue ``message`` for ``channels`` behind ``notify_channel`` and wait
+        for it to be sent. Everything published in the meantime goes out
+        with it, batched per NOTIFY channel.
+        """
+        self.outbox[notify_channel].append((channels, message))
+        if self.flushed is None:
+            self.flushed = asyncio.get_running_loop().create_future()
+            asyncio.ensure_future(self._flush())
+        await asyncio.shield(self.flushed)
+
+    async def _flush(self):
+        async with self.flush_lock:
+            outbox, self.outbox = self.outbox, collections.defaultdict(list)
+            flushed, self.flushed = self.flushed, None
+            try:
+                notifications = []
+                for notify_channel, entries in outbox.items():
+                    for payload in await self.channel_layer.encode(entries):
+                        notifications.append((notify_channel, payload))
+                await self.notify(notifications)
+            except Exception as e:
+                flushed.set_exception(e)
+            else:
+                flushed.set_result(None)
+
+    async def close(self):
+        if self.listener is not None:
+            self.listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.listener
+            self.listener = None
+        for connection in (self.listen_connection, self.connection):
+            if connection is not None:
+                await connection.close()
+        self.listen_connection = self.connection = None
+        self.listening.clear()
+        self.subscribed.clear()
+
+
+class PostgresChannelLayer(BaseChannelLayer):
+    """
+    Channel layer over PostgreSQL LISTEN/NOTIFY, for deployments without
+    Redis.
+
+    Every process LISTENs on a NOTIFY channel of its own, and messages for
+    its specific channels (the consumers' sockets) are NOTIFYed there.
+    Group membership lives in ChannelGroupMember, so ``group_send`` is one
+    query for the members plus one notification per process holding any of
+    them, listing that process's channels. Messages published in the same
+    event loop iteration, or while a previous flush is in flight, are
+    batched into as few notifications as the payload limit allows; batches
+    too large for a single payload are stored in ChannelMessage and the
+    notification carries the row id.
+
+    Like Redis pub/sub, delivery is at most once: a process that is not
+    listening when a message is sent never gets it.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        database=DEFAULT_DB_ALIAS,
+        prefix="asgi",
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        max_payload=7500,
+        cleanup_every=500,
+    ):
+        super().__init__(
+            expiry=expiry, capacity=capacity, channel_capacity=channel_capacity
+        )
+        self.database = database
+        self.prefix = prefix
+        self.group_expiry = group_expiry
+        # NOTIFY payloads are limited to 8000 bytes
+        self.max_payload = max_payload
+        self.cleanup_every = cleanup_every
+        self.client_prefix = uuid.uuid4().hex
+        self.process_channel = self.notify_channel(f"specific.{self.client_prefix}!")
+        self.receive_buffer = collections.defaultdict(
+            functools.partial(BoundedQueue, self.capacity)
+        )
+        # Non-process channels something in this process receives on
+        self.receiving = set()
+        self.group_adds = 0
+        self._layers = {}
+
+    def connection_params(self):
+        params = connections[self.database].get_connection_params()
+        # Django's cursor classes and adapters are for its own connections
+        params.pop("cursor_factory", None)
+        params.pop("context", None)
+        return params
+
+    def loop_layer(self):
+        loop = asyncio.get_running_loop()
+        if loop not in self._layers:
+            self._layers[loop] = PostgresLoopLayer(self)
+        return self._layers[loop]
+
+    def notify_channel(self, channel):
+        """
+        The NOTIFY channel ``channel``'s messages go out on: the owning
+        process's one for specific channels, a hash of the name otherwise
+        """
+        if "!" in channel:
+            node = self.non_local_name(channel)[:-1].rsplit(".", 1)[-1]
+        else:
+            node = hashlib.md5(channel.encode("utf8")).hexdigest()
+        return f"{self.prefix}_{node}"
+
+    def group_name(self, group):
+        return f"{self.prefix}:{group}"
+
+    ### Serialization ###
+
+    async def encode(self, entries):
+        """
+        NOTIFY payloads for ``(channels, message)`` entries: base64 msgpack
+        batches under ``max_payload``, or overflow row references
+        """
+        payloads = []
+        batch, size = [], 0
+        # base64 turns 3 bytes into 4
+        limit = self.max_payload * 3 // 4
+        for channels, message in entries:
+            packed = msgpack.packb([channels, message], use_bin_type=True)
+            if batch and size + len(packed) > limit:
+                payloads.append(await self._encode_batch(batch))
+                batch, size = [], 0
+            batch.append(packed)
+            size += len(packed)
+        if batch:
+            payloads.append(await self._encode_batch(batch))
+        return payloads
+
+    async def _encode_batch(self, batch):
+        raw = b"".join(batch)
+        if len(raw) * 4 // 3 + 4 <= self.max_payload:
+            return base64.b64encode(raw).decode("ascii")
+        connection = await self.loop_layer().get_connection()
+        cursor = await connection.execute(
+            sql.SQL(
+                "INSERT INTO {} (payload, created_at) VALUES (%s, now()) RETURNING id"
+            ).format(sql.Identifier(ChannelMessage._meta.db_table)),
+            (raw,),
+        )
+        (message_id,) = await cursor.fetchone()
+        return f"{OVERFLOW_MARKER}{message_id}"
+
+    async def deliver(self, payload):
+        """Put the messages of a received NOTIFY payload in their buffers"""
+        if payload.startswith(OVERFLOW_MARKER):
+            connection = await self.loop_layer().get_connection()
+            cursor = await connection.execute(
+                sql.SQL("DELETE FROM {} WHERE id = %s RETURNING payload").format(
+                    sql.Identifier(ChannelMessage._meta.db_table)
+                ),
+                (int(payload[len(OVERFLOW_MARKER) :]),),
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return
+            raw = bytes(row[0])
+        else:
+            raw = base64.b64decode(payload)
+        unpacker = msgpack.Unpacker(raw=False)
+        unpacker.feed(raw)
+        for channels, message in unpacker:
+            for channel in channels:
+                if "!" in channel or channel in self.receiving:
+                    self.receive_buffer[channel].put_nowait(message)
+
+    ### Channel layer API ###
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        queue = self.receive_buffer.get(channel)
+        if queue is not None and queue.qsize() >= self.get_capacity(channel):
+            raise ChannelFull()
+        await self.loop_layer().publish(self.notify_channel(channel), [channel], message)
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+        loop_layer = self.loop_layer()
+        if "!" in channel:
+            assert self.non_local_name(channel).endswith(
+                self.client_prefix + "!"
+            ), "Wrong client prefix"
+            await loop_layer.listen(self.process_channel)
+        else:
+            self.receiving.add(channel)
+            await loop_layer.listen(self.notify_channel(channel))
+
+        queue = self.receive_buffer[channel]
+        message = await queue.get()
+        if queue.empty():
+            self.receive_buffer.pop(channel, None)
+        return message
+
+    async def new_channel(self, prefix="specific"):
+        # Listen before the channel is handed out, so nothing sent to it is missed
+        await self.loop_layer().listen(self.process_channel)
+        return f"{prefix}.{self.client_prefix}!{uuid.uuid4().hex}"
+
+    ### Groups extension ###
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        connection = await self.loop_layer().get_connection()
+        await connection.execute(
+            sql.SQL(
+                "INSERT INTO {} (group_name, channel_name, created_at) "
+                "VALUES (%s, %s, now()) ON CONFLICT (group_name, channel_name) "
+                "DO UPDATE SET created_at = EXCLUDED.created_at"
+            ).format(sql.Identifier(ChannelGroupMember._meta.db_table)),
+            (self.group_name(group), channel),
+        )
+        self.group_adds += 1
+        if self.group_adds % self.cleanup_every == 0:
+            await self.cleanup()
+
+    async def group_discard(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        connection = await self.loop_layer().get_connection()
+        await connection.execute(
+            sql.SQL("DELETE FROM {} WHERE group_name = %s AND channel_name = %s").format(
+                sql.Identifier(ChannelGroupMember._meta.db_table)
+            ),
+            (self.group_name(group), channel),
+        )
+
+    async def group_send(self, group, message):
+        assert self.valid_group_name(group), "Group name not valid"
+        loop_layer = self.loop_layer()
+        connection = await loop_layer.get_connection()
+        cursor = await connection.execute(
+            sql.SQL(
+                "SELECT channel_name FROM {} WHERE group_name = %s "
+                "AND created_at > now() - make_interval(secs => %s)"
+            ).format(sql.Identifier(ChannelGroupMember._meta.db_table)),
+            (self.group_name(group), self.group_expiry),
+        )
+        by_notify_channel = collections.defaultdict(list)
+        for (channel,) in await cursor.fetchall():
+            by_notify_channel[self.notify_channel(channel)].append(channel)
+        await asyncio.gather(
+            *(
+                loop_layer.publish(notify_channel, channels, message)
+                for notify_channel, channels in by_notify_channel.items()
+            )
+        )
+
+    async def cleanup(self):
+        """Drop expired memberships and overflow rows nobody picked up"""
+        connection = await self.loop_layer().get_connection()
+        await connection.execute(
+            sql.SQL(
+                "DELETE FROM {} WHERE created_at < now() - make_interval(secs => %s)"
+            ).format(sql.Identifier(ChannelGroupMember._meta.db_table)),
+            (self.group_expiry,),
+        )
+        await connection.execute(
+            sql.SQL(
+                "DELETE FROM {} WHERE created_at < now() - make_interval(secs => %s)"
+            ).format(sql.Identifier(ChannelMessage._meta.db_table)),
+            (self.expiry,),
+        )
+
+    ### Flush extension ###
+
+    async def flush(self):
+        """Forget this layer's groups and buffered messages and disconnect"""
+        connection = await self.loop_layer().get_connection()
+        await connection.execute(
+            sql.SQL("DELETE FROM {} WHERE group_name LIKE %s").format(
+                sql.Identifier(ChannelGroupMember._meta.db_table)
+            ),
+            (f"{self.prefix}:%",),
+        )
+        self.receive_buffer.clear()
+        self.receiving.clear()
+        await self.close()
+
+    async def close(self):
+        loop_layer = self._layers.pop(asyncio.get_running_loop(), None)
+        if loop_layer is not None:
+            await loop_layer.close()
@@ -1,9 +1,23 @@
 import json
 import logging
 from channels.generic.websocket import AsyncWebsocketConsumer
-from channels.db import database_sync_to_async
-from planning_poker.models import Room, Participant, SessionLog, UserRole, AnonymousSession
-from planning_poker.fields import STATUS_CHOICES, POINT_SYSTEMS, POINT_SYSTEM_CARDS
+from planning_poker.models import Room, Participant, UserRole, AnonymousSession
+from planning_poker.fields import STATUS_CHOICES
+from planning_poker.db_executor import db_executor
+from planning_poker.room_resolver import room_resolver
+from planning_poker.round_service import reveal_room_votes
+from planning_poker.room_service import upsert_participant
+from planning_poker.room_actor import room_actors
+from planning_poker.room_state import (
+    card_values,
+    encode_frame,
+    participants_with_votes,
+    room_state,
+    timer_state,
+    with_socket_fields,
+)
+from planning_poker.broadcaster import frame_relay
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
@@ -27,6 +41,8 @@ class RoomConsumer(AsyncWebsocketConsumer):
         self.anonymous_session_id = None
         self.room_group_name = None
         self.is_connected = False
+        # Encoded per-socket room_state fields, set by send_room_state
+        self.socket_fields = None
 
     async def connect(self):
         self.room_code = self.scope["url_route"]["kwargs"]["room_id"]
@@ -73,6 +89,8 @@ class RoomConsumer(AsyncWebsocketConsumer):
             )
 
             await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+            if settings.ROOM_BROADCASTER:
+                await frame_relay.join(self, self.room_group_name)
             await self.accept()
             self.is_connected = True
             
@@ -127,6 +145,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
 
             # Remove from channel group
             try:
+                await frame_relay.leave(self, self.room_group_name)
                 await self.channel_layer.group_discard(
                     self.room_group_name, self.channel_name
                 )
@@ -188,40 +207,23 @@ class RoomConsumer(AsyncWebsocketConsumer):
             await self.send_error("Invalid card value for this room's point system")
             return
 
-        participant = await self.get_or_create_participant(self.user, self.room)
-        await self.update_participant_vote(participant, card_value)
-
-        # Broadcast updated room state
-        await self.broadcast_room_state()
-
-        # Check for auto-reveal if enabled and all participants have voted
-        if await self.should_auto_reveal(self.room):
-            await self.auto_reveal_cards()
+        # Recorded, auto-revealed if everyone has voted, and broadcast by the
+        # room's actor
+        await self.run_room_command(
+            {"type": "vote", "user_id": self.user.id, "card_value": card_value}
+        )
 
     async def handle_reveal_cards(self, data):
         if not await self.can_control_game(self.room, self.user):
             await self.send_error("Only admins or room hosts can reveal cards")
             return
-        participants_data = await self.get_participants_with_votes(self.room)
-        stats = await self.calculate_voting_stats(participants_data)
-
-        # Create session log when cards are revealed
-        await self.create_session_log(self.room, stats, participants_data)
-
-        await self.update_room_status(self.room, STATUS_CHOICES.COMPLETED)
-        
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "reveal"})
 
     async def handle_reset_votes(self, data):
         if not await self.can_control_game(self.room, self.user):
             await self.send_error("Only admins or room hosts can reset votes")
             return
-        await self.reset_all_votes(self.room)
-        await self.update_room_status(self.room, STATUS_CHOICES.ACTIVE)
-        
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "reset"})
 
     async def handle_skip_participant(self, data):
         participant_id = data.get("participant_id")
@@ -231,20 +233,13 @@ class RoomConsumer(AsyncWebsocketConsumer):
         if not await self.can_control_game(self.room, self.user):
             await self.send_error("Only admins or room hosts can skip participants")
             return
-        await self.skip_participant_db(participant_id, self.room)
-        
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "skip", "participant_id": participant_id})
 
     async def handle_start_round(self, data):
         if not await self.can_control_game(self.room, self.user):
             await self.send_error("Only admins or room hosts can start rounds")
             return
-        await self.reset_all_votes(self.room)
-        await self.update_room_status(self.room, STATUS_CHOICES.ACTIVE)
-        
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "start_round"})
 
     async def handle_start_timer(self, data):
         if not await self.can_control_game(self.room, self.user):
@@ -256,30 +251,19 @@ class RoomConsumer(AsyncWebsocketConsumer):
             return
 
         timer_duration = data.get("duration", self.room.timer_duration)
-        await self.start_room_timer(self.room, timer_duration)
-
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "start_timer", "duration": timer_duration})
 
     async def handle_stop_timer(self, data):
         if not await self.can_control_game(self.room, self.user):
             await self.send_error("Only admins or room hosts can stop timer")
             return
-
-        await self.stop_room_timer(self.room)
-
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "stop_timer"})
 
     async def handle_pause_timer(self, data):
         if not await self.can_control_game(self.room, self.user):
             await self.send_error("Only admins or room hosts can pause timer")
             return
-
-        await self.pause_room_timer(self.room)
-
-        # Broadcast updated room state
-        await self.broadcast_room_state()
+        await self.run_room_command({"type": "pause_timer"})
 
     async def handle_chat_message(self, data):
         message = data.get("message", "").strip()
@@ -306,12 +290,13 @@ class RoomConsumer(AsyncWebsocketConsumer):
         await self.send_room_state()
 
     async def send_room_state(self):
-        participants = await self.get_participants_with_votes(self.room)
-        card_values = await self.get_room_card_values(self.room)
-
-        # Get timer state
-        timer_state = await self.get_timer_state(self.room)
+        state = await room_state(self.room)
+        # Also refreshes the fields appended to broadcaster frames
+        self.socket_fields = json.dumps(await self.get_socket_fields())
+        await self.send(text_data=with_socket_fields(encode_frame(state), self.socket_fields))
 
+    async def get_socket_fields(self):
+        """The ``room_state`` fields specific to this socket's user"""
         # Determine user permissions
         is_host = (
             self.room.host == self.user
@@ -328,37 +313,18 @@ class RoomConsumer(AsyncWebsocketConsumer):
             if self.user and not getattr(self, "is_anonymous_user", False)
             else False
         )
-
-        await self.send(
-            text_data=json.dumps(
-                {
-                    "type": "room_state",
-                    "room": {
-                        "id": self.room.id,
-                        "code": self.room.code,
-                        "project_name": self.room.project_name,
-                        "point_system": self.room.point_system,
-                        "status": self.room.status,
-                        "host_username": self.room.host.username,
-                        "enable_timer": self.room.enable_timer,
-                        "timer_duration": self.room.timer_duration,
-                    },
-                    "participants": participants,
-                    "card_values": card_values,
-                    "timer_state": timer_state,
-                    "is_host": is_host,
-                    "user_role": user_role,
-                    "can_control": can_control,
-                    "is_anonymous": getattr(self, "is_anonymous_user", False),
-                    "anonymous_session_id": getattr(self, "anonymous_session_id", None),
-                    "current_user": {
-                        "id": self.user.id if self.user else None,
-                        "username": self.user.username if self.user else "Guest",
-                        "is_anonymous": getattr(self, "is_anonymous_user", False),
-                    },
-                }
-            )
-        )
+        return {
+            "is_host": is_host,
+            "user_role": user_role,
+            "can_control": can_control,
+            "is_anonymous": getattr(self, "is_anonymous_user", False),
+            "anonymous_session_id": getattr(self, "anonymous_session_id", None),
+            "current_user": {
+                "id": self.user.id if self.user else None,
+                "username": self.user.username if self.user else "Guest",
+                "is_anonymous": getattr(self, "is_anonymous_user", False),
+            },
+        }
 
     # WebSocket event handlers
     async def room_state_update(self, event):
@@ -366,23 +332,6 @@ class RoomConsumer(AsyncWebsocketConsumer):
         if not self.is_connected:
             return
         try:
-            # Determine user-specific permissions
-            is_host = (
-                self.room.host == self.user
-                if self.user and not getattr(self, "is_anonymous_user", False)
-                else False
-            )
-            user_role = (
-                await self.get_user_role_string(self.user)
-                if self.user and not getattr(self, "is_anonymous_user", False)
-                else "participant"
-            )
-            can_control = (
-                await self.can_control_game(self.room, self.user)
-                if self.user and not getattr(self, "is_anonymous_user", False)
-                else False
-            )
-
             await self.send(
                 text_data=json.dumps(
                     {
@@ -391,22 +340,19 @@ class RoomConsumer(AsyncWebsocketConsumer):
                         "participants": event["participants"],
                         "card_values": event["card_values"],
                         "timer_state": event["timer_state"],
-                        "is_host": is_host,
-                        "user_role": user_role,
-                        "can_control": can_control,
-                        "is_anonymous": getattr(self, "is_anonymous_user", False),
-                        "anonymous_session_id": getattr(self, "anonymous_session_id", None),
-                        "current_user": {
-                            "id": self.user.id if self.user else None,
-                            "username": self.user.username if self.user else "Guest",
-                            "is_anonymous": getattr(self, "is_anonymous_user", False),
-                        },
+                        **await self.get_socket_fields(),
                     }
                 )
             )
         except Exception as e:
             logger.warning(f"Error sending room_state_update: {e}")
 
+    async def send_state_frame(self, frame):
+        """Send a room state frame from the broadcaster, with this socket's fields"""
+        if not self.is_connected or self.socket_fields is None:
+            return
+        await self.send(text_data=with_socket_fields(frame, self.socket_fields))
+
     async def user_connected_notification(self, event):
         """Send notification when a user connects (for toast messages only)"""
         if not self.is_connected:
@@ -648,57 +594,26 @@ class RoomConsumer(AsyncWebsocketConsumer):
 
         return timezone.now().isoformat()
 
+    async def run_room_command(self, command):
+        """
+        Apply ``command`` through the room's actor, which serializes the
+        room's game commands and broadcasts the result
+        """
+        room = await room_actors.submit(
+            self.room, self.room_group_name, self.channel_layer, command
+        )
+        if room is not None:
+            self.room = room
+
     async def broadcast_room_state(self):
         """Broadcast complete room state to all connected users"""
         try:
-            participants = await self.get_participants_with_votes(self.room)
-            card_values = await self.get_room_card_values(self.room)
-            timer_state = await self.get_timer_state(self.room)
-
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "room_state_update",
-                    "room": {
-                        "id": self.room.id,
-                        "code": self.room.code,
-                        "project_name": self.room.project_name,
-                        "point_system": self.room.point_system,
-                        "status": self.room.status,
-                        "host_username": self.room.host.username,
-                        "enable_timer": self.room.enable_timer,
-                        "timer_duration": self.room.timer_duration,
-                    },
-                    "participants": participants,
-                    "card_values": card_values,
-                    "timer_state": timer_state,
-                },
-            )
-            logger.info(f"Broadcasted room state to group {self.room_group_name}")
+            await self.run_room_command({"type": "refresh"})
         except Exception as e:
             logger.error(f"Error broadcasting room state: {e}")
 
-    async def auto_reveal_cards(self):
-        """Automatically reveal cards when all participants have voted"""
-        try:
-            logger.info(f"Auto-revealing cards for room {self.room.code}")
-
-            participants_data = await self.get_participants_with_votes(self.room)
-            stats = await self.calculate_voting_stats(participants_data)
-
-            # Create session log when cards are revealed
-            await self.create_session_log(self.room, stats, participants_data)
-
-            await self.update_room_status(self.room, STATUS_CHOICES.COMPLETED)
-
-            # Broadcast updated room state
-            await self.broadcast_room_state()
-
-        except Exception as e:
-            logger.error(f"Error during auto-reveal: {e}")
-
     # Database methods
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def authenticate_user_from_token(self):
         try:
             query_string = self.scope.get("query_string", b"").decode()
@@ -722,119 +637,20 @@ class RoomConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error authenticating user: {e}")
             return None
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def get_room_by_id_or_code(self, room_identifier):
-        try:
-            return Room.objects.select_related("host").get(code=room_identifier)
-        except Room.DoesNotExist:
-            try:
-                return Room.objects.select_related("host").get(id=room_identifier)
-            except (Room.DoesNotExist, ValueError):
-                return None
-
-    @database_sync_to_async
-    def get_or_create_participant(self, user, room):
-        participant, created = Participant.objects.get_or_create(
-            user=user,
-            room=room,
-            defaults={
-                "card_selection": None,
-            },
+        return room_resolver.get_room(
+            room_identifier, Room.objects.select_related("host")
         )
-        return participant
-
-    @database_sync_to_async
-    def get_participants_with_votes(self, room):
-        try:
-            participants = list(
-                Participant.objects.filter(room=room)
-                .select_related("user", "user__role")
-                .values(
-                    "id",
-                    "user_id",
-                    "user__username",
-                    "user__is_active",  # Add this to identify anonymous users
-                    "card_selection",
-                    "user__role__role",
-                )
-            )
-            for p in participants:
-                p["username"] = p.pop("user__username")
-                p["vote"] = None
-                p["user_role"] = p.pop("user__role__role") or "participant"
-                p["has_voted"] = bool(p["card_selection"])
-                p["is_anonymous"] = not p.pop(
-                    "user__is_active", True
-                )  # Inactive users are anonymous
-            return participants
-        except Exception as e:
-            logger.error(f"Error getting participants: {e}")
-            return []
-
-    @database_sync_to_async
-    def update_participant_vote(self, participant, card_value):
-        participant.card_selection = card_value
-        participant.save()
-
-    @database_sync_to_async
-    def reset_all_votes(self, room):
-        """Reset all votes for participants in the room"""
-        try:
-            Participant.objects.filter(room=room).update(card_selection=None)
-        except Exception as e:
-            logger.error(f"Error resetting votes: {e}")
-
-    @database_sync_to_async
-    def update_room_status(self, room, status):
-        """Update room status"""
-        try:
-            room.status = status
-            room.save()
-        except Exception as e:
-            logger.error(f"Error updating room status: {e}")
 
-    @database_sync_to_async
-    def calculate_voting_stats(self, participants_data):
-        """Calculate voting statistics"""
-        numeric_votes = []
-
-        for participant in participants_data:
-            card_value = participant.get("card_selection")
-            if card_value and card_value != "SKIPPED":
-                try:
-                    # Handle different card types (numbers, ?, coffee, etc.)
-                    if card_value.replace(".", "").isdigit():
-                        numeric_votes.append(float(card_value))
-                except (ValueError, AttributeError):
-                    continue
-
-        if not numeric_votes:
-            return {
-                "average": 0,
-                "min": 0,
-                "max": 0,
-                "consensus": False,
-                "total_votes": len(
-                    [p for p in participants_data if p.get("card_selection")]
-                ),
-            }
+    @db_executor.sync_to_async
+    def get_or_create_participant(self, user, room):
+        return upsert_participant(user, room)
 
-        average = sum(numeric_votes) / len(numeric_votes)
-        min_vote = min(numeric_votes)
-        max_vote = max(numeric_votes)
-        consensus = len(set(numeric_votes)) == 1
+    async def get_participants_with_votes(self, room):
+        return await participants_with_votes(room)
 
-        return {
-            "average": round(average, 2),
-            "min": min_vote,
-            "max": max_vote,
-            "consensus": consensus,
-            "total_votes": len(
-                [p for p in participants_data if p.get("card_selection")]
-            ),
-        }
-
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def get_user_role_string(self, user):
         """Get user role as string"""
         try:
@@ -856,14 +672,14 @@ class RoomConsumer(AsyncWebsocketConsumer):
             logger.warning(f"Error getting user role: {e}")
             return "participant"
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def can_control_game(self, room, user):
         """Check if user can control game flow"""
         if not user or not getattr(user, "is_authenticated", False):
             return False
 
         try:
-            if room.host == user:
+            if room.host_id == user.id:
                 return True
 
             user_with_role = User.objects.select_related("role").get(id=user.id)
@@ -882,80 +698,13 @@ class RoomConsumer(AsyncWebsocketConsumer):
             return False
         except Exception as e:
             logger.warning(f"Error checking game control permissions: {e}")
-            return room.host == user
-
-    @database_sync_to_async
-    def skip_participant_db(self, participant_id, room):
-        """Set participant as skipped in database"""
-        try:
-            Participant.objects.filter(id=participant_id, room=room).update(
-                card_selection="SKIPPED"
-            )
-        except Exception as e:
-            logger.error(f"Error skipping participant {participant_id}: {e}")
-
-    @database_sync_to_async
-    def create_session_log(self, room, stats, participants_data):
-        """Create a session log entry when cards are revealed"""
-        try:
-            # Build participant selections dictionary
-            participant_selections = {}
-            for participant in participants_data:
-                if participant.get("card_selection"):
-                    participant_selections[participant["username"]] = participant[
-                        "card_selection"
-                    ]
-
-            # Create the session log
-            session_log = SessionLog.objects.create(
-                room=room,
-                story_point_average=stats["average"],
-                participant_selections=participant_selections,
-            )
-
-            logger.info(f"Created session log {session_log.id} for room {room.code}")
-            return session_log
-
-        except Exception as e:
-            logger.error(f"Error creating session log: {e}")
-            return None
+            return room.host_id == user.id
 
-    @database_sync_to_async
-    def get_room_card_values(self, room):
+    async def get_room_card_values(self, room):
         """Get the card values for the room's point system"""
-        return POINT_SYSTEM_CARDS.get(
-            room.point_system, POINT_SYSTEM_CARDS[POINT_SYSTEMS.FIBONACCI]
-        )
-
-    @database_sync_to_async
-    def should_auto_reveal(self, room):
-        """Check if auto-reveal should happen"""
-        try:
-            # Check if auto-reveal is enabled for this room
-            if not room.auto_reveal_cards:
-                return False
-
-            # Get all participants and check if everyone has voted
-            participants = Participant.objects.filter(room=room)
-            total_participants = participants.count()
-
-            # No participants means no auto-reveal
-            if total_participants == 0:
-                return False
-
-            # Count participants who have voted (have a card selection that's not None)
-            voted_participants = participants.filter(
-                card_selection__isnull=False
-            ).count()
-
-            # Auto-reveal if everyone has voted
-            return voted_participants == total_participants
+        return card_values(room)
 
-        except Exception as e:
-            logger.error(f"Error checking auto-reveal conditions: {e}")
-            return False
-
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def get_participant_data(self, participant):
         """Get complete participant data for broadcasting"""
         try:
@@ -982,7 +731,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error getting participant data: {e}")
             return None
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def get_participant_by_user(self, user, room):
         """Get participant by user and room"""
         try:
@@ -990,14 +739,14 @@ class RoomConsumer(AsyncWebsocketConsumer):
         except Participant.DoesNotExist:
             return None
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def cleanup_anonymous_user(self, user):
         """Clean up temporary user and their data when they disconnect"""
         try:
             if user and hasattr(user, "id") and user.id:
                 # Check if user has an anonymous session
                 try:
-                    session = AnonymousSession.objects.get(user=user)
+                    AnonymousSession.objects.get(user=user)
                     # Don't delete the user if they have a session - they might reconnect
                     # Just remove their participant record from this room
                     Participant.objects.filter(user=user, room=self.room).delete()
@@ -1020,7 +769,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error cleaning up anonymous user: {e}")
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def create_temporary_user(self):
         """Create a temporary user for anonymous participation"""
         import uuid
@@ -1154,7 +903,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
                 },
             )()
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def get_or_create_anonymous_user(self):
         """Get or create anonymous user based on session ID"""
         try:
@@ -1312,7 +1061,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
 
         return temp_user
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def update_room_activity(self, room):
         try:
             if room and hasattr(room, "id") and room.id:
@@ -1320,8 +1069,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error updating room activity: {e}")
 
-    @database_sync_to_async
-    def is_room_inactive(self, room):
+    async def is_room_inactive(self, room):
         try:
             if not room or not hasattr(room, "last_activity") or not room.last_activity:
                 return False
@@ -1331,7 +1079,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
             logger.error(f"Error checking room inactivity: {e}")
             return False
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def auto_close_room(self, room):
         try:
             if room and hasattr(room, "id") and room.id:
@@ -1341,7 +1089,7 @@ class RoomConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error auto-closing room: {e}")
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def update_admin_last_room(self, user, room):
         try:
             if user and room and hasattr(user, "id") and user.id:
@@ -1352,74 +1100,12 @@ class RoomConsumer(AsyncWebsocketConsumer):
         except Exception as e:
             logger.error(f"Error updating admin last room: {e}")
 
-    @database_sync_to_async
-    def start_room_timer(self, room, duration):
-        try:
-            if room and hasattr(room, "id") and room.id and duration > 0:
-                now = timezone.now()
-                Room.objects.filter(id=room.id).update(
-                    is_timer_active=True,
-                    timer_start_time=now,
-                    timer_end_time=now + timedelta(seconds=duration),
-                    timer_duration=duration,
-                )
-                # Refresh the room object to get updated values
-                room.refresh_from_db()
-        except Exception as e:
-            logger.error(f"Error starting room timer: {e}")
-
-    @database_sync_to_async
-    def stop_room_timer(self, room):
-        try:
-            if room and hasattr(room, "id") and room.id:
-                Room.objects.filter(id=room.id).update(
-                    is_timer_active=False, timer_start_time=None, timer_end_time=None
-                )
-                # Refresh the room object to get updated values
-                room.refresh_from_db()
-        except Exception as e:
-            logger.error(f"Error stopping room timer: {e}")
-
-    @database_sync_to_async
-    def pause_room_timer(self, room):
-        try:
-            if room and hasattr(room, "id") and room.id:
-                Room.objects.filter(id=room.id).update(is_timer_active=False)
-                # Refresh the room object to get updated values
-                room.refresh_from_db()
-        except Exception as e:
-            logger.error(f"Error pausing room timer: {e}")
-
-    @database_sync_to_async
-    def get_timer_state(self, room):
-        try:
-            if not room or not hasattr(room, "enable_timer") or not room.enable_timer:
-                return None
-
-            # Refresh room data from database to get latest timer state
-            fresh_room = Room.objects.get(id=room.id)
-
-            return {
-                "is_active": fresh_room.is_timer_active,
-                "start_time": (
-                    fresh_room.timer_start_time.isoformat()
-                    if fresh_room.timer_start_time
-                    else None
-                ),
-                "end_time": (
-                    fresh_room.timer_end_time.isoformat()
-                    if fresh_room.timer_end_time
-                    else None
-                ),
-                "duration": fresh_room.timer_duration,
-            }
-        except Exception as e:
-            logger.error(f"Error getting timer state: {e}")
-            return None
+    async def get_timer_state(self, room):
+        return await timer_state(room)
 
     # Add this method to the RoomConsumer class
 
-    @database_sync_to_async
+    @db_executor.sync_to_async
     def close_room_by_admin(self, room):
         """Close room when admin declines to rejoin"""
         try:
@@ -1429,32 +1115,12 @@ class RoomConsumer(AsyncWebsocketConsumer):
                     status=STATUS_CHOICES.COMPLETED, auto_closed=True
                 )
 
-                # Create session log if there were votes
-                participants = Participant.objects.filter(room=room)
-                if participants.filter(card_selection__isnull=False).exists():
-                    selections = {}
-                    total = 0
-                    count = 0
-
-                    for participant in participants:
-                        if participant.card_selection:
-                            try:
-                                card_value = float(participant.card_selection)
-                                total += card_value
-                                count += 1
-                            except ValueError:
-                                pass
-                            selections[participant.user.username] = (
-                                participant.card_selection
-                            )
-
-                    average = total / count if count > 0 else 0
-
-                    SessionLog.objects.create(
-                        room=room,
-                        story_point_average=average,
-                        participant_selections=selections,
-                    )
+                # Reveal the round being voted on, if there were votes; a
+                # round that was already revealed is not logged again
+                if Participant.objects.filter(
+                    room=room, card_selection__isnull=False
+                ).exists():
+                    reveal_room_votes(room)
 
                 return True
         except Exception as e:
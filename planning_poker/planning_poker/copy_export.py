@@ -0,0 +1,200 @@
+import csv
+import queue
+import threading
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS, connections
+from planning_poker.exports import (
+    ADMIN_EXPORT_COLUMNS,
+    STREAM_BUFFER_SIZE,
+    Echo,
+    buffered,
+    export_chunks,
+    gzipped,
+)
+from planning_poker.models import Room, SessionLog
+
+_DONE = object()
+
+
+class CopyCancelled(Exception):
+    """Raised inside the COPY writer thread once the reader has gone away"""
+
+
+def copy_supported(using=DEFAULT_DB_ALIAS):
+    return connections[using].vendor == "postgresql"
+
+
+def session_log_copy_sql():
+    """
+    ``COPY ... TO STDOUT`` producing the ADMIN_EXPORT_COLUMNS rows (without a
+    header) for every session log, oldest first. ``participant_selections``
+    is flattened in SQL; note that jsonb orders keys by length then bytes,
+    so selections are not listed in the order they were stored.
+    """
+    return f"""
+        COPY (
+            SELECT
+                l.id,
+                r.code,
+                r.project_name,
+                u.username,
+                to_char(l.timestamp AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS'),
+                l.story_point_average,
+                s.total_participants,
+                s.participant_selections,
+                s.total_votes,
+                CASE WHEN s.numeric_values = 1 THEN 'Yes' ELSE 'No' END
+            FROM {SessionLog._meta.db_table} l
+            JOIN {Room._meta.db_table} r ON r.id = l.room_id
+            JOIN {User._meta.db_table} u ON u.id = r.host_id
+            CROSS JOIN LATERAL (
+                SELECT
+                    count(*) AS total_participants,
+                    coalesce(
+                        string_agg(e.key || ': ' || coalesce(e.value, 'None'), '; '),
+                        ''
+                    ) AS participant_selections,
+                    count(*) FILTER (
+                        WHERE e.value NOT IN ('', 'SKIPPED')
+                    ) AS total_votes,
+                    count(DISTINCT CASE
+                        WHEN e.value ~ '^[0-9]*\\.?[0-9]*$' AND e.value ~ '[0-9]'
+                        THEN e.value::numeric
+                    END) AS numeric_values
+                FROM jsonb_each_text(l.participant_selections) AS e
+            ) s
+            ORDER BY l.timestamp, l.id
+        ) TO STDOUT WITH (FORMAT csv)
+    """
+
+
+class _QueueWriter:
+    """File-like target for psycopg2's copy_expert that batches rows into a queue"""
+
+    def __init__(self, blocks, cancelled, size=STREAM_BUFFER_SIZE):
+        self.blocks = blocks
+        self.cancelled = cancelled
+        self.size = size
+        self.parts = []
+        self.pending = 0
+
+    def put(self, item):
+        while True:
+            if self.cancelled.is_set():
+                raise CopyCancelled()
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def write(self, data):
+        data = data.encode() if isinstance(data, str) else bytes(data)
+        self.parts.append(data)
+        self.pending += len(data)
+        if self.pending >= self.size:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self.parts:
+            self.put(b"".join(self.parts))
+            self.parts = []
+            self.pending = 0
+
+
+def _psycopg2_copy(cursor, sql):
+    """
+    copy_expert() pushes rows into a file object and only returns once the
+    whole result has been written, so it runs in a helper thread feeding a
+    bounded queue that this generator drains.
+    """
+    blocks = queue.Queue(maxsize=8)
+    cancelled = threading.Event()
+    writer = _QueueWriter(blocks, cancelled)
+
+    def run():
+        try:
+            cursor.copy_expert(sql, writer)
+            writer.flush()
+            writer.put(_DONE)
+        except CopyCancelled:
+            pass
+        except Exception as e:
+            try:
+                writer.put(e)
+            except CopyCancelled:
+                pass
+
+    thread = threading.Thread(target=run, name="session-log-copy", daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            item = blocks.get()
+            if item is _DONE:
+                finished = True
+                return
+            if isinstance(item, Exception):
+                finished = True
+                raise item
+            yield item
+    finally:
+        if not finished:
+            # The reader stopped early: stop the server sending more rows
+            cancelled.set()
+            cursor.connection.cancel()
+        thread.join()
+
+
+def _psycopg_copy(cursor, sql):
+    with cursor.copy(sql) as copy:
+        # psycopg hands COPY output over one row at a time
+        yield from buffered(bytes(block) for block in copy)
+
+
+def copy_chunks(sql, using=DEFAULT_DB_ALIAS):
+    """Byte chunks of a ``COPY ... TO STDOUT`` statement, streamed as they arrive"""
+    connection = connections[using]
+    connection.ensure_connection()
+    completed = False
+    try:
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, "copy_expert"):
+                yield from _psycopg2_copy(cursor.cursor, sql)
+            else:
+                yield from _psycopg_copy(cursor.cursor, sql)
+        completed = True
+    finally:
+        if not completed and not connection.in_atomic_block:
+            # An interrupted COPY can leave the connection mid-protocol
+            connection.close()
+
+
+def admin_export_chunks(compress=False, use_copy=None, using=DEFAULT_DB_ALIAS):
+    """
+    CSV byte chunks of every session log across all rooms, read from the
+    ``using`` database. Uses COPY on PostgreSQL and the ORM streaming export
+    elsewhere (or when ``use_copy`` is False).
+    """
+    if use_copy is None:
+        use_copy = copy_supported(using)
+
+    if not use_copy:
+        queryset = (
+            SessionLog.objects.using(using)
+            .select_related("room", "room__host")
+            .order_by("timestamp", "id")
+        )
+        return export_chunks(queryset, ADMIN_EXPORT_COLUMNS, "csv", compress)
+
+    # COPY ends rows with a bare newline; match it in the header
+    header = csv.writer(Echo(), lineterminator="\n").writerow(
+        [title for title, _ in ADMIN_EXPORT_COLUMNS]
+    )
+
+    def chunks():
+        yield header.encode()
+        yield from copy_chunks(session_log_copy_sql(), using)
+
+    return gzipped(chunks()) if compress else chunks()
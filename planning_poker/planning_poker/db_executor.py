@@ -0,0 +1,177 @@
+import asyncio
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from channels.db import DatabaseSyncToAsync, database_sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def duration_summary(samples):
+    """Milliseconds summary of a window of durations in seconds"""
+    values = list(samples)
+    return {
+        "avg": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+        "p50": round(_percentile(values, 0.50) * 1000, 3),
+        "p95": round(_percentile(values, 0.95) * 1000, 3),
+        "p99": round(_percentile(values, 0.99) * 1000, 3),
+        "max": round(max(values, default=0.0) * 1000, 3),
+    }
+
+
+class DatabaseExecutor:
+    """
+    Runs blocking ORM calls from consumers on a dedicated, sized thread pool.
+
+    ``database_sync_to_async`` defaults to ``thread_sensitive=True``, which
+    funnels every socket's database work in a process through one thread,
+    so a single slow query stalls every room. Here calls run on ``size``
+    worker threads instead; Django connections are per thread, so each
+    worker keeps its own connection (cleaned up like Channels does, around
+    every call). A size of 0 keeps the single shared thread.
+
+    Queue wait (submit to start) and run times are kept for the last
+    ``window`` calls, along with counters for pool saturation.
+    """
+
+    def __init__(self, size=8, window=1000, name="consumer-db"):
+        self.size = size
+        self.name = name
+        self._executor = None
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=window)
+        self._runs = deque(maxlen=window)
+        self._created_at = time.monotonic()
+        self.active = 0
+        self.queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.saturated = 0
+        self.busy_seconds = 0.0
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            size=settings.CONSUMER_DB_POOL_SIZE,
+            window=settings.CONSUMER_DB_METRICS_WINDOW,
+        )
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.size, thread_name_prefix=self.name
+                )
+            return self._executor
+
+    def _submit(self):
+        with self._lock:
+            self.submitted += 1
+            # Every worker busy or already a backlog: this call has to wait
+            if self.active + self.queued >= self.size:
+                self.saturated += 1
+            self.queued += 1
+
+    def _start(self, job, wait):
+        with self._lock:
+            # Leaves the queue once, whether it starts or is abandoned first
+            if job["state"] == "queued":
+                self.queued -= 1
+            job["state"] = "started"
+            self.active += 1
+            self._waits.append(wait)
+
+    def _finish(self, run):
+        with self._lock:
+            self.active -= 1
+            self.completed += 1
+            self.busy_seconds += run
+            self._runs.append(run)
+
+    def _abandon(self, job):
+        with self._lock:
+            if job["state"] == "queued":
+                self.queued -= 1
+                job["state"] = "abandoned"
+
+    def sync_to_async(self, func):
+        """Decorator like ``database_sync_to_async`` that runs on this pool"""
+        if self.size <= 0:
+            return database_sync_to_async(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            submitted_at = time.monotonic()
+            job = {"state": "queued"}
+
+            def run():
+                started_at = time.monotonic()
+                self._start(job, started_at - submitted_at)
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self._finish(time.monotonic() - started_at)
+
+            self._submit()
+            try:
+                return await DatabaseSyncToAsync(
+                    run, thread_sensitive=False, executor=self.executor
+                )()
+            except asyncio.CancelledError:
+                # Cancelled before a worker picked it up: it will not count
+                # as queued any more (a no-op if it has started meanwhile)
+                self._abandon(job)
+                raise
+
+        return wrapper
+
+    def metrics(self):
+        with self._lock:
+            elapsed = time.monotonic() - self._created_at
+            return {
+                "size": self.size,
+                "active": self.active,
+                "queued": self.queued,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "saturated_submissions": self.saturated,
+                "saturation": round(self.active / self.size, 3) if self.size else None,
+                "utilization": (
+                    round(self.busy_seconds / (self.size * elapsed), 3)
+                    if self.size and elapsed
+                    else None
+                ),
+                "queue_wait_ms": duration_summary(self._waits),
+                "run_ms": duration_summary(self._runs),
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def connection_pool_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    Counters of this process's psycopg connection pool for ``alias`` (size,
+    available and waiting requests, wait times, bad connections returned...),
+    or None when the database is not pooled.
+    """
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+    return pool.get_stats()
+
+
+db_executor = DatabaseExecutor.from_settings()
@@ -0,0 +1,85 @@
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpRequest
+from rest_framework.request import Request
+
+REPLICA_DB_ALIAS = "replica"
+
+# Alias reads go to while inside ``replica_reads``
+_read_alias = ContextVar("read_alias", default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def _pin_key(user_id):
+    return f"primary-pin:{user_id}"
+
+
+def pin_to_primary(user_id):
+    """
+    Send ``user_id``'s replica reads to the primary for the next
+    DATABASE_REPLICA_STICKY_SECONDS, so they see their own writes before the
+    replica has caught up
+    """
+    if user_id and replica_configured():
+        cache.set(_pin_key(user_id), True, settings.DATABASE_REPLICA_STICKY_SECONDS)
+
+
+def read_alias(user=None):
+    """The database ``user``'s heavy reads should use"""
+    if not replica_configured():
+        return DEFAULT_DB_ALIAS
+    user_id = getattr(user, "id", None)
+    if user_id and cache.get(_pin_key(user_id)):
+        return DEFAULT_DB_ALIAS
+    return REPLICA_DB_ALIAS
+
+
+@contextmanager
+def replica_reads(user=None):
+    """Route reads made inside the block to the replica (see ``read_alias``)"""
+    token = _read_alias.set(read_alias(user))
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def reads_from_replica(view):
+    """
+    Run a function view or viewset action with ``replica_reads`` for the
+    requesting user. Querysets evaluated after the view returns (streamed
+    responses) must be bound with ``.using()`` while it runs.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        request = next(arg for arg in args if isinstance(arg, (Request, HttpRequest)))
+        with replica_reads(request.user):
+            return view(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Reads go to the primary unless code opted in with ``replica_reads``;
+    writes always go to the primary. Both aliases hold the same data, so
+    relations between their objects are allowed.
+    """
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
@@ -0,0 +1,317 @@
+import csv
+import json
+import os
+import zlib
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, StreamingHttpResponse
+
+# (CSV header, row key) pairs for a single room's export
+ROOM_EXPORT_COLUMNS = [
+    ("Session ID", "session_id"),
+    ("Room Code", "room_code"),
+    ("Project Name", "project_name"),
+    ("Host", "host"),
+    ("Timestamp", "timestamp"),
+    ("Story Point Average", "story_point_average"),
+    ("Total Participants", "total_participants"),
+    ("Participant Selections", "participant_selections"),
+    ("Total Votes", "total_votes"),
+]
+
+# The all-rooms export adds derived columns, and the round's start and reveal
+# times (empty for logs from before rounds were recorded); querysets need
+# ``round`` loaded
+ALL_EXPORT_COLUMNS = ROOM_EXPORT_COLUMNS + [
+    ("Round Started", "round_started_at"),
+    ("Round Revealed", "round_revealed_at"),
+    ("Session Duration (seconds)", "session_duration"),
+    ("Consensus Reached", "consensus_reached"),
+]
+
+# The staff export across every room (the columns the COPY query produces)
+ADMIN_EXPORT_COLUMNS = ROOM_EXPORT_COLUMNS + [
+    ("Consensus Reached", "consensus_reached"),
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+# Bytes gathered before a chunk is handed to the response
+STREAM_BUFFER_SIZE = 64 * 1024
+
+_DONE = object()
+
+
+def consensus_reached(selections):
+    """True when every numeric vote is the same value"""
+    numeric_votes = []
+    for selection in selections.values():
+        if selection and selection != "SKIPPED":
+            try:
+                if selection.replace(".", "").isdigit():
+                    numeric_votes.append(float(selection))
+            except (ValueError, AttributeError):
+                continue
+    return len(set(numeric_votes)) == 1 if numeric_votes else False
+
+
+def log_round(log):
+    """The Round ``log`` was revealed from, or None"""
+    try:
+        return log.round
+    except ObjectDoesNotExist:
+        return None
+
+
+def session_log_row(log):
+    """Export fields for one SessionLog (with ``room`` and ``room.host`` loaded)"""
+    selections = log.participant_selections
+    participant_count = len(selections)
+    revealed = log_round(log)
+    started_at = revealed.started_at if revealed else None
+    revealed_at = revealed.revealed_at if revealed else None
+    return {
+        "session_id": log.id,
+        "room_code": log.room.code,
+        "project_name": log.room.project_name,
+        "host": log.room.host.username,
+        "timestamp": log.timestamp,
+        "story_point_average": log.story_point_average,
+        "total_participants": participant_count,
+        "participant_selections": selections,
+        "total_votes": sum(
+            1
+            for selection in selections.values()
+            if selection and selection != "SKIPPED"
+        ),
+        "round_started_at": started_at,
+        "round_revealed_at": revealed_at,
+        "session_duration": (
+            round((revealed_at - started_at).total_seconds())
+            if started_at and revealed_at
+            else None
+        ),
+        "consensus_reached": consensus_reached(selections),
+    }
+
+
+class Echo:
+    """File-like object whose write() hands the value back to the caller"""
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if isinstance(value, dict):
+        # Format participant selections as readable string
+        return "; ".join(f"{user}: {vote}" for user, vote in value.items())
+    if isinstance(value, bool):
+        return "Yes" if value else "No"
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in columns])
+    for row in rows:
+        yield writer.writerow([_csv_value(row[key]) for _, key in columns])
+
+
+def ndjson_lines(columns, rows):
+    for row in rows:
+        yield json.dumps({key: row[key] for _, key in columns}, default=_json_default) + "\n"
+
+
+def buffered(lines, size=STREAM_BUFFER_SIZE):
+    """Join small text (or bytes) lines into byte chunks of roughly ``size`` bytes"""
+    parts = []
+    pending = 0
+    for line in lines:
+        data = line.encode() if isinstance(line, str) else line
+        parts.append(data)
+        pending += len(data)
+        if pending >= size:
+            yield b"".join(parts)
+            parts = []
+            pending = 0
+    if parts:
+        yield b"".join(parts)
+
+
+def gzipped(chunks):
+    """Compress a byte stream on the fly into a gzip member"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def counted(rows, progress, every):
+    """Pass rows through, calling ``progress(total)`` every ``every`` rows and at the end"""
+    total = 0
+    for row in rows:
+        yield row
+        total += 1
+        if total % every == 0:
+            progress(total)
+    progress(total)
+
+
+def export_chunks(queryset, columns, export_format="csv", compress=False, progress=None):
+    """
+    Byte chunks of ``queryset`` exported as CSV or NDJSON, fetched from the
+    database ``EXPORT_CHUNK_SIZE`` rows at a time so memory stays bounded.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    rows = (
+        session_log_row(log) for log in queryset.iterator(chunk_size=chunk_size)
+    )
+    if progress:
+        rows = counted(rows, progress, chunk_size)
+    lines = ndjson_lines(columns, rows) if export_format == "ndjson" else csv_lines(
+        columns, rows
+    )
+    chunks = buffered(lines)
+    return gzipped(chunks) if compress else chunks
+
+
+async def iterate_in_thread(iterator):
+    """
+    Drive a synchronous (database-reading) iterator from async code one chunk
+    at a time. Under ASGI, Django would otherwise read a sync streaming
+    iterator into a list before sending anything.
+    """
+    iterator = iter(iterator)
+    next_chunk = sync_to_async(next, thread_sensitive=True)
+    while True:
+        chunk = await next_chunk(iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
+
+
+def parse_export_options(request):
+    """Read ``output`` (csv|ndjson) and ``gzip`` from the query string"""
+    export_format = request.query_params.get("output", "csv").lower()
+    if export_format not in EXPORT_FORMATS:
+        export_format = None
+    compress = request.query_params.get("gzip", "").lower() in ("1", "true", "yes")
+    return export_format, compress
+
+
+def streaming_response(request, chunks, content_type, status=200):
+    """StreamingHttpResponse that also streams (rather than buffers) under ASGI"""
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        chunks = iterate_in_thread(chunks)
+    return StreamingHttpResponse(chunks, content_type=content_type, status=status)
+
+
+def streaming_export_response(request, queryset, columns, filename, export_format, compress):
+    """Stream ``queryset`` as a file download named ``filename`` (no extension)"""
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"{filename}.{extension}"
+    # The body is read after the view returns: fix the database now, while
+    # any replica routing set up for the view still applies
+    queryset = queryset.using(queryset.db)
+    chunks = export_chunks(queryset, columns, export_format, compress)
+    if compress:
+        content_type = "application/gzip"
+        filename += ".gz"
+
+    response = streaming_response(request, chunks, content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _file_chunks(path, start, length, block_size=STREAM_BUFFER_SIZE):
+    with open(path, "rb") as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(block_size, length))
+            if not data:
+                return
+            length -= len(data)
+            yield data
+
+
+def parse_range_header(header, size):
+    """
+    Parse a single ``bytes=`` range against a file of ``size`` bytes.
+
+    Returns ``(start, end)`` (inclusive), None when there is no usable Range
+    header, or raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+    end = min(end, size - 1)
+    if start > end or start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def ranged_file_response(request, path, content_type, filename):
+    """Serve a file download, honouring a single-range ``Range`` request header"""
+    size = os.path.getsize(path)
+    try:
+        byte_range = parse_range_header(request.META.get("HTTP_RANGE"), size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    if byte_range is None:
+        response = streaming_response(request, _file_chunks(path, 0, size), content_type)
+        response["Content-Length"] = str(size)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        response = streaming_response(
+            request, _file_chunks(path, start, length), content_type, status=206
+        )
+        response["Content-Length"] = str(length)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def write_export_file(path, queryset, columns, export_format, compress, progress=None):
+    """
+    Write an export to ``path`` chunk by chunk. The data goes to a ``.part``
+    file that is renamed into place once complete. Returns the file size.
+    """
+    partial_path = f"{path}.part"
+    with open(partial_path, "wb") as f:
+        for chunk in export_chunks(queryset, columns, export_format, compress, progress):
+            f.write(chunk)
+    os.replace(partial_path, path)
+    return os.path.getsize(path)
@@ -7,6 +7,13 @@ class STATUS_CHOICES(models.TextChoices):
     COMPLETED = "COMPLETED", "Completed"
 
 
+class EXPORT_JOB_STATUS(models.TextChoices):
+    PENDING = "PENDING", "Pending"
+    RUNNING = "RUNNING", "Running"
+    COMPLETED = "COMPLETED", "Completed"
+    FAILED = "FAILED", "Failed"
+
+
 class POINT_SYSTEMS:
     FIBONACCI = "fibonacci"
     MODIFIED_FIBONACCI = "modified_fibonacci"
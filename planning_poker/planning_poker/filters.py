@@ -0,0 +1,67 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def _parse_bound(value, param, end=False):
+    """Parse an ISO date or datetime; a bare date ``to`` covers the whole day"""
+    try:
+        parsed = parse_datetime(value)
+        if parsed is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError
+            if end:
+                day += timedelta(days=1)
+            parsed = datetime.combine(day, time.min)
+        elif end:
+            # Exclusive upper bound just past the given instant
+            parsed += timedelta(microseconds=1)
+    except ValueError:
+        raise ValidationError({param: "Expected an ISO 8601 date or datetime."})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def filter_date_range(queryset, request, field, from_param="from", to_param="to"):
+    """
+    Restrict ``queryset`` to ``field`` within the request's ``from``/``to``
+    query parameters (both inclusive), keeping plain range predicates so an
+    index on ``field`` can be used.
+    """
+    start = request.query_params.get(from_param)
+    end = request.query_params.get(to_param)
+    if start:
+        queryset = queryset.filter(**{f"{field}__gte": _parse_bound(start, from_param)})
+    if end:
+        queryset = queryset.filter(
+            **{f"{field}__lt": _parse_bound(end, to_param, end=True)}
+        )
+    return queryset
+
+
+def filter_session_logs(queryset, request):
+    """
+    Apply the session history filters from the query string: ``room`` (id or
+    code), ``project``, ``point_system`` and a ``from``/``to`` timestamp range.
+    """
+    params = request.query_params
+
+    room = params.get("room")
+    if room:
+        if room.isdigit():
+            queryset = queryset.filter(room_id=int(room))
+        else:
+            queryset = queryset.filter(room__code=room)
+
+    project = params.get("project")
+    if project:
+        queryset = queryset.filter(room__project_name=project)
+
+    point_system = params.get("point_system")
+    if point_system:
+        queryset = queryset.filter(room__point_system=point_system)
+
+    return filter_date_range(queryset, request, "timestamp")
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from planning_poker.models import SessionLog, Vote
+from planning_poker.session_log_service import build_votes, user_ids_for
+
+
+class Command(BaseCommand):
+    help = (
+        "Populates the Vote table from SessionLog.participant_selections for "
+        "session logs that have no votes yet, in chunks. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Session logs processed per chunk (default: 1000)",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        pending = SessionLog.objects.filter(
+            ~Exists(Vote.objects.filter(session_log=OuterRef("pk")))
+        ).order_by("id")
+
+        last_id = 0
+        logs_done = 0
+        votes_done = 0
+        while True:
+            batch = list(
+                pending.filter(id__gt=last_id).only("id", "participant_selections")[
+                    :batch_size
+                ]
+            )
+            if not batch:
+                break
+
+            # Selections are keyed by username; resolve the chunk's users at once
+            user_ids = user_ids_for(
+                {username for log in batch for username in log.participant_selections}
+            )
+            votes = [
+                vote
+                for log in batch
+                for vote in build_votes(log, log.participant_selections, user_ids)
+            ]
+            with transaction.atomic():
+                Vote.objects.bulk_create(votes)
+
+            last_id = batch[-1].id
+            logs_done += len(batch)
+            votes_done += len(votes)
+            self.stdout.write(f"Backfilled {logs_done} session logs...")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {votes_done} votes for {logs_done} session logs"
+            )
+        )
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import time
+import uuid
+from channels_redis.core import RedisChannelLayer
+from channels_redis.pubsub import RedisPubSubChannelLayer
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from planning_poker.channel_layers import LocalFirstChannelLayer, PostgresChannelLayer
+from planning_poker.db_executor import duration_summary
+
+LAYERS = {
+    "redis": RedisChannelLayer,
+    "pubsub": RedisPubSubChannelLayer,
+    "local-first": LocalFirstChannelLayer,
+    "postgres": PostgresChannelLayer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares group_send throughput and delivery latency of the Redis, "
+        "Redis pub/sub, local-first and PostgreSQL (LISTEN/NOTIFY, on the "
+        "default database) channel layers. Rooms are groups of "
+        "member channels; with --remote-members some of each room's members "
+        "sit on a second simulated node (another layer instance on the same "
+        "Redis or database). Uses its own prefix and flushes it afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--redis-url",
+            default=os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            help="Redis to benchmark against (default: REDIS_URL or "
+            "redis://localhost:6379/0)",
+        )
+        parser.add_argument(
+            "--layers",
+            help=f"Comma separated layers out of {', '.join(LAYERS)} (default: "
+            "all, postgres only when the default database is PostgreSQL)",
+        )
+        parser.add_argument(
+            "--rooms", type=int, default=16, help="Groups (default: 16)"
+        )
+        parser.add_argument(
+            "--members", type=int, default=6, help="Members per room (default: 6)"
+        )
+        parser.add_argument(
+            "--remote-members",
+            default="0,2",
+            help="Comma separated numbers of each room's members on the second "
+            "node (default: 0,2)",
+        )
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=200,
+            help="Broadcasts sent to each room (default: 200)",
+        )
+
+    def handle(self, *args, **options):
+        remote_levels = [int(level) for level in options["remote_members"].split(",")]
+        if options["layers"]:
+            names = options["layers"].split(",")
+        else:
+            names = [
+                name
+                for name in LAYERS
+                if name != "postgres" or connection.vendor == "postgresql"
+            ]
+        if "postgres" in names and connection.vendor != "postgresql":
+            raise CommandError("The postgres layer needs a PostgreSQL database")
+        self.stdout.write(
+            f"{options['rooms']} rooms x {options['members']} members, "
+            f"{options['messages']} broadcasts per room"
+        )
+        self.stdout.write(
+            f"{'layer':>11} {'remote':>6} | {'sends/s':>9} {'deliveries/s':>12} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        for name in names:
+            for remote in remote_levels:
+                result = asyncio.run(self.measure(LAYERS[name], remote, options))
+                latency = result["latency"]
+                self.stdout.write(
+                    f"{name:>11} {remote:>6} | {result['sends']:>9.1f} "
+                    f"{result['deliveries']:>12.1f} {latency['p50']:>8.2f} "
+                    f"{latency['p95']:>8.2f} {latency['p99']:>8.2f}"
+                )
+
+    async def measure(self, layer_class, remote, options):
+        config = {"prefix": f"bench_{uuid.uuid4().hex[:8]}"}
+        if layer_class is not PostgresChannelLayer:
+            config["hosts"] = [options["redis_url"]]
+        if layer_class is not RedisPubSubChannelLayer:
+            # The Redis layer queues all of a process's channels under one
+            # key: let it hold every broadcast so none are dropped
+            config["capacity"] = options["rooms"] * options["messages"] + 100
+        # Both nodes share the prefix, as processes of one deployment do
+        local_node, remote_node = layer_class(**config), layer_class(**config)
+
+        rooms = []
+        for room in range(options["rooms"]):
+            group = f"bench_room_{room}"
+            members = []
+            for member in range(options["members"]):
+                node = remote_node if member < remote else local_node
+                channel = await node.new_channel()
+                await node.group_add(group, channel)
+                members.append((node, channel))
+            rooms.append((group, members))
+
+        latencies = []
+
+        async def member(node, channel):
+            for _ in range(options["messages"]):
+                message = await node.receive(channel)
+                latencies.append(time.perf_counter() - message["sent"])
+
+        async def broadcaster(group):
+            for _ in range(options["messages"]):
+                await local_node.group_send(
+                    group, {"type": "room.state", "sent": time.perf_counter()}
+                )
+
+        receivers = [
+            asyncio.ensure_future(member(node, channel))
+            for _, members in rooms
+            for node, channel in members
+        ]
+        # Let pub/sub and LISTEN subscriptions settle before the first broadcast
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        await asyncio.gather(*(broadcaster(group) for group, _ in rooms))
+        await asyncio.wait_for(asyncio.gather(*receivers), timeout=120)
+        elapsed = time.perf_counter() - started
+
+        for group, members in rooms:
+            for node, channel in members:
+                await node.group_discard(group, channel)
+        await local_node.flush()
+        await remote_node.flush()
+        return {
+            "sends": options["rooms"] * options["messages"] / elapsed,
+            "deliveries": len(latencies) / elapsed,
+            "latency": duration_summary(latencies),
+        }
@@ -0,0 +1,125 @@
+import asyncio
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from planning_poker.db_executor import DatabaseExecutor, duration_summary
+from planning_poker.fields import POINT_SYSTEM_CARDS, POINT_SYSTEMS
+from planning_poker.models import Participant, Room
+from planning_poker.room_service import upsert_vote
+
+PREFIX = "consumer-db-bench"
+
+
+class Command(BaseCommand):
+    help = (
+        "Load test of the consumer database thread pool: simulated sockets "
+        "vote and reload their room concurrently, for each pool size. Seeds "
+        "its own rooms and users and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--pool-sizes",
+            default="0,1,2,4,8",
+            help="Comma separated pool sizes, 0 being Channels' single shared "
+            "thread (default: 0,1,2,4,8)",
+        )
+        parser.add_argument(
+            "--sockets",
+            type=int,
+            default=64,
+            help="Concurrent simulated sockets (default: 64)",
+        )
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=20,
+            help="Votes sent per socket (default: 20)",
+        )
+        parser.add_argument(
+            "--rooms",
+            type=int,
+            default=8,
+            help="Rooms the sockets are spread over (default: 8)",
+        )
+        parser.add_argument(
+            "--query-delay",
+            type=float,
+            default=5.0,
+            help="Extra milliseconds per call, standing in for network round "
+            "trips and slow queries on a real database (default: 5)",
+        )
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options["pool_sizes"].split(",")]
+        host, rooms, users = self.seed(options["rooms"], options["sockets"])
+        try:
+            self.stdout.write(
+                f"{options['sockets']} sockets x {options['messages']} votes, "
+                f"{options['query_delay']} ms added per call"
+            )
+            self.stdout.write(
+                f"{'pool':>5} | {'msgs/s':>9} {'p50 ms':>8} {'p95 ms':>8} | "
+                f"{'wait p95 ms':>11} {'saturated':>9}"
+            )
+            for size in sizes:
+                result = asyncio.run(self.measure(size, rooms, users, options))
+                self.stdout.write(
+                    f"{size:>5} | {result['rate']:>9.1f} {result['latency']['p50']:>8.2f} "
+                    f"{result['latency']['p95']:>8.2f} | "
+                    f"{result['wait']['p95']:>11.2f} {result['saturated']:>9}"
+                )
+        finally:
+            Room.objects.filter(host=host).delete()
+            User.objects.filter(username__startswith=PREFIX).delete()
+
+    def seed(self, room_count, socket_count):
+        host = User.objects.create(username=f"{PREFIX}-host")
+        rooms = Room.objects.bulk_create(
+            Room(host=host, code=f"B{i:05d}", project_name="Consumer DB benchmark")
+            for i in range(room_count)
+        )
+        users = User.objects.bulk_create(
+            User(username=f"{PREFIX}-{i}", is_active=False) for i in range(socket_count)
+        )
+        return host, rooms, users
+
+    async def measure(self, size, rooms, users, options):
+        executor = DatabaseExecutor(
+            size=size, window=options["sockets"] * options["messages"]
+        )
+        cards = POINT_SYSTEM_CARDS[POINT_SYSTEMS.FIBONACCI]
+        delay = options["query_delay"] / 1000
+
+        # What a vote costs a consumer: record it, then reload the room state
+        @executor.sync_to_async
+        def submit_vote(user, room, card):
+            upsert_vote(user, room, card)
+            participants = list(
+                Participant.objects.filter(room=room).values("id", "card_selection")
+            )
+            time.sleep(delay)
+            return participants
+
+        latencies = []
+
+        async def socket(index):
+            user, room = users[index], rooms[index % len(rooms)]
+            for _ in range(options["messages"]):
+                started = time.perf_counter()
+                await submit_vote(user, room, random.choice(cards))
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(socket(i) for i in range(len(users))))
+        elapsed = time.perf_counter() - started
+        metrics = executor.metrics()
+        executor.shutdown()
+
+        return {
+            "rate": len(latencies) / elapsed,
+            "latency": duration_summary(latencies),
+            "wait": metrics["queue_wait_ms"],
+            "saturated": metrics["saturated_submissions"],
+        }
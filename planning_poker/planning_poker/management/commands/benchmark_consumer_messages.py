@@ -0,0 +1,107 @@
+import asyncio
+import json
+import time
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from planning_poker.db_executor import duration_summary
+from planning_poker.models import AnonymousSession, Room
+from planning_poker.routing import websocket_urlpatterns
+
+PREFIX = "consumer-msg-bench"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures RoomConsumer per-message latency under concurrency: guest "
+        "sockets, one per room, submit votes and wait for the room state "
+        "broadcast. Seeds its own rooms and deletes them and the guests "
+        "afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            default="1,8,32",
+            help="Comma separated numbers of simultaneous sockets (default: 1,8,32)",
+        )
+        parser.add_argument(
+            "--messages",
+            type=int,
+            default=20,
+            help="Votes sent per socket (default: 20)",
+        )
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        host = User.objects.create(username=f"{PREFIX}-host")
+        rooms = Room.objects.bulk_create(
+            Room(
+                host=host,
+                code=f"M{i:05d}",
+                project_name="Consumer message benchmark",
+                auto_reveal_cards=False,
+            )
+            for i in range(max(levels))
+        )
+        session_ids = []
+        try:
+            self.stdout.write(f"{options['messages']} votes per socket, one socket per room")
+            self.stdout.write(
+                f"{'sockets':>7} | {'msgs/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+            )
+            for level in levels:
+                result = asyncio.run(
+                    self.measure(rooms[:level], options["messages"], session_ids)
+                )
+                latency = result["latency"]
+                self.stdout.write(
+                    f"{level:>7} | {result['rate']:>9.1f} {latency['p50']:>8.2f} "
+                    f"{latency['p95']:>8.2f} {latency['p99']:>8.2f}"
+                )
+        finally:
+            Room.objects.filter(host=host).delete()
+            guests = AnonymousSession.objects.filter(session_id__in=session_ids)
+            User.objects.filter(id__in=guests.values("user_id")).delete()
+            host.delete()
+
+    async def receive_until(self, communicator, message_type):
+        while True:
+            message = json.loads(await communicator.receive_from(timeout=30))
+            if message.get("type") == message_type:
+                return message
+
+    async def drain(self, communicator):
+        while not await communicator.receive_nothing(timeout=0.05):
+            await communicator.receive_from()
+
+    async def measure(self, rooms, messages, session_ids):
+        application = URLRouter(websocket_urlpatterns)
+        communicators = []
+        for room in rooms:
+            communicator = WebsocketCommunicator(application, f"/ws/rooms/{room.code}/")
+            connected, _ = await communicator.connect(timeout=30)
+            if not connected:
+                raise RuntimeError(f"Could not connect to room {room.code}")
+            state = await self.receive_until(communicator, "room_state")
+            session_ids.append(state["anonymous_session_id"])
+            await self.drain(communicator)
+            communicators.append(communicator)
+
+        latencies = []
+
+        async def socket(communicator):
+            for _ in range(messages):
+                started = time.perf_counter()
+                await communicator.send_json_to({"type": "submit_vote", "card_value": "3"})
+                await self.receive_until(communicator, "room_state")
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(socket(communicator) for communicator in communicators))
+        elapsed = time.perf_counter() - started
+
+        for communicator in communicators:
+            await communicator.disconnect()
+        return {"rate": len(latencies) / elapsed, "latency": duration_summary(latencies)}
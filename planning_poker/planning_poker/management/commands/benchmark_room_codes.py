@@ -0,0 +1,148 @@
+import random
+import string
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from planning_poker.models import Room, RoomCodeSequence
+from planning_poker.utils import RoomCodeAllocator, RoomCodePermutation
+
+
+BENCHMARK_KEY = "room-code-benchmark"
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks room creation throughput with the random-probing code "
+        "generator versus the permutation allocator at increasing fill ratios. "
+        "Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--length",
+            type=int,
+            default=3,
+            help="Code length; small lengths make high fill ratios cheap to reach "
+            "(default: 3, i.e. 33,696 codes)",
+        )
+        parser.add_argument(
+            "--fill-ratios",
+            default="0.0,0.5,0.9,0.99",
+            help="Comma separated fractions of the code space filled before "
+            "measuring (default: 0.0,0.5,0.9,0.99)",
+        )
+        parser.add_argument(
+            "--rooms",
+            type=int,
+            default=200,
+            help="Rooms created per measurement (default: 200)",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=100,
+            help="Probe limit of the random generator (default: 100)",
+        )
+
+    def handle(self, *args, **options):
+        length = options["length"]
+        ratios = [float(r) for r in options["fill_ratios"].split(",")]
+        permutation = RoomCodePermutation(BENCHMARK_KEY, length=length)
+
+        self.stdout.write(
+            f"Code space: {permutation.size} codes of length {length}, "
+            f"{options['rooms']} rooms per measurement"
+        )
+        self.stdout.write(
+            f"{'fill':>6} | {'random rooms/s':>14} {'queries/room':>12} "
+            f"{'failed':>6} | {'allocator rooms/s':>17} {'queries/room':>12}"
+        )
+
+        for ratio in ratios:
+            random_result = self.measure(
+                ratio, permutation, options, self.random_codes
+            )
+            allocator_result = self.measure(
+                ratio, permutation, options, self.allocator_codes
+            )
+            self.stdout.write(
+                f"{ratio:>6.2f} | {random_result['rate']:>14.1f} "
+                f"{random_result['queries']:>12.2f} {random_result['failed']:>6} | "
+                f"{allocator_result['rate']:>17.1f} {allocator_result['queries']:>12.2f}"
+            )
+
+    def random_codes(self, length, options):
+        """The pre-allocator generator: random draws checked with exists()"""
+
+        def generate():
+            for _ in range(options["max_attempts"]):
+                code = random.choice(string.ascii_uppercase) + "".join(
+                    random.choices(
+                        string.ascii_uppercase + string.digits, k=length - 1
+                    )
+                )
+                if not Room.objects.filter(code=code).exists():
+                    return code
+            return None
+
+        return generate
+
+    def allocator_codes(self, length, options):
+        allocator = RoomCodeAllocator(length=length, key=BENCHMARK_KEY)
+        return allocator.allocate
+
+    def measure(self, ratio, permutation, options, make_generator):
+        target = int(permutation.size * ratio)
+        rooms = min(options["rooms"], permutation.size - target)
+        result = {"rate": 0.0, "queries": 0.0, "failed": 0}
+
+        try:
+            with transaction.atomic():
+                host = User.objects.create(username="room-code-benchmark")
+                # The table is pre-filled with the codes the allocator would
+                # have handed out; the random generator only sees a full table.
+                Room.objects.bulk_create(
+                    (
+                        Room(host=host, code=permutation.encode(i), project_name="Fill")
+                        for i in range(target)
+                    ),
+                    batch_size=2000,
+                )
+
+                # Start the allocator right after the pre-filled codes
+                RoomCodeSequence.objects.update_or_create(
+                    name=f"room_code:{permutation.length}",
+                    defaults={"next_value": target},
+                )
+                generate = make_generator(permutation.length, options)
+
+                created = 0
+                queries = []
+
+                def count_query(execute, sql, params, many, context):
+                    queries.append(sql)
+                    return execute(sql, params, many, context)
+
+                with connection.execute_wrapper(count_query):
+                    started = time.perf_counter()
+                    for _ in range(rooms):
+                        code = generate()
+                        if code is None:
+                            result["failed"] += 1
+                            continue
+                        Room.objects.create(host=host, code=code, project_name="Bench")
+                        created += 1
+                    elapsed = time.perf_counter() - started
+
+                result["rate"] = created / elapsed if elapsed else 0.0
+                result["queries"] = len(queries) / rooms if rooms else 0.0
+                raise Rollback
+        except Rollback:
+            pass
+
+        return result
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from channels.layers import InMemoryChannelLayer, get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from planning_poker.broadcaster import BROADCASTER_CHANNEL
+from planning_poker.db_executor import duration_summary
+from planning_poker.models import AnonymousSession, Room
+from planning_poker.routing import websocket_urlpatterns
+
+PREFIX = "room-fanout-bench"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures how room state fan-out affects a worker's request handling: "
+        "a probe socket in a quiet room keeps asking for its room state while "
+        "a voter in a room of --fanouts guest sockets votes at a steady pace. "
+        "Runs with consumers broadcasting themselves (off) and through a "
+        "runworker room-broadcaster subprocess (on), which needs a Redis or "
+        "PostgreSQL channel layer. Seeds its own rooms and deletes them and "
+        "the guests afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fanouts",
+            default="10,50,200",
+            help="Comma separated numbers of sockets in the busy room "
+            "(default: 10,50,200)",
+        )
+        parser.add_argument(
+            "--modes",
+            default="off,on",
+            help="Comma separated broadcaster modes (default: off,on)",
+        )
+        parser.add_argument(
+            "--votes",
+            type=int,
+            default=40,
+            help="Votes sent in the busy room per run (default: 40)",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=50.0,
+            help="Milliseconds between votes (default: 50)",
+        )
+
+    def handle(self, *args, **options):
+        fanouts = [int(fanout) for fanout in options["fanouts"].split(",")]
+        modes = options["modes"].split(",")
+        if "on" in modes and isinstance(get_channel_layer(), InMemoryChannelLayer):
+            raise CommandError(
+                "The broadcaster runs in another process: configure REDIS_URL "
+                "or a PostgreSQL database"
+            )
+
+        host = User.objects.create(username=f"{PREFIX}-host")
+        session_ids = []
+        try:
+            self.stdout.write(
+                f"{options['votes']} votes every {options['interval']} ms; "
+                "probe round trip in a quiet room"
+            )
+            self.stdout.write(
+                f"{'broadcaster':>11} {'sockets':>7} | {'probe p50':>9} "
+                f"{'p95':>8} {'p99':>8} {'max':>8}"
+            )
+            for mode in modes:
+                worker = self.start_broadcaster() if mode == "on" else None
+                try:
+                    with override_settings(ROOM_BROADCASTER=mode == "on"):
+                        for index, fanout in enumerate(fanouts):
+                            rooms = Room.objects.bulk_create(
+                                Room(
+                                    host=host,
+                                    code=f"F{mode[:2].upper()}{index:03d}{i}",
+                                    project_name="Room fan-out benchmark",
+                                    auto_reveal_cards=False,
+                                )
+                                for i in range(2)
+                            )
+                            latency = asyncio.run(
+                                self.measure(*rooms, fanout, options, session_ids)
+                            )
+                            self.stdout.write(
+                                f"{mode:>11} {fanout:>7} | {latency['p50']:>9.2f} "
+                                f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} "
+                                f"{latency['max']:>8.2f}"
+                            )
+                finally:
+                    if worker is not None:
+                        worker.terminate()
+                        worker.wait()
+        finally:
+            Room.objects.filter(host=host).delete()
+            guests = AnonymousSession.objects.filter(session_id__in=session_ids)
+            User.objects.filter(id__in=guests.values("user_id")).delete()
+            host.delete()
+
+    def start_broadcaster(self):
+        worker = subprocess.Popen(
+            [sys.executable, "manage.py", "runworker", BROADCASTER_CHANNEL],
+            cwd=settings.BASE_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # Give it time to start consuming the channel
+        time.sleep(3)
+        if worker.poll() is not None:
+            raise CommandError("The room-broadcaster worker exited on startup")
+        return worker
+
+    async def receive_until(self, communicator, message_type):
+        while True:
+            message = json.loads(await communicator.receive_from(timeout=60))
+            if message.get("type") == message_type:
+                return message
+
+    async def connect(self, application, room, session_ids):
+        communicator = WebsocketCommunicator(application, f"/ws/rooms/{room.code}/")
+        connected, _ = await communicator.connect(timeout=60)
+        if not connected:
+            raise RuntimeError(f"Could not connect to room {room.code}")
+        state = await self.receive_until(communicator, "room_state")
+        session_ids.append(state["anonymous_session_id"])
+        return communicator
+
+    async def probe(self, communicator):
+        started = time.perf_counter()
+        await communicator.send_json_to({"type": "join_room"})
+        await self.receive_until(communicator, "room_state")
+        return time.perf_counter() - started
+
+    async def measure(self, busy_room, quiet_room, fanout, options, session_ids):
+        application = URLRouter(websocket_urlpatterns)
+        prober = await self.connect(application, quiet_room, session_ids)
+        idle = min([await self.probe(prober) for _ in range(5)])
+
+        sockets = [
+            await self.connect(application, busy_room, session_ids)
+            for _ in range(fanout)
+        ]
+        # Let the joins' broadcasts drain before measuring
+        deadline = time.monotonic() + 120
+        while await self.probe(prober) > 3 * idle and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+
+        voting = True
+        latencies = []
+
+        async def voter():
+            nonlocal voting
+            for vote in range(options["votes"]):
+                card = "3" if vote % 2 else "5"
+                await sockets[0].send_json_to({"type": "submit_vote", "card_value": card})
+                await asyncio.sleep(options["interval"] / 1000)
+            voting = False
+
+        async def prober_loop():
+            while voting:
+                latencies.append(await self.probe(prober))
+
+        await asyncio.gather(voter(), prober_loop())
+
+        for communicator in [prober, *sockets]:
+            await communicator.disconnect()
+        return duration_summary(latencies)
@@ -0,0 +1,104 @@
+import random
+import time
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from planning_poker.copy_export import admin_export_chunks, copy_supported
+from planning_poker.models import Room, SessionLog
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the all-rooms session log export (COPY versus ORM) over "
+        "seeded rows. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rows",
+            type=int,
+            default=1_000_000,
+            help="Session logs to seed (default: 1000000)",
+        )
+        parser.add_argument(
+            "--rooms",
+            type=int,
+            default=1000,
+            help="Rooms the session logs are spread over (default: 1000)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk insert while seeding (default: 5000)",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Also gzip-compress the output"
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options)
+
+                paths = [("ORM", False)]
+                if copy_supported():
+                    paths.insert(0, ("COPY", True))
+                else:
+                    self.stdout.write("COPY needs PostgreSQL; measuring the ORM path only")
+
+                self.stdout.write(
+                    f"{'path':>5} | {'seconds':>8} {'rows/s':>10} {'MB':>8} {'MB/s':>7}"
+                )
+                for name, use_copy in paths:
+                    self.measure(name, use_copy, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, options):
+        started = time.perf_counter()
+        host = User.objects.create(username="session-log-export-benchmark")
+        rooms = Room.objects.bulk_create(
+            Room(host=host, code=f"X{i:05d}", project_name=f"Project {i % 50}")
+            for i in range(options["rooms"])
+        )
+        cards = ["1", "2", "3", "5", "8", "13", "?", "SKIPPED"]
+
+        remaining = options["rows"]
+        while remaining > 0:
+            size = min(options["batch_size"], remaining)
+            SessionLog.objects.bulk_create(
+                SessionLog(
+                    room=random.choice(rooms),
+                    story_point_average=round(random.uniform(1, 13), 2),
+                    participant_selections={
+                        f"user{n}": random.choice(cards)
+                        for n in range(random.randint(3, 8))
+                    },
+                )
+                for _ in range(size)
+            )
+            remaining -= size
+
+        self.stdout.write(
+            f"Seeded {options['rows']} session logs over {options['rooms']} rooms "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def measure(self, name, use_copy, options):
+        started = time.perf_counter()
+        written = 0
+        for chunk in admin_export_chunks(compress=options["gzip"], use_copy=use_copy):
+            written += len(chunk)
+        elapsed = time.perf_counter() - started
+
+        megabytes = written / 1_000_000
+        self.stdout.write(
+            f"{name:>5} | {elapsed:>8.2f} {options['rows'] / elapsed:>10.0f} "
+            f"{megabytes:>8.1f} {megabytes / elapsed:>7.1f}"
+        )
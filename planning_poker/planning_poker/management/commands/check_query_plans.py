@@ -0,0 +1,176 @@
+import random
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from planning_poker.fields import STATUS_CHOICES
+from planning_poker.models import AnonymousSession, Participant, Room, SessionLog
+
+
+# SQLite only uses a partial index when it can prove the query implies the
+# index condition, which it cannot do for IN lists of bound parameters
+SQLITE_UNSUPPORTED = {
+    "inactive rooms sweep": "partial index on status IN (...) needs PostgreSQL",
+}
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seeds a dataset, runs EXPLAIN on the hot query paths and fails unless "
+        "each one is served by its index. Runs inside a transaction that is "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--rooms",
+            type=int,
+            default=5000,
+            help="Rooms to seed; other tables scale with it (default: 5000)",
+        )
+        parser.add_argument(
+            "--verbose-plans",
+            action="store_true",
+            help="Print the full plan of every query",
+        )
+
+    def handle(self, *args, **options):
+        failures = []
+        try:
+            with transaction.atomic():
+                self.seed(options["rooms"])
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+                for name, queryset, indexes in self.hot_queries():
+                    if connection.vendor == "sqlite" and name in SQLITE_UNSUPPORTED:
+                        self.stdout.write(f"SKIP {name}: {SQLITE_UNSUPPORTED[name]}")
+                        continue
+                    plan = queryset.explain()
+                    used = next((index for index in indexes if index in plan), None)
+                    if used:
+                        self.stdout.write(f"OK   {name}: {used}")
+                    else:
+                        failures.append(name)
+                        self.stdout.write(f"FAIL {name}: none of {', '.join(indexes)}")
+                    if options["verbose_plans"] or not used:
+                        self.stdout.write(plan)
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f"Queries not using their index: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("All hot queries use their indexes"))
+
+    def seed(self, room_count):
+        now = timezone.now()
+        hosts = User.objects.bulk_create(
+            User(username=f"plan-check-host-{i}") for i in range(max(room_count // 10, 1))
+        )
+        guests = User.objects.bulk_create(
+            User(username=f"plan-check-guest-{i}", is_active=False)
+            for i in range(room_count * 2)
+        )
+
+        # Mostly closed rooms with a few open ones and running timers, like
+        # a long-lived deployment
+        rooms = Room.objects.bulk_create(
+            Room(
+                host=hosts[i % len(hosts)],
+                code=f"Q{i:07d}",
+                project_name="Plan check",
+                status=(
+                    STATUS_CHOICES.ACTIVE if i % 50 == 0 else STATUS_CHOICES.COMPLETED
+                ),
+                is_timer_active=i % 200 == 0,
+                enable_timer=i % 200 == 0,
+                timer_end_time=now + timedelta(minutes=5) if i % 200 == 0 else None,
+            )
+            for i in range(room_count)
+        )
+        Participant.objects.bulk_create(
+            Participant(room=room, user=guest)
+            for room in rooms
+            for guest in random.sample(guests, 4)
+        )
+        SessionLog.objects.bulk_create(
+            (
+                SessionLog(
+                    room=room, story_point_average=3, participant_selections={"a": "3"}
+                )
+                for room in rooms
+                for _ in range(10)
+            ),
+            batch_size=2000,
+        )
+
+        # A handful of sessions are past the retention window
+        sessions = AnonymousSession.objects.bulk_create(
+            AnonymousSession(session_id=f"plan-check-{guest.id}", user=guest)
+            for guest in guests
+        )
+        AnonymousSession.objects.filter(
+            id__in=[session.id for session in sessions[::100]]
+        ).update(last_seen=now - timedelta(days=30))
+
+        self.sample_room = rooms[len(rooms) // 2]
+        self.sample_host = hosts[0]
+        self.sample_guest = Participant.objects.filter(room=self.sample_room).first().user
+
+    def hot_queries(self):
+        """(name, queryset, acceptable index names) for each hot path"""
+        now = timezone.now()
+        # SQLite names the index backing an inline UNIQUE constraint itself
+        participant_indexes = ["unique_participant_room_user", "sqlite_autoindex"]
+        # On a partitioned table each partition has its own copy of the index
+        session_log_indexes = ["sessionlog_room_recent_idx", "_room_id_timestamp_idx"]
+        return [
+            (
+                "room session history",
+                SessionLog.objects.filter(room=self.sample_room).order_by("-timestamp")[
+                    :50
+                ],
+                session_log_indexes,
+            ),
+            (
+                "participant lookup",
+                Participant.objects.filter(
+                    room=self.sample_room, user=self.sample_guest
+                ),
+                participant_indexes,
+            ),
+            (
+                "inactive rooms sweep",
+                Room.objects.filter(
+                    last_activity__lt=now - timedelta(minutes=30),
+                    auto_closed=False,
+                    status__in=[STATUS_CHOICES.ACTIVE, STATUS_CHOICES.PENDING],
+                ),
+                ["room_open_activity_idx"],
+            ),
+            (
+                "expired timers sweep",
+                Room.objects.filter(
+                    is_timer_active=True, timer_end_time__lt=now, enable_timer=True
+                ),
+                ["room_running_timer_idx"],
+            ),
+            (
+                "host room list",
+                Room.objects.filter(host=self.sample_host).order_by("-created_at"),
+                ["room_host_created_idx"],
+            ),
+            (
+                "anonymous session purge",
+                AnonymousSession.objects.filter(
+                    last_seen__lt=now - timedelta(days=7)
+                ),
+                ["anon_session_last_seen_idx"],
+            ),
+        ]
@@ -0,0 +1,53 @@
+import sys
+import time
+from django.core.management.base import BaseCommand
+from planning_poker.copy_export import admin_export_chunks, copy_supported
+
+
+class Command(BaseCommand):
+    help = (
+        "Exports every session log across all rooms as CSV. Uses PostgreSQL "
+        "COPY when available and the ORM streaming export otherwise."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output",
+            default="-",
+            help="File to write to, or - for standard output (default: -)",
+        )
+        parser.add_argument(
+            "--gzip", action="store_true", help="Gzip-compress the output"
+        )
+        parser.add_argument(
+            "--orm",
+            action="store_true",
+            help="Use the ORM export even when COPY is available",
+        )
+
+    def handle(self, *args, **options):
+        use_copy = copy_supported() and not options["orm"]
+        chunks = admin_export_chunks(compress=options["gzip"], use_copy=use_copy)
+
+        started = time.perf_counter()
+        written = 0
+        if options["output"] == "-":
+            target = sys.stdout.buffer
+            for chunk in chunks:
+                target.write(chunk)
+                written += len(chunk)
+            target.flush()
+        else:
+            with open(options["output"], "wb") as target:
+                for chunk in chunks:
+                    target.write(chunk)
+                    written += len(chunk)
+        elapsed = time.perf_counter() - started
+
+        # Keep stdout clean for the export itself
+        self.stderr.write(
+            self.style.SUCCESS(
+                f"Exported {written} bytes in {elapsed:.2f}s "
+                f"({'COPY' if use_copy else 'ORM'})"
+            )
+        )
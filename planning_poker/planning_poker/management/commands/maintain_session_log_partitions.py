@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from planning_poker.partitions import ARCHIVE_MODES, maintain_partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Creates the monthly session log partitions for the coming months and "
+        "archives partitions older than the retention window. On databases "
+        "without partitioning (SQLite) old session logs are archived to files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=settings.SESSION_LOG_PARTITIONS_AHEAD,
+            help="Months to create after the current one "
+            f"(default: {settings.SESSION_LOG_PARTITIONS_AHEAD})",
+        )
+        parser.add_argument(
+            "--archive-after-months",
+            type=int,
+            default=settings.SESSION_LOG_ARCHIVE_AFTER_MONTHS,
+            help="Archive partitions that ended this many months ago, 0 to keep "
+            f"everything (default: {settings.SESSION_LOG_ARCHIVE_AFTER_MONTHS})",
+        )
+        parser.add_argument(
+            "--archive-to",
+            choices=ARCHIVE_MODES,
+            default=settings.SESSION_LOG_ARCHIVE_MODE,
+            help="Gzipped CSV files or the archive table "
+            f"(default: {settings.SESSION_LOG_ARCHIVE_MODE})",
+        )
+        parser.add_argument(
+            "--root",
+            default=settings.SESSION_LOG_ARCHIVE_ROOT,
+            help="Archive directory, required to archive to files "
+            "(default: SESSION_LOG_ARCHIVE_ROOT)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be created and archived",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            report = maintain_partitions(
+                ahead=options["ahead"],
+                archive_after=options["archive_after_months"],
+                mode=options["archive_to"],
+                root=options["root"],
+                dry_run=options["dry_run"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if not report["partitioned"]:
+            self.stdout.write("Session log table is not partitioned on this database")
+        prefix = "Would create" if options["dry_run"] else "Created"
+        for name in report["created"]:
+            self.stdout.write(f"{prefix} {name}")
+        prefix = "Would archive" if options["dry_run"] else "Archived"
+        for name in report["archived"]:
+            self.stdout.write(f"{prefix} {name}")
+        if report["archived"] and not options["dry_run"]:
+            # Snapshots only ever append, so they still hold the archived logs
+            self.stdout.write(
+                "Analytics snapshots still include the archived logs: rebuild "
+                "them with snapshot_session_logs --rebuild"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(report['created'])} partitions created, "
+                f"{len(report['archived'])} archived"
+            )
+        )
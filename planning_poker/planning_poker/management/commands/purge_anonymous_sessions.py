@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from planning_poker.models import AnonymousSession
+
+
+class Command(BaseCommand):
+    help = "Deletes guest users and anonymous sessions past the retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=settings.ANONYMOUS_SESSION_RETENTION_DAYS,
+            help="Purge sessions not seen for this many days "
+            f"(default: {settings.ANONYMOUS_SESSION_RETENTION_DAYS})",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ANONYMOUS_SESSION_PURGE_BATCH_SIZE,
+            help="Sessions deleted per chunk "
+            f"(default: {settings.ANONYMOUS_SESSION_PURGE_BATCH_SIZE})",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=settings.ANONYMOUS_SESSION_PURGE_TIME_BUDGET,
+            help="Seconds to spend before stopping; the rest is left for the "
+            f"next run (default: {settings.ANONYMOUS_SESSION_PURGE_TIME_BUDGET})",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many sessions would be purged",
+        )
+
+    def handle(self, *args, **options):
+        days = options["days"]
+
+        if options["dry_run"]:
+            count = AnonymousSession.cleanup_old_sessions(
+                days=days,
+                batch_size=options["batch_size"],
+                time_budget=options["time_budget"],
+                dry_run=True,
+                progress=lambda total: self.stdout.write(
+                    f"Would purge {total} sessions..."
+                ),
+            )
+            self.stdout.write(
+                f"{count} anonymous sessions older than {days} days would be purged"
+            )
+            return
+
+        purged = AnonymousSession.cleanup_old_sessions(
+            days=days,
+            batch_size=options["batch_size"],
+            time_budget=options["time_budget"],
+            progress=lambda total: self.stdout.write(f"Purged {total} sessions..."),
+        )
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Purged {purged} anonymous sessions older than {days} days"
+            )
+        )
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from planning_poker.models import HostDailyStats, ProjectStats, RoomStats, SessionLog
+from planning_poker.session_log_service import add_to_stats, stats_keys
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the per-room, per-host-day and per-project session rollups "
+        "from all session logs"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Session logs read per database round trip (default: 2000)",
+        )
+
+    def handle(self, *args, **options):
+        rollups = {RoomStats: {}, HostDailyStats: {}, ProjectStats: {}}
+
+        logs = SessionLog.objects.select_related("room").order_by("id")
+        count = 0
+        for log in logs.iterator(chunk_size=options["chunk_size"]):
+            for model, lookup in stats_keys(log, log.room):
+                key = tuple(sorted(lookup.items()))
+                stats = rollups[model].get(key)
+                if stats is None:
+                    stats = rollups[model][key] = model(**lookup)
+                add_to_stats(stats, log)
+            count += 1
+
+        with transaction.atomic():
+            for model, rows in rollups.items():
+                model.objects.all().delete()
+                model.objects.bulk_create(rows.values(), batch_size=1000)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt rollups from {count} session logs: "
+                f"{len(rollups[RoomStats])} rooms, "
+                f"{len(rollups[HostDailyStats])} host days, "
+                f"{len(rollups[ProjectStats])} projects"
+            )
+        )
@@ -0,0 +1,44 @@
+import json
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from planning_poker.snapshots import snapshot_analytics
+
+
+def _timestamp(value):
+    try:
+        return int(
+            datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+        )
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}', expected YYYY-MM-DD")
+
+
+class Command(BaseCommand):
+    help = (
+        "Prints session analytics as JSON, computed from the memory-mapped "
+        "snapshot (see snapshot_session_logs) without querying the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--root",
+            default=settings.SNAPSHOT_ROOT,
+            help=f"Snapshot directory (default: {settings.SNAPSHOT_ROOT})",
+        )
+        parser.add_argument("--host-id", type=int, help="Only rooms of this host")
+        parser.add_argument(
+            "--from", dest="start", help="First day included (YYYY-MM-DD, UTC)"
+        )
+        parser.add_argument(
+            "--to", dest="end", help="First day excluded (YYYY-MM-DD, UTC)"
+        )
+
+    def handle(self, *args, **options):
+        result = snapshot_analytics(
+            root=options["root"],
+            host_id=options["host_id"],
+            start=_timestamp(options["start"]) if options["start"] else None,
+            end=_timestamp(options["end"]) if options["end"] else None,
+        )
+        self.stdout.write(json.dumps(result, indent=2))
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from planning_poker.snapshots import update_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Appends session logs newer than the last snapshot to the columnar "
+        "snapshot files used for offline analytics. Logs archived or deleted "
+        "since they were snapshotted stay in it: run with --rebuild after "
+        "archiving session log partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--root",
+            default=settings.SNAPSHOT_ROOT,
+            help=f"Snapshot directory (default: {settings.SNAPSHOT_ROOT})",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.EXPORT_CHUNK_SIZE,
+            help="Session logs read per database round trip "
+            f"(default: {settings.EXPORT_CHUNK_SIZE})",
+        )
+        parser.add_argument(
+            "--lag-minutes",
+            type=int,
+            default=settings.SNAPSHOT_LAG_MINUTES,
+            help="Only snapshot logs at least this old "
+            f"(default: {settings.SNAPSHOT_LAG_MINUTES})",
+        )
+        parser.add_argument(
+            "--rebuild",
+            action="store_true",
+            help="Discard the existing snapshot and write it from scratch",
+        )
+
+    def handle(self, *args, **options):
+        meta = update_snapshot(
+            root=options["root"],
+            chunk_size=options["chunk_size"],
+            rebuild=options["rebuild"],
+            lag_minutes=options["lag_minutes"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Snapshot holds {meta['rows']} session logs and {meta['votes']} "
+                f"votes logged before {meta['until']}"
+            )
+        )
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import User
 from django.contrib.auth import login
+from planning_poker.db_router import pin_to_primary
 
 
 class AutoAuthMiddleware:
@@ -25,3 +26,26 @@ class AutoAuthMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+class PrimaryPinMiddleware:
+    """
+    Pin users to the primary database for a few seconds after any request
+    that may have written, so their replica reads see their own writes.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        # DRF copies the token-authenticated user onto the Django request
+        user = getattr(request, "user", None)
+        if request.method not in self.SAFE_METHODS and getattr(
+            user, "is_authenticated", False
+        ):
+            pin_to_primary(user.id)
+        return response
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0011_vote'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomStats',
+            fields=[
+                ('story_count', models.IntegerField(default=0)),
+                ('points_total', models.FloatField(default=0)),
+                ('points_histogram', models.JSONField(default=dict)),
+                ('consensus_count', models.IntegerField(default=0)),
+                ('participant_total', models.IntegerField(default=0)),
+                ('max_participants', models.IntegerField(default=0)),
+                ('last_session_at', models.DateTimeField(blank=True, null=True)),
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='planning_poker.room')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HostDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('story_count', models.IntegerField(default=0)),
+                ('points_total', models.FloatField(default=0)),
+                ('points_histogram', models.JSONField(default=dict)),
+                ('consensus_count', models.IntegerField(default=0)),
+                ('participant_total', models.IntegerField(default=0)),
+                ('max_participants', models.IntegerField(default=0)),
+                ('last_session_at', models.DateTimeField(blank=True, null=True)),
+                ('date', models.DateField()),
+                ('host', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('host', 'date'), name='unique_host_daily_stats')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('story_count', models.IntegerField(default=0)),
+                ('points_total', models.FloatField(default=0)),
+                ('points_histogram', models.JSONField(default=dict)),
+                ('consensus_count', models.IntegerField(default=0)),
+                ('participant_total', models.IntegerField(default=0)),
+                ('max_participants', models.IntegerField(default=0)),
+                ('last_session_at', models.DateTimeField(blank=True, null=True)),
+                ('project_name', models.CharField(max_length=100)),
+                ('host', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='project_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('host', 'project_name'), name='unique_project_stats')],
+            },
+        ),
+    ]
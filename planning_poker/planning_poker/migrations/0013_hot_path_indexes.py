@@ -0,0 +1,75 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def remove_duplicate_participants(apps, schema_editor):
+    """
+    Keep one Participant per (room, user) before the unique constraint is
+    added: the latest row that has a card selection, else the latest row.
+    """
+    Participant = apps.get_model("planning_poker", "Participant")
+    duplicates = (
+        Participant.objects.values("room_id", "user_id")
+        .annotate(rows=models.Count("id"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates.iterator():
+        rows = Participant.objects.filter(
+            room_id=group["room_id"], user_id=group["user_id"]
+        )
+        keep = (
+            rows.exclude(card_selection__isnull=True).order_by("-id").first()
+            or rows.order_by("-id").first()
+        )
+        rows.exclude(id=keep.id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0012_session_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_participants, migrations.RunPython.noop
+        ),
+        migrations.AlterField(
+            model_name='participant',
+            name='room',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='planning_poker.room'),
+        ),
+        migrations.AlterField(
+            model_name='sessionlog',
+            name='room',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='planning_poker.room'),
+        ),
+        migrations.AddIndex(
+            model_name='anonymoussession',
+            index=models.Index(fields=['last_seen'], name='anon_session_last_seen_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('status__in', ['ACTIVE', 'PENDING'])), fields=['status', 'last_activity'], name='room_open_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(condition=models.Q(('is_timer_active', True)), fields=['timer_end_time'], name='room_running_timer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['host', 'created_at'], name='room_host_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sessionlog',
+            index=models.Index(fields=['room', '-timestamp'], name='sessionlog_room_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='participant',
+            constraint=models.UniqueConstraint(fields=('room', 'user'), name='unique_participant_room_user'),
+        ),
+    ]
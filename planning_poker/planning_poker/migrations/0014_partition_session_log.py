@@ -0,0 +1,164 @@
+# Generated by Django 5.2.3 on 2026-10-19 09:11
+
+import django.db.models.deletion
+from datetime import date, datetime, timezone
+from django.db import migrations, models
+
+TABLE = "planning_poker_sessionlog"
+SEQUENCE = f"{TABLE}_partitioned_id_seq"
+INDEX = "sessionlog_room_recent_idx"
+# Partitions created ahead of the current month
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, story_point_average, participant_selections, "timestamp", room_id'
+
+
+def next_month(month):
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_session_log(apps, schema_editor):
+    """
+    Rebuild the session log table as a monthly RANGE partitioned table on
+    PostgreSQL. The primary key becomes (id, timestamp) as partitioning
+    requires; ids keep coming from a sequence. Other databases keep the
+    plain table.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_legacy")
+        cursor.execute(
+            f"ALTER TABLE {TABLE}_legacy RENAME CONSTRAINT {TABLE}_pkey "
+            f"TO {TABLE}_legacy_pkey"
+        )
+        cursor.execute(f"ALTER INDEX {INDEX} RENAME TO {INDEX}_legacy")
+
+        cursor.execute(f"CREATE SEQUENCE {SEQUENCE} AS integer")
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id integer NOT NULL DEFAULT nextval('{SEQUENCE}'),
+                story_point_average double precision NOT NULL,
+                participant_selections jsonb NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                room_id integer NOT NULL,
+                PRIMARY KEY (id, "timestamp")
+            ) PARTITION BY RANGE ("timestamp")
+            """
+        )
+        cursor.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+        cursor.execute(
+            f"""
+            ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_room_id_fk
+            FOREIGN KEY (room_id) REFERENCES planning_poker_room (id)
+            DEFERRABLE INITIALLY DEFERRED
+            """
+        )
+        cursor.execute(f'CREATE INDEX {INDEX} ON {TABLE} (room_id, "timestamp" DESC)')
+        # Catches rows outside every monthly partition
+        cursor.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f'SELECT min("timestamp") FROM {TABLE}_legacy')
+        oldest = cursor.fetchone()[0] or datetime.now(timezone.utc)
+        month = date(oldest.year, oldest.month, 1)
+        today = datetime.now(timezone.utc).date()
+        last = date(today.year, today.month, 1)
+        for _ in range(MONTHS_AHEAD):
+            last = next_month(last)
+        while month <= last:
+            upper = next_month(month)
+            cursor.execute(
+                f"""
+                CREATE TABLE {TABLE}_p{month:%Y%m} PARTITION OF {TABLE}
+                FOR VALUES FROM ('{month.isoformat()} 00:00:00+00')
+                TO ('{upper.isoformat()} 00:00:00+00')
+                """
+            )
+            month = upper
+
+        cursor.execute(
+            f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}_legacy"
+        )
+        cursor.execute(
+            f"SELECT setval('{SEQUENCE}', COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1, false)"
+        )
+        cursor.execute(f"DROP TABLE {TABLE}_legacy")
+
+
+def unpartition_session_log(apps, schema_editor):
+    """
+    Copy every partition, and the archive table if there is one, back into a
+    plain table. Partitions archived to files are not restored.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {TABLE}_partitioned")
+        cursor.execute(
+            f"ALTER TABLE {TABLE}_partitioned RENAME CONSTRAINT {TABLE}_pkey "
+            f"TO {TABLE}_partitioned_pkey"
+        )
+        cursor.execute(f"ALTER INDEX {INDEX} RENAME TO {INDEX}_partitioned")
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id integer GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                story_point_average double precision NOT NULL,
+                participant_selections jsonb NOT NULL,
+                "timestamp" timestamp with time zone NOT NULL,
+                room_id integer NOT NULL REFERENCES planning_poker_room (id)
+                    DEFERRABLE INITIALLY DEFERRED
+            )
+            """
+        )
+        cursor.execute(f'CREATE INDEX {INDEX} ON {TABLE} (room_id, "timestamp" DESC)')
+        cursor.execute(
+            f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}_partitioned"
+        )
+        cursor.execute(f"SELECT to_regclass('{TABLE}_archive')")
+        if cursor.fetchone()[0]:
+            # Archived rows are not tied to their room, which may be gone
+            cursor.execute(
+                f"""
+                INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE}_archive
+                WHERE room_id IN (SELECT id FROM planning_poker_room)
+                """
+            )
+            cursor.execute(f"DROP TABLE {TABLE}_archive")
+        # Votes go back under a foreign key, drop those whose log is gone
+        cursor.execute(
+            f"""
+            DELETE FROM planning_poker_vote v
+            WHERE NOT EXISTS (SELECT 1 FROM {TABLE} l WHERE l.id = v.session_log_id)
+            """
+        )
+        cursor.execute(
+            f"""
+            SELECT setval(
+                pg_get_serial_sequence('{TABLE}', 'id'),
+                COALESCE((SELECT max(id) FROM {TABLE}), 0) + 1,
+                false
+            )
+            """
+        )
+        # Dropping the parent drops its partitions
+        cursor.execute(f"DROP TABLE {TABLE}_partitioned")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0013_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vote',
+            name='session_log',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='votes', to='planning_poker.sessionlog'),
+        ),
+        migrations.RunPython(partition_session_log, unpartition_session_log),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-19 10:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0015_channel_layer_tables'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Round',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('revealed_at', models.DateTimeField(blank=True, null=True)),
+                ('room', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='rounds', to='planning_poker.room')),
+                ('session_log', models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='round', to='planning_poker.sessionlog')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('room', 'sequence'), name='unique_round_room_sequence')],
+            },
+        ),
+    ]
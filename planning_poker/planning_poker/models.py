@@ -1,6 +1,8 @@
 from django.contrib.auth.models import User
 from django.db import models
-from .fields import STATUS_CHOICES, POINT_SYSTEMS
+from django.utils import timezone
+import uuid
+from .fields import STATUS_CHOICES, POINT_SYSTEMS, EXPORT_JOB_STATUS
 from .helpers import generate_random_project_name
 
 
@@ -38,21 +40,95 @@ class AnonymousSession(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="anonymous_session")
     created_at = models.DateTimeField(auto_now_add=True)
     last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Retention purge: last_seen older than the cutoff
+            models.Index(fields=["last_seen"], name="anon_session_last_seen_idx"),
+        ]
     
     def __str__(self):
         return f"Anonymous Session {self.session_id[:8]}... - {self.user.username}"
     
     @classmethod
-    def cleanup_old_sessions(cls, days=7):
-        """Remove anonymous sessions older than specified days"""
+    def cleanup_old_sessions(
+        cls, days=None, batch_size=None, time_budget=None, dry_run=False, progress=None
+    ):
+        """
+        Remove anonymous sessions (and their guest users) not seen for ``days``.
+
+        Works in chunks of ``batch_size`` sessions claimed with
+        ``SELECT ... FOR UPDATE SKIP LOCKED``; each chunk deletes participants,
+        sessions and users with one set-based ``DELETE`` per table. Guests
+        still sitting in a live room are left alone. Stops once nothing is
+        left or ``time_budget`` seconds have elapsed; the next run picks up
+        the rest. ``progress`` is called with the running total after every
+        chunk. With ``dry_run`` nothing is deleted: the same chunks are only
+        counted, and the number of sessions that would be purged is returned.
+        """
+        import time
+        from django.conf import settings
+        from django.db import transaction
         from django.utils import timezone
         from datetime import timedelta
-        threshold = timezone.now() - timedelta(days=days)
-        old_sessions = cls.objects.filter(last_seen__lt=threshold)
-        for session in old_sessions:
-            user = session.user
-            session.delete()
-            user.delete()
+
+        if days is None:
+            days = settings.ANONYMOUS_SESSION_RETENTION_DAYS
+        if batch_size is None:
+            batch_size = settings.ANONYMOUS_SESSION_PURGE_BATCH_SIZE
+        if time_budget is None:
+            time_budget = settings.ANONYMOUS_SESSION_PURGE_TIME_BUDGET
+        deadline = time.monotonic() + time_budget
+
+        now = timezone.now()
+        threshold = now - timedelta(days=days)
+        live_users = (
+            Participant.objects.filter(
+                room__last_activity__gte=now - timedelta(minutes=30)
+            )
+            .exclude(room__status=STATUS_CHOICES.COMPLETED)
+            .values("user_id")
+        )
+        old_sessions = cls.objects.filter(last_seen__lt=threshold).exclude(
+            user_id__in=live_users
+        )
+
+        if dry_run:
+            counted = 0
+            last_id = 0
+            while time.monotonic() < deadline:
+                ids = list(
+                    old_sessions.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                counted += len(ids)
+                last_id = ids[-1]
+                if progress:
+                    progress(counted)
+            return counted
+
+        purged = 0
+        while time.monotonic() < deadline:
+            with transaction.atomic():
+                user_ids = list(
+                    old_sessions.select_for_update(skip_locked=True, of=("self",))
+                    .order_by("id")
+                    .values_list("user_id", flat=True)[:batch_size]
+                )
+                if not user_ids:
+                    break
+                Participant.objects.filter(user_id__in=user_ids).delete()
+                cls.objects.filter(user_id__in=user_ids).delete()
+                User.objects.filter(id__in=user_ids, is_active=False).delete()
+
+            purged += len(user_ids)
+            if progress:
+                progress(purged)
+
+        return purged
 
 
 class Room(models.Model):
@@ -91,6 +167,26 @@ class Room(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # check_inactive_rooms; only open rooms are indexed
+            models.Index(
+                fields=["status", "last_activity"],
+                condition=models.Q(
+                    status__in=[STATUS_CHOICES.ACTIVE, STATUS_CHOICES.PENDING]
+                ),
+                name="room_open_activity_idx",
+            ),
+            # check_expired_timers; only running timers are indexed
+            models.Index(
+                fields=["timer_end_time"],
+                condition=models.Q(is_timer_active=True),
+                name="room_running_timer_idx",
+            ),
+            # A host's rooms, newest first
+            models.Index(fields=["host", "created_at"], name="room_host_created_idx"),
+        ]
+
     def __str__(self):
         return f"Room {self.code} - {self.project_name} - {self.status}"
 
@@ -121,29 +217,319 @@ class Room(models.Model):
 
             self.project_name = generate_random_project_name()
 
-        self.full_clean()
+        # Code uniqueness is guaranteed by the code allocator and enforced by
+        # the unique constraint, so skip the extra lookup in validate_unique().
+        self.full_clean(validate_unique=False)
         super().save(*args, **kwargs)
 
 
+class RoomCodeSequence(models.Model):
+    """Counter the room code allocator reserves sequence numbers from"""
+
+    name = models.CharField(max_length=32, primary_key=True)
+    next_value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} @ {self.next_value}"
+
+
 class Participant(models.Model):
     id = models.AutoField(primary_key=True)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    # Covered by the (room, user) unique constraint
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, db_index=False)
     card_selection = models.CharField(max_length=50, null=True, blank=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "user"], name="unique_participant_room_user"
+            )
+        ]
+
     def __str__(self):
         return f"Participant {self.user.username} in Room {self.room.code}"
 
 
 class SessionLog(models.Model):
+    """
+    One revealed round. On PostgreSQL the table is range-partitioned by
+    month on ``timestamp`` (see migration 0014 and
+    ``maintain_session_log_partitions``); filter on ``timestamp`` where
+    possible so queries only touch the relevant partitions.
+    """
+
     id = models.AutoField(primary_key=True)
-    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    # Covered by the (room, -timestamp) index
+    room = models.ForeignKey(Room, on_delete=models.CASCADE, db_index=False)
     story_point_average = models.FloatField()
     participant_selections = models.JSONField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Room history, newest first
+            models.Index(fields=["room", "-timestamp"], name="sessionlog_room_recent_idx"),
+        ]
+
     def __str__(self):
         return f"SessionLog for Room {self.room.code} at {self.timestamp}"
 
 
+class Round(models.Model):
+    """
+    One round of voting in a room, from ``start_round`` (or the first vote
+    after a reveal) to its reveal. Revealing sets ``revealed_at`` with a
+    conditional update, so each round is revealed, and logged, once.
+    """
+
+    # Covered by the (room, sequence) unique constraint
+    room = models.ForeignKey(
+        Room, on_delete=models.CASCADE, related_name="rounds", db_index=False
+    )
+    sequence = models.PositiveIntegerField()
+    started_at = models.DateTimeField(default=timezone.now)
+    revealed_at = models.DateTimeField(null=True, blank=True)
+    session_log = models.OneToOneField(
+        SessionLog,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="round",
+        # The partitioned session log table's key is (id, timestamp), see Vote
+        db_constraint=False,
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["room", "sequence"], name="unique_round_room_sequence"
+            )
+        ]
+
+    def __str__(self):
+        return f"Round {self.sequence} in Room {self.room_id}"
+
+
+class Vote(models.Model):
+    """One participant's card in a revealed round (normalized participant_selections)"""
+
+    session_log = models.ForeignKey(
+        SessionLog,
+        on_delete=models.CASCADE,
+        related_name="votes",
+        # Covered by the (session_log, card_value) index
+        db_index=False,
+        # On PostgreSQL session logs live in a partitioned table whose key is
+        # (id, timestamp), which a foreign key on id alone cannot reference
+        db_constraint=False,
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="votes"
+    )
+    card_value = models.CharField(max_length=50)
+    numeric_value = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "card_value"], name="vote_user_card_idx"),
+            models.Index(
+                fields=["session_log", "card_value"], name="vote_session_card_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Vote {self.card_value} in SessionLog {self.session_log_id}"
+
+
+class ExportJob(models.Model):
+    """A background export of a host's session logs to a file on local storage"""
+
+    FORMAT_CHOICES = [("csv", "CSV"), ("ndjson", "NDJSON")]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="export_jobs")
+    export_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    compress = models.BooleanField(default=True)
+    status = models.CharField(
+        max_length=10,
+        choices=EXPORT_JOB_STATUS.choices,
+        default=EXPORT_JOB_STATUS.PENDING,
+    )
+    total_rows = models.IntegerField(null=True, blank=True)
+    rows_written = models.IntegerField(default=0)
+    file_path = models.CharField(max_length=255, blank=True)
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"ExportJob {self.id} for {self.user.username} - {self.status}"
+
+    @property
+    def filename(self):
+        name = f"all_session_logs_{self.user.username}.{self.export_format}"
+        return f"{name}.gz" if self.compress else name
+
+
+class SessionStats(models.Model):
+    """
+    Running totals over a set of session logs, updated as each log is
+    created. The median is derived from a histogram of story point averages.
+    """
+
+    story_count = models.IntegerField(default=0)
+    points_total = models.FloatField(default=0)
+    points_histogram = models.JSONField(default=dict)
+    consensus_count = models.IntegerField(default=0)
+    participant_total = models.IntegerField(default=0)
+    max_participants = models.IntegerField(default=0)
+    last_session_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    def add(self, story_point_average, participant_count, consensus, timestamp):
+        """Fold one session log into the totals (the caller saves)"""
+        key = str(round(float(story_point_average), 2))
+        self.story_count += 1
+        self.points_total += story_point_average
+        self.points_histogram[key] = self.points_histogram.get(key, 0) + 1
+        self.consensus_count += 1 if consensus else 0
+        self.participant_total += participant_count
+        self.max_participants = max(self.max_participants, participant_count)
+        if self.last_session_at is None or timestamp > self.last_session_at:
+            self.last_session_at = timestamp
+
+    def merge(self, other):
+        """Add another rollup's totals into this one (the caller saves)"""
+        self.story_count += other.story_count
+        self.points_total += other.points_total
+        for key, count in other.points_histogram.items():
+            self.points_histogram[key] = self.points_histogram.get(key, 0) + count
+        self.consensus_count += other.consensus_count
+        self.participant_total += other.participant_total
+        self.max_participants = max(self.max_participants, other.max_participants)
+        if other.last_session_at and (
+            self.last_session_at is None or other.last_session_at > self.last_session_at
+        ):
+            self.last_session_at = other.last_session_at
+
+    @property
+    def average_points(self):
+        return round(self.points_total / self.story_count, 2) if self.story_count else 0
+
+    @property
+    def median_points(self):
+        return histogram_median(self.points_histogram)
+
+    @property
+    def consensus_rate(self):
+        return round(self.consensus_count / self.story_count, 3) if self.story_count else 0
+
+    @property
+    def average_participants(self):
+        if not self.story_count:
+            return 0
+        return round(self.participant_total / self.story_count, 2)
+
+
+def histogram_median(histogram):
+    """Median of a ``{value: count}`` histogram with string keys"""
+    values = sorted((float(value), count) for value, count in histogram.items())
+    total = sum(count for _, count in values)
+    if not total:
+        return 0
+
+    def nth(index):
+        seen = 0
+        for value, count in values:
+            seen += count
+            if index < seen:
+                return value
+
+    if total % 2:
+        return nth(total // 2)
+    return (nth(total // 2 - 1) + nth(total // 2)) / 2
+
+
+class RoomStats(SessionStats):
+    room = models.OneToOneField(
+        Room, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+
+    def __str__(self):
+        return f"Stats for Room {self.room_id}"
+
+
+class HostDailyStats(SessionStats):
+    host = models.ForeignKey(User, on_delete=models.CASCADE, related_name="daily_stats")
+    date = models.DateField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["host", "date"], name="unique_host_daily_stats"
+            )
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.host_id} on {self.date}"
+
+
+class ProjectStats(SessionStats):
+    host = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="project_stats"
+    )
+    project_name = models.CharField(max_length=100)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["host", "project_name"], name="unique_project_stats"
+            )
+        ]
+
+    def __str__(self):
+        return f"Stats for {self.project_name} ({self.host_id})"
+
+
+
+class ChannelGroupMember(models.Model):
+    """
+    Channel layer group membership for the PostgreSQL channel layer
+    (``planning_poker.channel_layers.PostgresChannelLayer``). ``group_name``
+    carries the layer prefix.
+    """
+
+    group_name = models.CharField(max_length=255)
+    channel_name = models.CharField(max_length=255)
+    created_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["group_name", "channel_name"], name="unique_channel_group_member"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.channel_name} in {self.group_name}"
+
+
+class ChannelMessage(models.Model):
+    """
+    Channel layer message batch too large for a NOTIFY payload: the
+    notification carries its id and the receiving process deletes it.
+    """
+
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"ChannelMessage {self.id} ({len(self.payload)} bytes)"
+
 # SessionLog already stores story_point_average, participant_selections, timestamp, and room.
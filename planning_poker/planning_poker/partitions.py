@@ -0,0 +1,268 @@
+import csv
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, timezone as dt_timezone
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from planning_poker.models import Round, SessionLog, Vote
+
+logger = logging.getLogger(__name__)
+
+TABLE = SessionLog._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+ARCHIVE_TABLE = f"{TABLE}_archive"
+VOTE_TABLE = Vote._meta.db_table
+VOTE_ARCHIVE_TABLE = f"{VOTE_TABLE}_archive"
+COLUMNS = 'id, story_point_average, participant_selections, "timestamp", room_id'
+ARCHIVE_MODES = ("file", "table")
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def _bound(month):
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def _aware(month):
+    return datetime(month.year, month.month, 1, tzinfo=dt_timezone.utc)
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions():
+    """Months that currently have a partition attached, oldest first"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    prefix = f"{TABLE}_p"
+    months = []
+    for name in names:
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and len(suffix) == 6 and suffix.isdigit():
+            months.append(date(int(suffix[:4]), int(suffix[4:]), 1))
+    return sorted(months)
+
+
+def default_partition_months():
+    """Months with rows in the default partition, i.e. without a partition"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', \"timestamp\" AT TIME ZONE 'UTC') "
+            f"FROM {DEFAULT_PARTITION}"
+        )
+        return sorted(month_start(row[0]) for row in cursor.fetchall())
+
+
+def create_partition(month):
+    """
+    Create and attach the partition for ``month``. Rows that already landed
+    in the default partition for that month are moved into it first, since
+    attaching would otherwise fail.
+    """
+    name = partition_name(month)
+    lower, upper = _bound(month), _bound(add_months(month, 1))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION}
+                WHERE "timestamp" >= %s AND "timestamp" < %s
+                RETURNING {COLUMNS}
+            )
+            INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved
+            """,
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM (%s) TO (%s)",
+            [lower, upper],
+        )
+
+
+def _write_archive(path, cursor, query):
+    """Write ``COPY (query) TO STDOUT`` as gzipped CSV, via a .part file"""
+    sql = f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    partial_path = f"{path}.part"
+    with gzip.open(partial_path, "wb") as f:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, f)
+        else:
+            with cursor.copy(sql) as copy:
+                for block in copy:
+                    f.write(block)
+    os.replace(partial_path, path)
+
+
+def archive_partition(month, mode, root):
+    """
+    Move the partition for ``month`` out of the live table: into gzipped CSV
+    files under ``root``, or into the archive tables. Session logs and their
+    votes go together, rounds keep their reveal but lose the link to the
+    archived log, and the partition is detached and dropped.
+    """
+    name = partition_name(month)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+        votes_query = (
+            f"SELECT v.* FROM {VOTE_TABLE} v JOIN {name} l ON l.id = v.session_log_id"
+        )
+        if mode == "table":
+            # No defaults: the id defaults would tie the archive tables to the
+            # live tables' sequences
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (LIKE {TABLE})")
+            cursor.execute(
+                f"INSERT INTO {ARCHIVE_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {name}"
+            )
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {VOTE_ARCHIVE_TABLE} (LIKE {VOTE_TABLE})"
+            )
+            cursor.execute(f"INSERT INTO {VOTE_ARCHIVE_TABLE} {votes_query}")
+        else:
+            os.makedirs(root, exist_ok=True)
+            _write_archive(
+                os.path.join(root, f"{name}.csv.gz"),
+                cursor.cursor,
+                f"SELECT {COLUMNS} FROM {name} ORDER BY id",
+            )
+            _write_archive(
+                os.path.join(root, f"{name}_votes.csv.gz"),
+                cursor.cursor,
+                f"{votes_query} ORDER BY v.id",
+            )
+        cursor.execute(
+            f"DELETE FROM {VOTE_TABLE} v USING {name} l WHERE l.id = v.session_log_id"
+        )
+        # Neither reference has a database constraint to do this for us
+        cursor.execute(
+            f"UPDATE {Round._meta.db_table} r SET session_log_id = NULL "
+            f"FROM {name} l WHERE l.id = r.session_log_id"
+        )
+        cursor.execute(f"DROP TABLE {name}")
+
+
+def archive_logs_before(cutoff, root, chunk_size=None):
+    """
+    Database-agnostic archival (SQLite dev fallback): write session logs
+    older than ``cutoff`` to one gzipped CSV per month and delete them.
+    Votes are not written: they are rebuilt from ``participant_selections``.
+    Returns the archived months, named like their partitions.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    logs = SessionLog.objects.filter(timestamp__lt=cutoff).order_by("timestamp", "id")
+    months = logs.dates("timestamp", "month")
+    archived = []
+    os.makedirs(root, exist_ok=True)
+    for month in months:
+        month_logs = logs.filter(
+            timestamp__gte=_aware(month), timestamp__lt=_aware(add_months(month, 1))
+        )
+        path = os.path.join(root, f"{partition_name(month)}.csv.gz")
+        with transaction.atomic():
+            ids = []
+            with gzip.open(f"{path}.part", "wt", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(
+                    ["id", "story_point_average", "participant_selections", "timestamp", "room_id"]
+                )
+                for log in month_logs.iterator(chunk_size=chunk_size):
+                    writer.writerow(
+                        [
+                            log.id,
+                            log.story_point_average,
+                            json.dumps(log.participant_selections),
+                            log.timestamp.isoformat(),
+                            log.room_id,
+                        ]
+                    )
+                    ids.append(log.id)
+            os.replace(f"{path}.part", path)
+            for start in range(0, len(ids), chunk_size):
+                SessionLog.objects.filter(id__in=ids[start:start + chunk_size]).delete()
+        archived.append(partition_name(month))
+        logger.info(f"Archived {len(ids)} session logs to {path}")
+    return archived
+
+
+def maintain_partitions(ahead=None, archive_after=None, mode=None, root=None, dry_run=False):
+    """
+    Create partitions for the current month and ``ahead`` months after it,
+    and archive partitions that ended more than ``archive_after`` months ago
+    (0 disables archival). Returns a report dict.
+    """
+    ahead = settings.SESSION_LOG_PARTITIONS_AHEAD if ahead is None else ahead
+    archive_after = (
+        settings.SESSION_LOG_ARCHIVE_AFTER_MONTHS if archive_after is None else archive_after
+    )
+    mode = mode or settings.SESSION_LOG_ARCHIVE_MODE
+    root = root or settings.SESSION_LOG_ARCHIVE_ROOT
+    if mode not in ARCHIVE_MODES:
+        raise ValueError(f"Unknown archive mode '{mode}'")
+
+    current = month_start(timezone.now())
+    cutoff = add_months(current, -archive_after) if archive_after else None
+    if cutoff and mode == "file" and not root:
+        raise ValueError("Archiving to files needs an archive directory (SESSION_LOG_ARCHIVE_ROOT)")
+    report = {"partitioned": is_partitioned(), "created": [], "archived": []}
+
+    # SQLite dev databases have no partitions; old rows are archived by month
+    if not report["partitioned"]:
+        if cutoff and not dry_run:
+            if mode == "table":
+                raise ValueError("Archiving to a table needs the partitioned PostgreSQL table")
+            report["archived"] = archive_logs_before(_aware(cutoff), root)
+        return report
+
+    existing = set(monthly_partitions())
+    # Months that fell into the default partition get their own partition too
+    wanted = set(default_partition_months())
+    wanted.update(add_months(current, offset) for offset in range(ahead + 1))
+    for month in sorted(wanted - existing):
+        if not dry_run:
+            create_partition(month)
+        report["created"].append(partition_name(month))
+        existing.add(month)
+
+    if cutoff:
+        for month in sorted(existing):
+            if add_months(month, 1) <= cutoff:
+                if not dry_run:
+                    archive_partition(month, mode, root)
+                    logger.info(f"Archived session log partition {partition_name(month)}")
+                report["archived"].append(partition_name(month))
+
+    return report
@@ -0,0 +1,383 @@
+import asyncio
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from planning_poker.broadcaster import publish_room_mutation
+from planning_poker.db_executor import db_executor
+from planning_poker.fields import STATUS_CHOICES
+from planning_poker.models import Participant, Room
+from planning_poker.room_state import participant_rows, participant_state, room_state
+from planning_poker.round_service import (
+    latest_round,
+    reveal_room_votes,
+    reveal_round,
+    start_round,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def voting_stats(participants_data):
+    """Calculate voting statistics"""
+    numeric_votes = []
+
+    for participant in participants_data:
+        card_value = participant.get("card_selection")
+        if card_value and card_value != "SKIPPED":
+            try:
+                # Handle different card types (numbers, ?, coffee, etc.)
+                if card_value.replace(".", "").isdigit():
+                    numeric_votes.append(float(card_value))
+            except (ValueError, AttributeError):
+                continue
+
+    total_votes = len([p for p in participants_data if p.get("card_selection")])
+    if not numeric_votes:
+        return {
+            "average": 0,
+            "min": 0,
+            "max": 0,
+            "consensus": False,
+            "total_votes": total_votes,
+        }
+
+    return {
+        "average": round(sum(numeric_votes) / len(numeric_votes), 2),
+        "min": min(numeric_votes),
+        "max": max(numeric_votes),
+        "consensus": len(set(numeric_votes)) == 1,
+        "total_votes": total_votes,
+    }
+
+
+def session_selections(participants_data):
+    """``({username: card}, {username: user id})`` of the participants who voted"""
+    selections = {}
+    user_ids = {}
+    for participant in participants_data:
+        if participant.get("card_selection"):
+            selections[participant["username"]] = participant["card_selection"]
+            user_ids[participant["username"]] = participant.get("user_id")
+    return selections, user_ids
+
+
+@db_executor.sync_to_async
+def load_room(room_id):
+    """
+    The room, its participants and its latest round for a drain, or
+    (None, None, None) if it is gone
+    """
+    room = Room.objects.select_related("host").filter(id=room_id).first()
+    if room is None:
+        return None, None, None
+    participants = [participant_state(p) for p in participant_rows(room)]
+    return room, participants, latest_round(room)
+
+
+def apply_writes(room, writes):
+    for write, *args in writes:
+        if write == "votes":
+            (votes,) = args
+            Participant.objects.bulk_create(
+                [
+                    Participant(user_id=user_id, room=room, card_selection=card)
+                    for user_id, card in votes.items()
+                ],
+                update_conflicts=True,
+                unique_fields=["room", "user"],
+                update_fields=["card_selection"],
+            )
+        elif write == "reset":
+            Participant.objects.filter(room=room).update(card_selection=None)
+        elif write == "room":
+            (changes,) = args
+            Room.objects.filter(id=room.id).update(**changes)
+        elif write == "start_round":
+            start_round(room)
+        elif write == "reveal":
+            stats, participants_data = args
+            selections, user_ids = session_selections(participants_data)
+            reveal_round(room, stats["average"], selections, user_ids)
+        elif write == "reveal_stored":
+            # Votes of participants the drain did not load: log what is stored
+            reveal_room_votes(room)
+
+
+@db_executor.sync_to_async
+def write_drain(room, writes):
+    """
+    Apply a drain's writes in order, in one transaction. A lone upsert of
+    votes, reset or room update is a single statement and needs none.
+    """
+    if len(writes) == 1 and writes[0][0] in ("votes", "reset", "room"):
+        apply_writes(room, writes)
+        return
+    with transaction.atomic():
+        apply_writes(room, writes)
+
+
+class RoomActor:
+    """
+    Single writer for one room's game state in this process.
+
+    Consumers ``submit`` commands (vote, skip, reveal, reset, start round,
+    timer changes, or a plain refresh) instead of writing to the database
+    themselves; one task per active room applies them in arrival order.
+    Each drain of the queue loads the room, its participants and its latest
+    round once, applies every queued command to that in-memory state,
+    writes the result in one transaction (consecutive votes as a single
+    upsert) and broadcasts the room state once. Commands for a room
+    therefore never interleave: two last votes auto-reveal once, and a
+    reset cannot land between a vote's write and its auto-reveal check.
+
+    Reveals go through ``reveal_round``, which only logs a round that is
+    not revealed yet in the database: that covers actors for the same room
+    in other processes, and the REST API.
+
+    The task exits once the room has been idle for ROOM_ACTOR_IDLE_TIMEOUT
+    seconds.
+    """
+
+    def __init__(self, room_id, group, channel_layer, on_idle):
+        self.room_id = room_id
+        self.group = group
+        self.channel_layer = channel_layer
+        self.on_idle = on_idle
+        self.queue = asyncio.Queue()
+        self.task = None
+
+    def submit(self, command):
+        """Queue ``command``; the returned future resolves to the room after its drain"""
+        done = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((command, done))
+        return done
+
+    async def run(self):
+        while True:
+            try:
+                batch = [
+                    await asyncio.wait_for(
+                        self.queue.get(), settings.ROOM_ACTOR_IDLE_TIMEOUT
+                    )
+                ]
+            except asyncio.TimeoutError:
+                if self.queue.empty():
+                    self.on_idle(self)
+                    return
+                continue
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            room = None
+            try:
+                room = await self.drain([command for command, _ in batch])
+            except Exception as e:
+                logger.error(f"Error applying commands to room {self.room_id}: {e}")
+            finally:
+                for _, done in batch:
+                    if not done.done():
+                        done.set_result(room)
+
+    async def drain(self, commands):
+        self.room, self.participants, latest = await load_room(self.room_id)
+        if self.room is None:
+            return None
+        # Whether the latest round is still being voted on (None: no rounds)
+        self.round_open = None if latest is None else latest.revealed_at is None
+        self.by_user = {p["user_id"]: p for p in self.participants}
+        self.writes = []
+        self.votes = {}
+        self.room_changes = {}
+        self.reload = False
+
+        for command in commands:
+            apply = getattr(self, f"apply_{command['type']}", None)
+            if apply is None:
+                logger.warning(f"Unknown room command {command['type']}")
+                continue
+            try:
+                apply(command)
+            except Exception as e:
+                # Only this command is dropped, not the rest of the drain
+                logger.error(f"Error applying {command['type']} to room {self.room_id}: {e}")
+        self.flush_votes()
+        self.flush_room_changes()
+
+        if self.writes:
+            await write_drain(self.room, self.writes)
+        await self.broadcast()
+        return self.room
+
+    async def broadcast(self):
+        """Send the drained state to the room, once per drain"""
+        try:
+            if settings.ROOM_BROADCASTER:
+                await publish_room_mutation(self.channel_layer, self.room, self.group)
+                return
+            # Votes of users not loaded at the start of the drain joined them
+            # to the room: only then are the participants queried again
+            participants = None if self.reload else self.participants
+            await self.channel_layer.group_send(
+                self.group,
+                {"type": "room_state_update", **await room_state(self.room, participants)},
+            )
+            logger.info(f"Broadcasted room state to group {self.group}")
+        except Exception as e:
+            logger.error(f"Error broadcasting room state: {e}")
+
+    def flush_votes(self):
+        if self.votes:
+            self.writes.append(("votes", self.votes))
+            self.votes = {}
+
+    def flush_room_changes(self):
+        if self.room_changes:
+            self.writes.append(("room", self.room_changes))
+            self.room_changes = {}
+
+    def change_room(self, **changes):
+        for field, value in changes.items():
+            setattr(self.room, field, value)
+        self.room_changes.update(changes)
+
+    def open_round(self):
+        # Votes so far belong to the previous round
+        self.flush_votes()
+        self.writes.append(("start_round",))
+        self.round_open = True
+
+    def set_card(self, user_id, card_value):
+        participant = self.by_user.get(user_id)
+        if participant is None:
+            # Joined since the drain loaded the room: counted by the
+            # auto-reveal check, but only the stored rows have its details
+            participant = {"id": None, "user_id": user_id, "username": None}
+            self.participants.append(participant)
+            self.by_user[user_id] = participant
+            self.reload = True
+        participant["card_selection"] = card_value
+        participant["has_voted"] = bool(card_value)
+        self.votes[user_id] = card_value
+
+    def reveal_if_all_voted(self, command):
+        """Auto-reveal once everyone has voted (or been skipped)"""
+        if (
+            self.round_open
+            and self.room.auto_reveal_cards
+            and self.participants
+            and all(p["card_selection"] is not None for p in self.participants)
+        ):
+            logger.info(f"Auto-revealing cards for room {self.room.code}")
+            self.apply_reveal(command)
+
+    # Commands
+    def apply_refresh(self, command):
+        """Nothing to change: just broadcast the room state"""
+
+    def apply_vote(self, command):
+        if self.round_open is None:
+            # The room's first round starts with its first vote
+            self.open_round()
+        self.set_card(command["user_id"], command["card_value"])
+        self.reveal_if_all_voted(command)
+
+    def apply_skip(self, command):
+        for participant in self.participants:
+            if str(participant["id"]) == str(command["participant_id"]):
+                self.set_card(participant["user_id"], "SKIPPED")
+                # Skipping the last participant who had not voted completes the round
+                self.reveal_if_all_voted(command)
+                return
+
+    def apply_reveal(self, command):
+        if self.round_open is False:
+            logger.info(f"The latest round of room {self.room.code} is already revealed")
+            return
+        # Votes and room changes so far are written before the log
+        self.flush_votes()
+        self.flush_room_changes()
+        if self.reload:
+            self.writes.append(("reveal_stored",))
+        else:
+            self.writes.append(
+                (
+                    "reveal",
+                    voting_stats(self.participants),
+                    [dict(participant) for participant in self.participants],
+                )
+            )
+        self.room.status = STATUS_CHOICES.COMPLETED
+        self.round_open = False
+
+    def apply_reset(self, command):
+        # Votes earlier in the drain are cleared along with the stored ones
+        self.votes = {}
+        self.writes.append(("reset",))
+        for participant in self.participants:
+            participant["card_selection"] = None
+            participant["has_voted"] = False
+        self.change_room(status=STATUS_CHOICES.ACTIVE)
+        # Voting again after a reveal is a new round
+        if not self.round_open:
+            self.open_round()
+
+    def apply_start_round(self, command):
+        # A new round even when the latest one was never revealed (the reset
+        # opens one otherwise)
+        if self.round_open:
+            self.open_round()
+        self.apply_reset(command)
+
+    def apply_start_timer(self, command):
+        duration = command["duration"]
+        if duration > 0:
+            now = timezone.now()
+            self.change_room(
+                is_timer_active=True,
+                timer_start_time=now,
+                timer_end_time=now + timedelta(seconds=duration),
+                timer_duration=duration,
+            )
+
+    def apply_stop_timer(self, command):
+        self.change_room(
+            is_timer_active=False, timer_start_time=None, timer_end_time=None
+        )
+
+    def apply_pause_timer(self, command):
+        self.change_room(is_timer_active=False)
+
+
+class RoomActors:
+    """The running ``RoomActor`` of each active room in this process"""
+
+    def __init__(self):
+        self.actors = {}
+        self.loop = None
+
+    def submit(self, room, group, channel_layer, command):
+        """
+        Queue ``command`` for ``room``, starting its actor if needed. Await
+        the result for the room as loaded and updated by the command's drain
+        (None if the room is gone or the drain failed).
+        """
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # First command in this event loop (a new one under tests)
+            self.actors = {}
+            self.loop = loop
+        actor = self.actors.get(room.id)
+        if actor is None:
+            actor = RoomActor(room.id, group, channel_layer, self.remove)
+            actor.task = asyncio.ensure_future(actor.run())
+            self.actors[room.id] = actor
+        return actor.submit(command)
+
+    def remove(self, actor):
+        if self.actors.get(actor.room_id) is actor:
+            del self.actors[actor.room_id]
+
+
+room_actors = RoomActors()
@@ -0,0 +1,142 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Q
+from planning_poker.models import Room
+
+# Marker stored in the shared cache for identifiers that match no room
+# (room ids start at 1, so 0 never collides with a real id)
+NOT_FOUND = 0
+
+_MISSING = object()
+
+
+class RoomResolver:
+    """
+    Maps a room identifier (code, or numeric id as a fallback) to a room id.
+
+    Lookups go through a process-local LRU, then an optional shared Django
+    cache, then a single query matching either column. Identifiers that match
+    no room are cached too (for a shorter TTL), so bad codes and link-sharing
+    spikes stop at the cache instead of reaching the database.
+
+    Only the identifier -> id mapping is cached, never the room row itself:
+    codes never change, so a cached mapping can only go stale when a room is
+    created (stale negative entry) or deleted (stale positive entry). Room
+    saves and deletes call ``invalidate``; a stale positive entry is also
+    dropped as soon as the id no longer loads.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300, negative_ttl=10, cache_alias=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_alias = cache_alias
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            maxsize=settings.ROOM_RESOLVER_MAXSIZE,
+            ttl=settings.ROOM_RESOLVER_TTL,
+            negative_ttl=settings.ROOM_RESOLVER_NEGATIVE_TTL,
+            cache_alias=settings.ROOM_RESOLVER_CACHE,
+        )
+
+    @property
+    def shared_cache(self):
+        return caches[self.cache_alias] if self.cache_alias else None
+
+    def _cache_key(self, identifier):
+        return f"room-resolver:{identifier}"
+
+    def _get_local(self, identifier):
+        with self._lock:
+            entry = self._local.get(identifier)
+            if entry is None:
+                return _MISSING
+            room_id, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[identifier]
+                return _MISSING
+            self._local.move_to_end(identifier)
+            return room_id
+
+    def _set_local(self, identifier, room_id):
+        ttl = self.ttl if room_id != NOT_FOUND else self.negative_ttl
+        with self._lock:
+            self._local[identifier] = (room_id, time.monotonic() + ttl)
+            self._local.move_to_end(identifier)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+
+    def _query(self, identifier):
+        """Match code first and fall back to id, in a single query"""
+        condition = Q(code=identifier)
+        if identifier.isdigit():
+            condition |= Q(id=int(identifier))
+        matches = dict(Room.objects.filter(condition).values_list("code", "id"))
+        if identifier in matches:
+            return matches[identifier]
+        return next(iter(matches.values()), NOT_FOUND)
+
+    def resolve_id(self, identifier):
+        """Return the id of the room ``identifier`` refers to, or None"""
+        identifier = str(identifier).strip()
+        if not identifier:
+            return None
+
+        room_id = self._get_local(identifier)
+        if room_id is _MISSING:
+            shared = self.shared_cache
+            room_id = shared.get(self._cache_key(identifier)) if shared else None
+            if room_id is None:
+                room_id = self._query(identifier)
+                if shared:
+                    shared.set(
+                        self._cache_key(identifier),
+                        room_id,
+                        self.ttl if room_id != NOT_FOUND else self.negative_ttl,
+                    )
+            self._set_local(identifier, room_id)
+
+        return room_id if room_id != NOT_FOUND else None
+
+    def get_room(self, identifier, queryset=None):
+        """Return the room ``identifier`` refers to, or None"""
+        room_id = self.resolve_id(identifier)
+        if room_id is None:
+            return None
+        queryset = queryset if queryset is not None else Room.objects.all()
+        room = queryset.filter(id=room_id).first()
+        if room is None:
+            self.invalidate(identifier)
+        return room
+
+    def invalidate(self, *identifiers):
+        """Forget cached lookups for the given codes / ids"""
+        keys = [str(identifier) for identifier in identifiers if identifier]
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+        shared = self.shared_cache
+        if shared and keys:
+            shared.delete_many([self._cache_key(key) for key in keys])
+
+    def invalidate_room(self, room):
+        self.invalidate(room.code, room.id)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+
+room_resolver = RoomResolver.from_settings()
+
+
+def get_room_by_id_or_code(room_identifier, queryset=None):
+    """Resolve a room by code, falling back to id; None if there is no such room"""
+    return room_resolver.get_room(room_identifier, queryset)
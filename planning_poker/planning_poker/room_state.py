@@ -0,0 +1,120 @@
+import json
+import logging
+from planning_poker.db_executor import db_executor
+from planning_poker.fields import POINT_SYSTEM_CARDS, POINT_SYSTEMS
+from planning_poker.models import Participant, Room
+
+logger = logging.getLogger(__name__)
+
+
+def card_values(room):
+    """The card values for the room's point system"""
+    return POINT_SYSTEM_CARDS.get(
+        room.point_system, POINT_SYSTEM_CARDS[POINT_SYSTEMS.FIBONACCI]
+    )
+
+
+def participant_rows(room):
+    """Participants of ``room`` as the values a ``room_state`` frame needs"""
+    return (
+        Participant.objects.filter(room=room)
+        .select_related("user", "user__role")
+        .values(
+            "id",
+            "user_id",
+            "user__username",
+            "user__is_active",  # Add this to identify anonymous users
+            "card_selection",
+            "user__role__role",
+        )
+    )
+
+
+def participant_state(p):
+    """Turn a ``participant_rows`` row into a frame participant, in place"""
+    p["username"] = p.pop("user__username")
+    p["vote"] = None
+    p["user_role"] = p.pop("user__role__role") or "participant"
+    p["has_voted"] = bool(p["card_selection"])
+    p["is_anonymous"] = not p.pop(
+        "user__is_active", True
+    )  # Inactive users are anonymous
+    return p
+
+
+@db_executor.sync_to_async
+def participants_with_votes(room):
+    try:
+        return [participant_state(p) for p in participant_rows(room)]
+    except Exception as e:
+        logger.error(f"Error getting participants: {e}")
+        return []
+
+
+def timer_fields(room):
+    """The ``timer_state`` of a room row, None when the room has no timer"""
+    if not room or not getattr(room, "enable_timer", False):
+        return None
+    return {
+        "is_active": room.is_timer_active,
+        "start_time": (
+            room.timer_start_time.isoformat() if room.timer_start_time else None
+        ),
+        "end_time": room.timer_end_time.isoformat() if room.timer_end_time else None,
+        "duration": room.timer_duration,
+    }
+
+
+@db_executor.sync_to_async
+def timer_state(room):
+    try:
+        if not room or not hasattr(room, "enable_timer") or not room.enable_timer:
+            return None
+
+        # Refresh room data from database to get latest timer state
+        fresh_room = Room.objects.get(id=room.id)
+        return timer_fields(fresh_room)
+    except Exception as e:
+        logger.error(f"Error getting timer state: {e}")
+        return None
+
+
+async def room_state(room, participants=None):
+    """
+    The part of a ``room_state`` frame that is the same for every socket.
+    Pass ``participants`` (and a freshly loaded ``room``) to build it from
+    state already in memory instead of querying it.
+    """
+    if participants is None:
+        participants = await participants_with_votes(room)
+        timer = await timer_state(room)
+    else:
+        timer = timer_fields(room)
+    return {
+        "room": {
+            "id": room.id,
+            "code": room.code,
+            "project_name": room.project_name,
+            "point_system": room.point_system,
+            "status": room.status,
+            "host_username": room.host.username,
+            "enable_timer": room.enable_timer,
+            "timer_duration": room.timer_duration,
+        },
+        "participants": participants,
+        "card_values": card_values(room),
+        "timer_state": timer,
+    }
+
+
+def encode_frame(state):
+    """
+    JSON ``room_state`` frame for ``state``, without the per-socket fields:
+    see ``with_socket_fields``
+    """
+    return json.dumps({"type": "room_state", **state})
+
+
+def with_socket_fields(frame, socket_fields):
+    """Add the encoded ``socket_fields`` object's members to an encoded frame"""
+    return f"{frame[:-1]}, {socket_fields[1:]}"
@@ -0,0 +1,103 @@
+import logging
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from planning_poker.fields import STATUS_CHOICES
+from planning_poker.models import Participant, Room, Round, SessionLog
+from planning_poker.session_log_service import create_session_log
+
+logger = logging.getLogger(__name__)
+
+
+def lock_room(room):
+    """Serialize round changes of ``room`` until the end of the transaction"""
+    list(Room.objects.select_for_update().filter(id=room.id).values_list("id"))
+
+
+def start_round(room):
+    """Open ``room``'s next round"""
+    with transaction.atomic():
+        lock_room(room)
+        last = Round.objects.filter(room=room).aggregate(last=Max("sequence"))["last"]
+        return Round.objects.create(room=room, sequence=(last or 0) + 1)
+
+
+def latest_round(room):
+    return Round.objects.filter(room=room).order_by("-sequence").first()
+
+
+def ensure_round(room):
+    """``room``'s latest round, starting its first one if it has none"""
+    with transaction.atomic():
+        lock_room(room)
+        return latest_round(room) or start_round(room)
+
+
+def reveal_round(room, story_point_average, selections, user_ids=None, sequence=None):
+    """
+    Reveal ``room``'s latest round (or round ``sequence``) and log its
+    votes. Idempotent: revealed_at is only set on a round that has none, so
+    retries, double clicks and concurrent reveals log a round once and get
+    its existing log back (None once that log has been archived away); votes
+    changed after a reveal are not logged until the next round. A room without rounds (votes from before rounds existed)
+    gets one opened and revealed here.
+
+    Returns ``(session_log, created)``; raises Round.DoesNotExist for an
+    unknown ``sequence``.
+    """
+    with transaction.atomic():
+        lock_room(room)
+        if sequence is not None:
+            revealed = Round.objects.get(room=room, sequence=sequence)
+        else:
+            revealed = latest_round(room) or start_round(room)
+
+        now = timezone.now()
+        if not Round.objects.filter(id=revealed.id, revealed_at__isnull=True).update(
+            revealed_at=now
+        ):
+            logger.info(f"Round {revealed.sequence} of room {room.code} was already revealed")
+            # No foreign key constraint: the log may have been archived
+            session_log = SessionLog.objects.filter(id=revealed.session_log_id).first()
+            if session_log is None:
+                logger.warning(
+                    f"Round {revealed.sequence} of room {room.code} has no session log"
+                )
+            return session_log, False
+
+        session_log = create_session_log(room, story_point_average, selections, user_ids)
+        revealed.revealed_at = now
+        revealed.session_log = session_log
+        revealed.save(update_fields=["session_log"])
+        Room.objects.filter(id=room.id).update(
+            status=STATUS_CHOICES.COMPLETED, last_activity=now, updated_at=now
+        )
+    logger.info(
+        f"Revealed round {revealed.sequence} of room {room.code} as session log "
+        f"{session_log.id}"
+    )
+    return session_log, True
+
+
+def reveal_room_votes(room, sequence=None):
+    """
+    ``reveal_round`` with the votes currently stored for ``room``; the
+    average is taken over the numeric cards.
+    """
+    selections = {}
+    user_ids = {}
+    total = 0
+    count = 0
+    for participant in Participant.objects.filter(room=room).select_related("user"):
+        if participant.card_selection:
+            try:
+                total += float(participant.card_selection)
+                count += 1
+            except ValueError:
+                # Handle non-numeric cards like "Pass", "?", etc.
+                pass
+            selections[participant.user.username] = participant.card_selection
+            user_ids[participant.user.username] = participant.user_id
+
+    average = total / count if count > 0 else 0
+    return reveal_round(room, average, selections, user_ids, sequence)
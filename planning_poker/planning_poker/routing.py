@@ -1,6 +1,11 @@
 from django.urls import path
-from . import consumers
+from . import broadcaster, consumers
 
 websocket_urlpatterns = [
     path("ws/rooms/<str:room_id>/", consumers.RoomConsumer.as_asgi()),
 ]
+
+# Worker channels, consumed with ``python manage.py runworker <channel>``
+channel_routes = {
+    broadcaster.BROADCASTER_CHANNEL: broadcaster.RoomBroadcasterConsumer.as_asgi(),
+}
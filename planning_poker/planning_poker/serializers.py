@@ -1,6 +1,8 @@
 from rest_framework import serializers
-from planning_poker.models import Room, Participant, SessionLog, UserRole
+from planning_poker.models import Room, Participant, SessionLog, UserRole, ExportJob
+from planning_poker.fields import EXPORT_JOB_STATUS
 from django.contrib.auth.models import User
+from django.urls import reverse
 
 
 class ParticipantSerializer(serializers.ModelSerializer):
@@ -42,6 +44,7 @@ class RoomSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = [
             "id",
+            "code",
             "created_at",
             "host_username",
             "participant_count",
@@ -49,13 +52,11 @@ class RoomSerializer(serializers.ModelSerializer):
             "auto_closed",
         ]
 
-    def validate_code(self, value):
-        """Validate that code is not empty or blank"""
-        if not value or not value.strip():
-            raise serializers.ValidationError("Room code cannot be empty or blank")
-        return value.strip()
-
     def get_participant_count(self, obj):
+        # Room listings annotate the count; single rooms fall back to a query
+        count = getattr(obj, "participant_count", None)
+        if count is not None:
+            return count
         return obj.participant_set.count()
 
 
@@ -69,6 +70,7 @@ class SessionLogSerializer(serializers.ModelSerializer):
     last_activity = serializers.DateTimeField(
         source="room.last_activity", read_only=True
     )
+    stories_estimated = serializers.SerializerMethodField()
 
     class Meta:
         model = SessionLog
@@ -85,6 +87,7 @@ class SessionLogSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "last_activity",
+            "stories_estimated",
         ]
         read_only_fields = [
             "id",
@@ -99,7 +102,92 @@ class SessionLogSerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
             "last_activity",
+            "stories_estimated",
+        ]
+
+    def get_stories_estimated(self, obj):
+        # Per-room log counts are computed once per page by the view
+        story_counts = self.context.get("story_counts")
+        if story_counts is None:
+            return None
+        return story_counts.get(obj.room_id, 0)
+
+
+class SessionStatsSerializer(serializers.Serializer):
+    story_count = serializers.IntegerField()
+    average_points = serializers.FloatField()
+    median_points = serializers.FloatField()
+    consensus_rate = serializers.FloatField()
+    average_participants = serializers.FloatField()
+    max_participants = serializers.IntegerField()
+    last_session_at = serializers.DateTimeField()
+
+
+class RoomStatsSerializer(SessionStatsSerializer):
+    room_id = serializers.IntegerField()
+    room_code = serializers.CharField(source="room.code")
+    project_name = serializers.CharField(source="room.project_name")
+
+
+class HostDailyStatsSerializer(SessionStatsSerializer):
+    date = serializers.DateField()
+
+
+class ProjectStatsSerializer(SessionStatsSerializer):
+    project_name = serializers.CharField()
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            "id",
+            "export_format",
+            "compress",
+            "status",
+            "total_rows",
+            "rows_written",
+            "progress",
+            "file_size",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "expires_at",
+            "download_url",
         ]
+        read_only_fields = [
+            "id",
+            "status",
+            "total_rows",
+            "rows_written",
+            "progress",
+            "file_size",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "expires_at",
+            "download_url",
+        ]
+
+    def get_progress(self, obj):
+        """Percentage of rows written, once the total is known"""
+        if obj.status == EXPORT_JOB_STATUS.COMPLETED:
+            return 100
+        if not obj.total_rows:
+            return 0
+        return min(100, round(obj.rows_written * 100 / obj.total_rows))
+
+    def get_download_url(self, obj):
+        if obj.status != EXPORT_JOB_STATUS.COMPLETED:
+            return None
+        request = self.context.get("request")
+        url = reverse("export-job-download", kwargs={"pk": obj.pk})
+        return request.build_absolute_uri(url) if request else url
 
 
 class UserSerializer(serializers.ModelSerializer):
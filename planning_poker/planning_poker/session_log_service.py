@@ -0,0 +1,100 @@
+import math
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from planning_poker.db_router import pin_to_primary
+from planning_poker.exports import consensus_reached
+from planning_poker.models import (
+    HostDailyStats,
+    ProjectStats,
+    RoomStats,
+    SessionLog,
+    Vote,
+)
+
+
+def numeric_card_value(card_value):
+    """Numeric value of a card, or None for "?", "☕", "SKIPPED", T-shirt sizes..."""
+    try:
+        value = float(card_value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def build_votes(session_log, selections, user_ids):
+    """
+    Vote rows for a ``{username: card}`` selections dict. ``user_ids`` maps
+    usernames to user ids; unknown usernames get a vote without a user.
+    """
+    return [
+        Vote(
+            session_log=session_log,
+            user_id=user_ids.get(username),
+            card_value=str(card_value),
+            numeric_value=numeric_card_value(card_value),
+        )
+        for username, card_value in selections.items()
+        if card_value is not None
+    ]
+
+
+def user_ids_for(usernames):
+    return dict(
+        User.objects.filter(username__in=list(usernames)).values_list("username", "id")
+    )
+
+
+def create_session_log(room, story_point_average, selections, user_ids=None):
+    """
+    Record a revealed round: the SessionLog (with the selections JSON) and
+    one Vote row per selection, written together in one transaction.
+    """
+    if user_ids is None:
+        user_ids = user_ids_for(selections)
+
+    with transaction.atomic():
+        session_log = SessionLog.objects.create(
+            room=room,
+            story_point_average=story_point_average,
+            participant_selections=selections,
+        )
+        Vote.objects.bulk_create(build_votes(session_log, selections, user_ids))
+        record_session_stats(session_log, room)
+    # The host reads these back through replica-routed views
+    pin_to_primary(room.host_id)
+    return session_log
+
+
+def stats_keys(session_log, room):
+    """(model, lookup) for every rollup a session log counts towards, in lock order"""
+    return [
+        (RoomStats, {"room_id": room.id}),
+        (
+            HostDailyStats,
+            {"host_id": room.host_id, "date": timezone.localdate(session_log.timestamp)},
+        ),
+        (ProjectStats, {"host_id": room.host_id, "project_name": room.project_name}),
+    ]
+
+
+def add_to_stats(stats, session_log):
+    selections = session_log.participant_selections
+    stats.add(
+        session_log.story_point_average,
+        len(selections),
+        consensus_reached(selections),
+        session_log.timestamp,
+    )
+
+
+def record_session_stats(session_log, room):
+    """
+    Fold a new session log into its room, host-day and project rollups. Each
+    row is locked while it is updated, so concurrent reveals do not lose
+    counts; call inside the transaction that created the log.
+    """
+    for model, lookup in stats_keys(session_log, room):
+        stats, _ = model.objects.select_for_update().get_or_create(**lookup)
+        add_to_stats(stats, session_log)
+        stats.save()
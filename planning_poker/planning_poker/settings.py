@@ -82,6 +82,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "planning_poker.middleware.PrimaryPinMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -125,6 +126,39 @@ else:
         }
     }
 
+# Read replica: session history, exports, analytics and admin list views read
+# from DATABASE_REPLICA_URL when it is set. A user's reads stick to the
+# primary for DATABASE_REPLICA_STICKY_SECONDS after they write (tracked in the
+# cache, so shared across processes only with Redis).
+if "DATABASE_REPLICA_URL" in os.environ:
+    DATABASES["replica"] = dj_database_url.parse(os.environ["DATABASE_REPLICA_URL"])
+    DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+    DATABASE_ROUTERS = ["planning_poker.db_router.ReplicaRouter"]
+DATABASE_REPLICA_STICKY_SECONDS = int(os.getenv("DATABASE_REPLICA_STICKY_SECONDS", "5"))
+
+# Connection pooling on PostgreSQL (a psycopg 3 pool per database and
+# process): daphne's database threads and Celery tasks borrow connections
+# instead of opening one per call. Keep DATABASE_POOL_MAX_SIZE above
+# CONSUMER_DB_POOL_SIZE + 1 (the shared thread running HTTP views); waits
+# longer than DATABASE_POOL_TIMEOUT seconds fail. Health checks test each
+# connection before it is handed out: Django builds the pool with
+# check=ConnectionPool.check_connection when CONN_HEALTH_CHECKS is set, and
+# rejects a "check" key in the pool options.
+DATABASE_POOL = os.getenv("DATABASE_POOL", "true").lower() == "true"
+for database in DATABASES.values():
+    if DATABASE_POOL and database["ENGINE"] == "django.db.backends.postgresql":
+        database["CONN_MAX_AGE"] = 0
+        database["CONN_HEALTH_CHECKS"] = (
+            os.getenv("DATABASE_POOL_HEALTH_CHECKS", "true").lower() == "true"
+        )
+        database.setdefault("OPTIONS", {})["pool"] = {
+            "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", "12")),
+            "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", "10")),
+            "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", "300")),
+            "max_lifetime": float(os.getenv("DATABASE_POOL_MAX_LIFETIME", "1800")),
+        }
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -161,20 +195,71 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
-# Channels Configuration
+# Channels Configuration. With Redis, group messages reach members connected
+# to the sending process directly and go through Redis only for other nodes;
+# CHANNEL_LAYER_LOCAL_FIRST=false falls back to the plain Redis layer.
+CHANNEL_LAYER_LOCAL_FIRST = os.getenv("CHANNEL_LAYER_LOCAL_FIRST", "true").lower() == "true"
 if "REDIS_URL" in os.environ:
     CHANNEL_LAYERS = {
         "default": {
-            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "BACKEND": (
+                "planning_poker.channel_layers.LocalFirstChannelLayer"
+                if CHANNEL_LAYER_LOCAL_FIRST
+                else "channels_redis.core.RedisChannelLayer"
+            ),
             "CONFIG": {
                 "hosts": [os.environ["REDIS_URL"]],
             },
         },
     }
+elif DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # No Redis: LISTEN/NOTIFY on the database, which works across workers
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "planning_poker.channel_layers.PostgresChannelLayer",
+            "CONFIG": {"database": "default"},
+        }
+    }
 else:
     # In-memory channel layer for development
     CHANNEL_LAYERS = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
 
+# Room state broadcaster: consumers hand room mutations to a separate
+# `python manage.py runworker room-broadcaster` process, which loads and
+# encodes each room's state once for all its sockets. Needs a channel layer
+# shared between processes (Redis or PostgreSQL).
+ROOM_BROADCASTER = os.getenv("ROOM_BROADCASTER", "false").lower() == "true"
+
+# Room actors: each active room's game commands are applied by one task per
+# process, which stops after this many seconds without commands.
+ROOM_ACTOR_IDLE_TIMEOUT = float(os.getenv("ROOM_ACTOR_IDLE_TIMEOUT", "60"))
+
+# Caches: shared Redis cache when available, per-process memory otherwise
+if "REDIS_URL" in os.environ:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+
+# Room resolver: process-local LRU of code/id -> room id lookups, backed by
+# the shared cache when Redis is configured. Misses are cached for a shorter TTL.
+ROOM_RESOLVER_MAXSIZE = int(os.getenv("ROOM_RESOLVER_MAXSIZE", "10000"))
+ROOM_RESOLVER_TTL = int(os.getenv("ROOM_RESOLVER_TTL", "300"))
+ROOM_RESOLVER_NEGATIVE_TTL = int(os.getenv("ROOM_RESOLVER_NEGATIVE_TTL", "10"))
+ROOM_RESOLVER_CACHE = os.getenv(
+    "ROOM_RESOLVER_CACHE", "default" if "REDIS_URL" in os.environ else ""
+) or None
+
+# Session analytics: histories with at least this many logs are aggregated
+# in a process pool; results are cached until the host's next session log
+ANALYTICS_PROCESS_POOL_THRESHOLD = int(
+    os.getenv("ANALYTICS_PROCESS_POOL_THRESHOLD", "200000")
+)
+ANALYTICS_PROCESS_POOL_WORKERS = int(os.getenv("ANALYTICS_PROCESS_POOL_WORKERS", "2"))
+ANALYTICS_CACHE_TTL = int(os.getenv("ANALYTICS_CACHE_TTL", "3600"))
+
 # JWT Settings
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
@@ -221,14 +306,82 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "UTC"
 
+# Room code allocator: permutation key and sequence numbers reserved per query.
+# Changing the key on a live database can make new codes collide with old ones.
+ROOM_CODE_KEY = os.getenv("ROOM_CODE_KEY", SECRET_KEY)
+ROOM_CODE_BLOCK_SIZE = int(os.getenv("ROOM_CODE_BLOCK_SIZE", "32"))
+
+# Session log exports: rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "2000"))
+
+# Background export jobs: where files are written and how long they are kept
+EXPORT_ROOT = os.getenv("EXPORT_ROOT", str(BASE_DIR / "exports"))
+EXPORT_JOB_TTL_HOURS = int(os.getenv("EXPORT_JOB_TTL_HOURS", "24"))
+
+# Columnar session log snapshots for offline analytics, and how old a
+# session log has to be (in minutes) before it is snapshotted, so logs still
+# being committed are not skipped
+SNAPSHOT_ROOT = os.getenv("SNAPSHOT_ROOT", str(BASE_DIR / "snapshots"))
+SNAPSHOT_LAG_MINUTES = int(os.getenv("SNAPSHOT_LAG_MINUTES", "5"))
+
+# WebSocket consumer database calls: worker threads (each with its own
+# connection, 0 = Channels' single shared thread) and calls kept for the
+# queue wait / run time metrics
+CONSUMER_DB_POOL_SIZE = int(os.getenv("CONSUMER_DB_POOL_SIZE", "8"))
+CONSUMER_DB_METRICS_WINDOW = int(os.getenv("CONSUMER_DB_METRICS_WINDOW", "1000"))
+
+# Monthly session log partitions (PostgreSQL): months created ahead, age in
+# months after which a partition is archived (0, the default, keeps
+# everything) and where archived partitions go ("file" for gzipped CSV under
+# SESSION_LOG_ARCHIVE_ROOT, which has no default and must be set to archive
+# to files, "table" for the session log archive tables)
+SESSION_LOG_PARTITIONS_AHEAD = int(os.getenv("SESSION_LOG_PARTITIONS_AHEAD", "3"))
+SESSION_LOG_ARCHIVE_AFTER_MONTHS = int(
+    os.getenv("SESSION_LOG_ARCHIVE_AFTER_MONTHS", "0")
+)
+SESSION_LOG_ARCHIVE_MODE = os.getenv("SESSION_LOG_ARCHIVE_MODE", "file")
+SESSION_LOG_ARCHIVE_ROOT = os.getenv("SESSION_LOG_ARCHIVE_ROOT", "")
+
+# Background room sweepers: rows claimed per pass and seconds allowed per run
+ROOM_SWEEP_BATCH_SIZE = int(os.getenv("ROOM_SWEEP_BATCH_SIZE", "500"))
+ROOM_SWEEP_TIME_BUDGET = float(os.getenv("ROOM_SWEEP_TIME_BUDGET", "20"))
+
+# Guest (anonymous) users: days kept after last visit, sessions purged per
+# chunk and seconds allowed per purge run
+ANONYMOUS_SESSION_RETENTION_DAYS = int(
+    os.getenv("ANONYMOUS_SESSION_RETENTION_DAYS", "7")
+)
+ANONYMOUS_SESSION_PURGE_BATCH_SIZE = int(
+    os.getenv("ANONYMOUS_SESSION_PURGE_BATCH_SIZE", "500")
+)
+ANONYMOUS_SESSION_PURGE_TIME_BUDGET = float(
+    os.getenv("ANONYMOUS_SESSION_PURGE_TIME_BUDGET", "60")
+)
+
 # Celery Beat Schedule
 CELERY_BEAT_SCHEDULE = {
     "check-inactive-rooms": {
         "task": "planning_poker.tasks.check_inactive_rooms",
         "schedule": crontab(minute="*/5"),
+        "options": {"expires": 4 * 60},
     },
     "check-expired-timers": {
         "task": "planning_poker.tasks.check_expired_timers",
         "schedule": 30.0,
+        "options": {"expires": 25},
+    },
+    "purge-anonymous-sessions": {
+        "task": "planning_poker.tasks.purge_anonymous_sessions",
+        # Hourly, so a backlog larger than one time budget clears within the day
+        "schedule": crontab(minute=45),
+        "options": {"expires": 55 * 60},
+    },
+    "cleanup-expired-exports": {
+        "task": "planning_poker.tasks.cleanup_expired_exports",
+        "schedule": crontab(minute=15),
+    },
+    "maintain-session-log-partitions": {
+        "task": "planning_poker.tasks.maintain_session_log_partitions",
+        "schedule": crontab(hour=4, minute=0),
     },
 }
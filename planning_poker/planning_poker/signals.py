@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from planning_poker.models import Room
+from planning_poker.room_resolver import room_resolver
+
+
+@receiver(post_save, sender=Room)
+def invalidate_room_lookup_on_save(sender, instance, created, **kwargs):
+    """Drop negative lookups cached before the room existed"""
+    # Codes never change, so saves of an existing room keep its mapping valid
+    if created:
+        room_resolver.invalidate_room(instance)
+
+
+@receiver(post_delete, sender=Room)
+def invalidate_room_lookup_on_delete(sender, instance, **kwargs):
+    room_resolver.invalidate_room(instance)
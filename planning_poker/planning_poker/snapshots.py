@@ -0,0 +1,168 @@
+import json
+import os
+from datetime import datetime, timedelta
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from planning_poker.analytics import (
+    compute_analytics,
+    extract_session_arrays,
+    select_logs,
+)
+from planning_poker.models import SessionLog
+
+SNAPSHOT_VERSION = 2
+
+# One fixed-width little-endian file per column
+LOG_COLUMNS = {
+    "id": "<i8",
+    "timestamp": "<i8",
+    "room_id": "<i8",
+    "host_id": "<i8",
+    "average": "<f8",
+    "point_system": "<i4",
+    "participant_count": "<i4",
+    "vote_count": "<i4",
+}
+VOTE_COLUMNS = {
+    "vote_log": "<i8",
+    "vote_card": "<i4",
+}
+
+
+def _empty_meta():
+    # ``until``: logs are in the snapshot iff their timestamp is before it
+    return {"version": SNAPSHOT_VERSION, "rows": 0, "votes": 0, "until": None}
+
+
+def _column_path(root, name):
+    return os.path.join(root, f"{name}.bin")
+
+
+def _write_json(path, data):
+    """Replace a JSON file atomically"""
+    partial_path = f"{path}.part"
+    with open(partial_path, "w") as f:
+        json.dump(data, f)
+    os.replace(partial_path, path)
+
+
+def read_meta(root):
+    try:
+        with open(os.path.join(root, "meta.json")) as f:
+            meta = json.load(f)
+        with open(os.path.join(root, "strings.json")) as f:
+            strings = json.load(f)
+    except FileNotFoundError:
+        return _empty_meta(), []
+    if meta.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version in {root}")
+    return meta, strings
+
+
+def _append(root, columns, arrays, count):
+    for name, dtype in columns.items():
+        with open(_column_path(root, name), "ab") as f:
+            # Drop anything written after the last committed meta.json
+            f.truncate(count * np.dtype(dtype).itemsize)
+            f.write(np.ascontiguousarray(arrays[name], dtype=dtype).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def update_snapshot(root=None, chunk_size=None, rebuild=False, lag_minutes=None):
+    """
+    Append the session logs timestamped between the snapshot's ``until``
+    and ``lag_minutes`` ago. Column files are written first and
+    ``meta.json`` last, so an interrupted run leaves the previous snapshot
+    intact. Returns the updated meta.
+
+    Logs are picked by timestamp rather than id: ids are handed out before
+    commit, so a log can commit after one with a higher id has been
+    snapshotted. The lag leaves time for such transactions to commit before
+    their window is read. Logs archived or deleted afterwards stay in the
+    snapshot: rebuild it after archiving old partitions.
+    """
+    root = root or settings.SNAPSHOT_ROOT
+    lag_minutes = settings.SNAPSHOT_LAG_MINUTES if lag_minutes is None else lag_minutes
+    os.makedirs(root, exist_ok=True)
+    meta, strings = (_empty_meta(), []) if rebuild else read_meta(root)
+
+    until = timezone.now() - timedelta(minutes=lag_minutes)
+    logs = SessionLog.objects.filter(timestamp__lt=until)
+    if meta["until"] is not None:
+        since = datetime.fromisoformat(meta["until"])
+        # A longer lag than last time must not move the window back
+        until = max(until, since)
+        logs = logs.filter(timestamp__gte=since, timestamp__lt=until)
+    arrays = extract_session_arrays(logs, chunk_size=chunk_size, strings=strings)
+    added = len(arrays["id"])
+
+    skipped = np.array(
+        [value == "SKIPPED" for value in arrays["strings"]], dtype=bool
+    )
+    counted = ~skipped[arrays["vote_card"]]
+    arrays["vote_count"] = np.bincount(
+        arrays["vote_log"][counted], minlength=added
+    )
+    # Votes point at rows of the whole snapshot, not of this batch
+    arrays["vote_log"] = arrays["vote_log"].astype(np.int64) + meta["rows"]
+
+    _append(root, LOG_COLUMNS, arrays, meta["rows"])
+    _append(root, VOTE_COLUMNS, arrays, meta["votes"])
+    _write_json(os.path.join(root, "strings.json"), arrays["strings"])
+
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "rows": meta["rows"] + added,
+        "votes": meta["votes"] + len(arrays["vote_card"]),
+        "until": until.isoformat(),
+    }
+    _write_json(os.path.join(root, "meta.json"), meta)
+    return meta
+
+
+def _map(root, name, dtype, count):
+    if not count:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(_column_path(root, name), dtype=dtype, mode="r", shape=(count,))
+
+
+def load_snapshot(root=None):
+    """
+    Memory-map a snapshot as the column arrays ``compute_analytics`` takes.
+    Nothing is read from the database and pages are only loaded as queries
+    touch them.
+    """
+    root = root or settings.SNAPSHOT_ROOT
+    meta, strings = read_meta(root)
+    arrays = {
+        name: _map(root, name, dtype, meta["rows"])
+        for name, dtype in LOG_COLUMNS.items()
+    }
+    arrays.update(
+        {
+            name: _map(root, name, dtype, meta["votes"])
+            for name, dtype in VOTE_COLUMNS.items()
+        }
+    )
+    arrays["strings"] = strings
+    return arrays
+
+
+def snapshot_analytics(root=None, host_id=None, start=None, end=None):
+    """
+    ``compute_analytics`` over a snapshot, optionally limited to one host and
+    to logs with ``start <= timestamp < end`` (Unix seconds).
+    """
+    arrays = load_snapshot(root)
+    mask = np.ones(len(arrays["id"]), dtype=bool)
+    if host_id is not None:
+        mask &= arrays["host_id"] == host_id
+    if start is not None:
+        mask &= arrays["timestamp"] >= start
+    if end is not None:
+        mask &= arrays["timestamp"] < end
+    if not mask.all():
+        arrays = select_logs(arrays, mask)
+    return compute_analytics(arrays)
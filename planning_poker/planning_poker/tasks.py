@@ -1,82 +1,272 @@
 from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 from datetime import timedelta
 from channels.layers import get_channel_layer
 from asgiref.sync import async_to_sync
-from .models import Room
-from .fields import STATUS_CHOICES
+from .models import Room, AnonymousSession, ExportJob, SessionLog
+from .fields import STATUS_CHOICES, EXPORT_JOB_STATUS
+from .exports import ALL_EXPORT_COLUMNS, write_export_file
+from .partitions import maintain_partitions
+from .db_router import read_alias
 import logging
+import os
+import time
 
 logger = logging.getLogger(__name__)
 
 
+def sweep_rooms(queryset, updates, batch_size=None, time_budget=None):
+    """
+    Apply ``updates`` to every room matched by ``queryset`` in chunked passes.
+
+    Each pass claims up to ``batch_size`` rows with
+    ``SELECT ... FOR UPDATE SKIP LOCKED`` and updates them with a single
+    ``UPDATE ... WHERE id IN (...)`` inside the same transaction, so several
+    workers can run the same sweep concurrently without processing a room
+    twice. The sweep stops once the queryset is drained or ``time_budget``
+    seconds have elapsed; whatever is left is picked up by the next run.
+
+    ``updated_at`` is set along with ``updates``: ``QuerySet.update`` skips
+    ``auto_now`` fields.
+
+    Yields the list of ``(id, code)`` tuples updated by each pass once its
+    transaction has committed.
+    """
+    batch_size = settings.ROOM_SWEEP_BATCH_SIZE if batch_size is None else batch_size
+    time_budget = settings.ROOM_SWEEP_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget
+
+    while time.monotonic() < deadline:
+        with transaction.atomic():
+            batch = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by("id")
+                .values_list("id", "code")[:batch_size]
+            )
+            if not batch:
+                return
+            Room.objects.filter(id__in=[room_id for room_id, _ in batch]).update(
+                **updates, updated_at=timezone.now()
+            )
+        yield batch
+
+
+def notify_rooms(codes, event):
+    """Send ``event`` to the channel group of every room in ``codes``"""
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    for code in codes:
+        try:
+            async_to_sync(channel_layer.group_send)(f"room_{code}", event)
+        except Exception as e:
+            logger.error(f"Error notifying room {code}: {e}")
+
+
 @shared_task
-def check_inactive_rooms():
+def check_inactive_rooms(batch_size=None, time_budget=None):
     """Check for inactive rooms and close them"""
+    processed = 0
+    passes = 0
+    started = time.monotonic()
     try:
         inactive_threshold = timezone.now() - timedelta(minutes=30)
         inactive_rooms = Room.objects.filter(
             last_activity__lt=inactive_threshold,
             auto_closed=False,
-            status__in=[STATUS_CHOICES.ACTIVE, STATUS_CHOICES.WAITING],
+            status__in=[STATUS_CHOICES.ACTIVE, STATUS_CHOICES.PENDING],
         )
 
-        channel_layer = get_channel_layer()
-
-        for room in inactive_rooms:
-            logger.info(f"Auto-closing inactive room: {room.code}")
+        for batch in sweep_rooms(
+            inactive_rooms,
+            {"status": STATUS_CHOICES.COMPLETED, "auto_closed": True},
+            batch_size=batch_size,
+            time_budget=time_budget,
+        ):
+            passes += 1
+            processed += len(batch)
+            logger.info(
+                f"check_inactive_rooms pass {passes}: auto-closed {len(batch)} rooms"
+            )
 
-            try:
-                # Update room status
-                room.status = STATUS_CHOICES.COMPLETED
-                room.auto_closed = True
-                room.save()
-
-                # Notify connected clients
-                if channel_layer:
-                    async_to_sync(channel_layer.group_send)(
-                        f"room_{room.code}",
-                        {
-                            "type": "room_auto_closed",
-                            "reason": "Room closed due to inactivity (30 minutes)",
-                        },
-                    )
-            except Exception as e:
-                logger.error(f"Error closing room {room.code}: {e}")
+            # Notify connected clients
+            notify_rooms(
+                [code for _, code in batch],
+                {
+                    "type": "room_auto_closed",
+                    "reason": "Room closed due to inactivity (30 minutes)",
+                },
+            )
 
     except Exception as e:
         logger.error(f"Error in check_inactive_rooms task: {e}")
 
+    return {
+        "processed": processed,
+        "passes": passes,
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+
 
 @shared_task
-def check_expired_timers():
+def check_expired_timers(batch_size=None, time_budget=None):
     """Check for expired room timers and notify clients"""
+    processed = 0
+    passes = 0
+    started = time.monotonic()
     try:
         now = timezone.now()
         expired_timer_rooms = Room.objects.filter(
             is_timer_active=True, timer_end_time__lt=now, enable_timer=True
         )
 
-        channel_layer = get_channel_layer()
+        for batch in sweep_rooms(
+            expired_timer_rooms,
+            {"is_timer_active": False},
+            batch_size=batch_size,
+            time_budget=time_budget,
+        ):
+            passes += 1
+            processed += len(batch)
+            logger.info(
+                f"check_expired_timers pass {passes}: stopped {len(batch)} timers"
+            )
+
+            # Notify connected clients
+            notify_rooms([code for _, code in batch], {"type": "timer_expired"})
+
+    except Exception as e:
+        logger.error(f"Error in check_expired_timers task: {e}")
+
+    return {
+        "processed": processed,
+        "passes": passes,
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+
+
+@shared_task
+def purge_anonymous_sessions(days=None, batch_size=None, time_budget=None):
+    """Delete guest users and sessions past the retention window"""
+    started = time.monotonic()
+    purged = 0
+    try:
+        purged = AnonymousSession.cleanup_old_sessions(
+            days=days,
+            batch_size=batch_size,
+            time_budget=time_budget,
+            progress=lambda total: logger.info(
+                f"purge_anonymous_sessions: purged {total} guest sessions so far"
+            ),
+        )
+    except Exception as e:
+        logger.error(f"Error in purge_anonymous_sessions task: {e}")
+
+    return {"processed": purged, "elapsed": round(time.monotonic() - started, 3)}
+
+
+@shared_task
+def run_export_job(job_id):
+    """Write a host's session log export to local storage, reporting progress"""
+    started = time.monotonic()
 
-        for room in expired_timer_rooms:
-            logger.info(f"Timer expired for room: {room.code}")
+    # Claim the job so a redelivered task does not run it twice
+    claimed = ExportJob.objects.filter(
+        id=job_id, status=EXPORT_JOB_STATUS.PENDING
+    ).update(status=EXPORT_JOB_STATUS.RUNNING, started_at=timezone.now())
+    if not claimed:
+        return {"processed": 0, "elapsed": 0.0}
 
+    job = ExportJob.objects.select_related("user").get(id=job_id)
+    jobs = ExportJob.objects.filter(id=job.id)
+    extension = f"{job.export_format}.gz" if job.compress else job.export_format
+    path = os.path.join(settings.EXPORT_ROOT, f"{job.id}.{extension}")
+    rows_written = 0
+
+    try:
+        logs = (
+            SessionLog.objects.using(read_alias(job.user))
+            .filter(room__host=job.user)
+            .select_related("room", "room__host", "round")
+            .order_by("-timestamp", "-id")
+        )
+        jobs.update(total_rows=logs.count())
+        os.makedirs(settings.EXPORT_ROOT, exist_ok=True)
+
+        def progress(rows):
+            nonlocal rows_written
+            rows_written = rows
+            jobs.update(rows_written=rows)
+
+        size = write_export_file(
+            path,
+            logs,
+            ALL_EXPORT_COLUMNS,
+            job.export_format,
+            job.compress,
+            progress=progress,
+        )
+
+        now = timezone.now()
+        jobs.update(
+            status=EXPORT_JOB_STATUS.COMPLETED,
+            file_path=path,
+            file_size=size,
+            finished_at=now,
+            expires_at=now + timedelta(hours=settings.EXPORT_JOB_TTL_HOURS),
+        )
+        logger.info(f"Export job {job.id} wrote {rows_written} rows ({size} bytes)")
+    except Exception as e:
+        logger.error(f"Error in export job {job.id}: {e}")
+        now = timezone.now()
+        jobs.update(
+            status=EXPORT_JOB_STATUS.FAILED,
+            error=str(e),
+            finished_at=now,
+            expires_at=now + timedelta(hours=settings.EXPORT_JOB_TTL_HOURS),
+        )
+        for leftover in (path, f"{path}.part"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return {"processed": rows_written, "elapsed": round(time.monotonic() - started, 3)}
+
+
+@shared_task
+def cleanup_expired_exports():
+    """Delete export files and jobs past their expiry"""
+    removed = 0
+    try:
+        now = timezone.now()
+        # Jobs that never finished (e.g. lost worker) expire from creation time
+        stale = now - timedelta(hours=settings.EXPORT_JOB_TTL_HOURS)
+        expired = ExportJob.objects.filter(
+            Q(expires_at__lt=now) | Q(expires_at__isnull=True, created_at__lt=stale)
+        )
+        for job_id, file_path in expired.values_list("id", "file_path"):
             try:
-                # Stop the timer
-                room.is_timer_active = False
-                room.save()
-
-                # Notify connected clients
-                if channel_layer:
-                    async_to_sync(channel_layer.group_send)(
-                        f"room_{room.code}",
-                        {
-                            "type": "timer_expired",
-                        },
-                    )
+                if file_path and os.path.exists(file_path):
+                    os.remove(file_path)
+                ExportJob.objects.filter(id=job_id).delete()
+                removed += 1
             except Exception as e:
-                logger.error(f"Error handling expired timer for room {room.code}: {e}")
+                logger.error(f"Error removing export job {job_id}: {e}")
+    except Exception as e:
+        logger.error(f"Error in cleanup_expired_exports task: {e}")
 
+    return {"processed": removed}
+
+
+@shared_task
+def maintain_session_log_partitions():
+    """Create upcoming session log partitions and archive old ones"""
+    try:
+        report = maintain_partitions()
     except Exception as e:
-        logger.error(f"Error in check_expired_timers task: {e}")
+        logger.error(f"Error in maintain_session_log_partitions task: {e}")
+        return {"created": 0, "archived": 0}
+
+    return {"created": len(report["created"]), "archived": len(report["archived"])}
@@ -0,0 +1,178 @@
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from planning_poker.exports import parse_range_header
+from planning_poker.models import Participant, Room, Round, SessionLog, Vote
+from planning_poker.pagination import RoomPagination
+from planning_poker.round_service import reveal_room_votes
+from planning_poker.utils import (
+    CODE_ALPHABET,
+    CODE_FIRST_ALPHABET,
+    RoomCodeAllocator,
+    RoomCodePermutation,
+)
+
+
+class RoomCodePermutationTests(SimpleTestCase):
+    def test_permutation_is_a_bijection(self):
+        # Length 3 is the smallest code space, small enough to walk in full
+        permutation = RoomCodePermutation("test-key", length=3)
+        images = [permutation.permute(value) for value in range(permutation.size)]
+        self.assertEqual(sorted(images), list(range(permutation.size)))
+
+    def test_codes_are_unique_and_well_formed(self):
+        permutation = RoomCodePermutation("test-key", length=3)
+        codes = {permutation.encode(value) for value in range(permutation.size)}
+        self.assertEqual(len(codes), permutation.size)
+        for code in codes:
+            self.assertEqual(len(code), 3)
+            self.assertIn(code[0], CODE_FIRST_ALPHABET)
+            self.assertTrue(all(char in CODE_ALPHABET for char in code))
+
+    def test_key_changes_the_order(self):
+        first = RoomCodePermutation("key-one", length=3)
+        second = RoomCodePermutation("key-two", length=3)
+        values = range(50)
+        self.assertNotEqual(
+            [first.encode(v) for v in values], [second.encode(v) for v in values]
+        )
+
+    def test_index_outside_the_code_space(self):
+        permutation = RoomCodePermutation("test-key", length=3)
+        with self.assertRaises(ValueError):
+            permutation.permute(permutation.size)
+        with self.assertRaises(ValueError):
+            permutation.permute(-1)
+
+
+class RoomCodeAllocatorTests(TestCase):
+    def test_codes_stay_unique_across_blocks(self):
+        allocator = RoomCodeAllocator(length=4, block_size=7, key="test-key")
+        codes = [allocator.allocate() for _ in range(50)]
+        self.assertEqual(len(set(codes)), len(codes))
+
+    def test_allocators_share_the_sequence(self):
+        first = RoomCodeAllocator(length=4, block_size=5, key="test-key")
+        second = RoomCodeAllocator(length=4, block_size=5, key="test-key")
+        codes = [
+            allocator.allocate() for _ in range(12) for allocator in (first, second)
+        ]
+        self.assertEqual(len(set(codes)), len(codes))
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.host = User.objects.create_user(username="host")
+
+    def request(self, **params):
+        return Request(self.factory.get("/api/rooms/", params))
+
+    def test_cursor_round_trip(self):
+        paginator = RoomPagination()
+        room = Room.objects.create(code="ABC123", host=self.host)
+        cursor = paginator.encode_cursor(room.created_at, room.pk)
+        self.assertEqual(
+            paginator.decode_cursor(self.request(cursor=cursor)),
+            (room.created_at, room.pk),
+        )
+
+    def test_invalid_cursor(self):
+        paginator = RoomPagination()
+        for cursor in ("not-base64!", "bm90IGpzb24=", "WyJub3QgYSBkYXRlIiwgMV0="):
+            with self.assertRaises(NotFound):
+                paginator.decode_cursor(self.request(cursor=cursor))
+
+    def test_pages_cover_every_row_once(self):
+        rooms = [
+            Room.objects.create(code=f"ROOM{index:02d}", host=self.host)
+            for index in range(7)
+        ]
+        # Ties on created_at are broken by id
+        Room.objects.filter(id__in=[room.id for room in rooms[:4]]).update(
+            created_at=rooms[0].created_at
+        )
+
+        seen = []
+        params = {"page_size": 3}
+        while True:
+            paginator = RoomPagination()
+            page = paginator.paginate_queryset(
+                Room.objects.all(), self.request(**params)
+            )
+            seen.extend(room.id for room in page)
+            if paginator.next_position is None:
+                break
+            params["cursor"] = paginator.encode_cursor(*paginator.next_position)
+
+        self.assertEqual(sorted(seen), sorted(room.id for room in rooms))
+        self.assertEqual(len(seen), len(set(seen)))
+
+
+class RangeHeaderTests(SimpleTestCase):
+    def test_ranges(self):
+        self.assertEqual(parse_range_header("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range_header("bytes=900-", 1000), (900, 999))
+        # The end is clamped to the file
+        self.assertEqual(parse_range_header("bytes=900-5000", 1000), (900, 999))
+
+    def test_suffix_ranges(self):
+        self.assertEqual(parse_range_header("bytes=-100", 1000), (900, 999))
+        # A suffix longer than the file is the whole file
+        self.assertEqual(parse_range_header("bytes=-5000", 1000), (0, 999))
+
+    def test_no_usable_range(self):
+        for header in (None, "", "items=0-1", "bytes=0-1,5-6", "bytes=a-b", "bytes=-"):
+            self.assertIsNone(parse_range_header(header, 1000), header)
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=1000-", "bytes=5-3", "bytes=-0"):
+            with self.assertRaises(ValueError, msg=header):
+                parse_range_header(header, 1000)
+        with self.assertRaises(ValueError):
+            parse_range_header("bytes=0-", 0)
+
+
+class RevealTests(TestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(username="host")
+        self.guest = User.objects.create_user(username="guest")
+        self.room = Room.objects.create(code="ROUND1", host=self.host)
+        Participant.objects.create(room=self.room, user=self.host, card_selection="3")
+        Participant.objects.create(room=self.room, user=self.guest, card_selection="5")
+
+    def test_second_reveal_returns_the_first_log(self):
+        first, created = reveal_room_votes(self.room)
+        self.assertTrue(created)
+        second, created = reveal_room_votes(self.room)
+        self.assertFalse(created)
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(SessionLog.objects.filter(room=self.room).count(), 1)
+        self.assertEqual(Vote.objects.filter(session_log=first).count(), 2)
+        self.assertEqual(first.story_point_average, 4)
+
+    def test_votes_changed_after_a_reveal_are_not_logged(self):
+        session_log, _ = reveal_room_votes(self.room)
+        Participant.objects.filter(user=self.guest).update(card_selection="8")
+        again, _ = reveal_room_votes(self.room)
+        self.assertEqual(
+            again.participant_selections, session_log.participant_selections
+        )
+
+    def test_reveal_by_round_number(self):
+        reveal_room_votes(self.room)
+        session_log, created = reveal_room_votes(self.room, sequence=1)
+        self.assertFalse(created)
+        revealed = Round.objects.get(room=self.room, sequence=1)
+        self.assertEqual(revealed.session_log, session_log)
+        with self.assertRaises(Round.DoesNotExist):
+            reveal_room_votes(self.room, sequence=2)
+
+    def test_revealed_round_without_its_log(self):
+        reveal_room_votes(self.room)
+        SessionLog.objects.filter(room=self.room).delete()
+        self.assertEqual(reveal_room_votes(self.room), (None, False))
+        self.assertEqual(SessionLog.objects.filter(room=self.room).count(), 0)
@@ -1,6 +1,119 @@
-import random
+import hashlib
+import hmac
+import math
 import string
-from planning_poker.models import Room
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from planning_poker.models import RoomCodeSequence
+
+# Codes always start with a letter; the remaining characters are alphanumeric
+CODE_FIRST_ALPHABET = string.ascii_uppercase
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+
+
+class RoomCodePermutation:
+    """
+    Keyed bijection from the integers ``[0, size)`` onto room codes.
+
+    A balanced Feistel network over ``[0, half**2)`` (with ``half**2 >= size``)
+    scrambles the index and cycle-walking folds it back into ``[0, size)``, so
+    consecutive indexes map to unrelated-looking but never colliding codes.
+    """
+
+    rounds = 4
+
+    def __init__(self, key, length=6):
+        if length < 3:
+            length = 6  # Ensure minimum length
+        self.length = length
+        self.size = len(CODE_FIRST_ALPHABET) * len(CODE_ALPHABET) ** (length - 1)
+        self.half = math.isqrt(self.size - 1) + 1
+        self.key = key.encode() if isinstance(key, str) else key
+
+    def _round(self, index, value):
+        digest = hmac.new(
+            self.key, f"{index}:{value}".encode(), hashlib.sha256
+        ).digest()
+        return int.from_bytes(digest[:8], "big") % self.half
+
+    def _feistel(self, value):
+        left, right = divmod(value, self.half)
+        for index in range(self.rounds):
+            left, right = right, (left + self._round(index, right)) % self.half
+        return left * self.half + right
+
+    def permute(self, value):
+        if not 0 <= value < self.size:
+            raise ValueError(f"Room code index {value} is outside the code space")
+        value = self._feistel(value)
+        while value >= self.size:
+            value = self._feistel(value)
+        return value
+
+    def encode(self, value):
+        """Return the room code for sequence number ``value``"""
+        value = self.permute(value)
+        chars = []
+        for _ in range(self.length - 1):
+            value, digit = divmod(value, len(CODE_ALPHABET))
+            chars.append(CODE_ALPHABET[digit])
+        chars.append(CODE_FIRST_ALPHABET[value])
+        return "".join(reversed(chars))
+
+
+class RoomCodeAllocator:
+    """
+    Hands out room codes without probing the rooms table.
+
+    Sequence numbers are reserved from ``RoomCodeSequence`` in blocks (one
+    ``UPDATE`` per block) and mapped to codes through ``RoomCodePermutation``,
+    so every code handed out is unique by construction.
+    """
+
+    def __init__(self, length=6, block_size=None, key=None):
+        self.permutation = RoomCodePermutation(
+            key or settings.ROOM_CODE_KEY, length=length
+        )
+        self.block_size = block_size or settings.ROOM_CODE_BLOCK_SIZE
+        self.sequence_name = f"room_code:{self.permutation.length}"
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def _reserve_block(self):
+        with transaction.atomic():
+            sequence = RoomCodeSequence.objects.filter(name=self.sequence_name)
+            if not sequence.update(next_value=F("next_value") + self.block_size):
+                RoomCodeSequence.objects.get_or_create(name=self.sequence_name)
+                sequence.update(next_value=F("next_value") + self.block_size)
+            end = sequence.values_list("next_value", flat=True).get()
+        return end - self.block_size, end
+
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve_block()
+            value = self._next
+            self._next += 1
+
+        if value >= self.permutation.size:
+            raise ValueError(
+                f"Room code space of length {self.permutation.length} is exhausted."
+            )
+        return self.permutation.encode(value)
+
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_room_code_allocator(length=6):
+    with _allocators_lock:
+        if length not in _allocators:
+            _allocators[length] = RoomCodeAllocator(length=length)
+        return _allocators[length]
 
 
 def generate_unique_room_code(length=6):
@@ -11,33 +124,11 @@ def generate_unique_room_code(length=6):
         length (int): Length of the code to generate. Default is 6.
 
     Returns:
-        str: A unique room code that doesn't exist in the database.
-    """
-    if length < 3:
-        length = 6  # Ensure minimum length
-
-    max_attempts = 100  # Prevent infinite loops
-    attempts = 0
-
-    while attempts < max_attempts:
-        # Generate a random code of uppercase letters and digits
-        # Ensure first character is always a letter to avoid issues
-        first_char = random.choice(string.ascii_uppercase)
-        remaining_chars = "".join(
-            random.choices(string.ascii_uppercase + string.digits, k=length - 1)
-        )
-        code = first_char + remaining_chars
+        str: A room code no other allocation has returned. Only rooms created
+        before the allocator existed (random codes) can collide, which the
+        unique constraint on ``Room.code`` reports as an ``IntegrityError``.
 
-        # Double-check the code is valid
-        if len(code) == length and code and code.strip():
-            # Check if the code already exists in the database
-            if not Room.objects.filter(code=code).exists():
-                return code
-
-        attempts += 1
-
-    # If we can't generate a unique code after max_attempts, raise an exception
-    raise ValueError(
-        f"Could not generate unique room code after {max_attempts} attempts. "
-        f"Database may be full or there's a system issue."
-    )
+    Raises:
+        ValueError: If every code of this length has been handed out.
+    """
+    return get_room_code_allocator(length).allocate()